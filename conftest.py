@@ -0,0 +1,24 @@
+import shutil
+import tempfile
+
+import pytest
+
+
+@pytest.fixture(scope='session', autouse=True)
+def isolated_files():
+    """Файлы кэша, метрик и журналов тестов — во временном каталоге
+    (как core.testing.TestRunner для manage.py test)."""
+    from core.testing import isolated_settings
+
+    directory = tempfile.mkdtemp(prefix='yatube-tests-')
+    with isolated_settings(directory):
+        yield directory
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def clear_caches(isolated_files):
+    """Чистые кэши в начале каждого теста."""
+    from core.testing import clear_caches
+
+    clear_caches()
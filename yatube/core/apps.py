@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        # Сброс пользователя в кэше при его изменении и выходе,
+        # журнал медленных запросов для новых соединений
+        import core.signals  # noqa: F401
@@ -0,0 +1,68 @@
+"""Пользователь запроса из кэша вместо запроса к auth_user.
+
+Пользователь хранится в кэше процесса USER_CACHE_TIMEOUT секунд
+вместе с версией, под которой он был прочитан. Версия лежит в кэше,
+общем для всех процессов сервера (core.caches), и увеличивается при
+сохранении и удалении пользователя (в том числе при смене пароля
+и блокировке) и при выходе. Версия сверяется на каждом запросе,
+поэтому пользователь, изменённый в другом процессе, сразу читается
+из базы заново.
+Хэш пароля в сессии сверяется с пользователем из кэша так же, как
+в django.contrib.auth.get_user().
+"""
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+)
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+
+from core.caches import bump_version, get_version, now_and_on_commit
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def user_version_key(user_id):
+    return f'auth:user-version:{user_id}'
+
+
+def invalidate_user(user_id):
+    def drop():
+        cache.delete(user_cache_key(user_id))
+        bump_version(user_version_key(user_id))
+    now_and_on_commit(drop)
+
+
+def get_user(request):
+    """Пользователь сессии запроса или AnonymousUser."""
+    try:
+        user_id = get_user_model()._meta.pk.to_python(
+            request.session[SESSION_KEY]
+        )
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    # Версия читается до пользователя: изменение, сделанное между
+    # ними, увидит следующий запрос
+    version = get_version(user_version_key(user_id))
+    key = user_cache_key(user_id)
+    cached = cache.get(key) if version is not None else None
+    if cached is None or cached[0] != version:
+        user = auth.get_user(request)
+        if user.is_authenticated and version is not None:
+            cache.set(key, (version, user), settings.USER_CACHE_TIMEOUT)
+        return user
+    user = cached[1]
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    if not (session_hash and constant_time_compare(
+            session_hash, user.get_session_auth_hash())):
+        request.session.flush()
+        return AnonymousUser()
+    user.backend = backend_path
+    return user
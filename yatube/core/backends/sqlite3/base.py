@@ -0,0 +1,73 @@
+"""Бэкенд SQLite с настройкой соединения через PRAGMA.
+
+Подключается как 'ENGINE': 'core.backends.sqlite3'. В OPTIONS базы,
+кроме параметров sqlite3.connect(), принимаются:
+
+pragmas — словарь PRAGMA, выполняемых при каждом новом соединении
+    (journal_mode, synchronous, mmap_size, cache_size, busy_timeout...);
+transaction_mode — режим BEGIN транзакций atomic(): DEFERRED
+    (по умолчанию), IMMEDIATE или EXCLUSIVE. С IMMEDIATE транзакция
+    сразу берёт блокировку записи и ждёт её busy_timeout, а не
+    получает "database is locked" при переходе от чтения к записи.
+"""
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+PRAGMA_NAME = re.compile(r'^[a-z_]+$')
+PRAGMA_VALUE = re.compile(r'^-?\w+$')
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+# busy_timeout выполняется первым: смена journal_mode тоже ждёт
+# блокировку
+PRAGMA_ORDER = ('busy_timeout', 'journal_mode')
+
+
+def pragma_statements(pragmas):
+    """Команды PRAGMA для словаря pragmas с проверкой имён и значений."""
+    names = sorted(
+        pragmas,
+        key=lambda name: (
+            PRAGMA_ORDER.index(name) if name in PRAGMA_ORDER
+            else len(PRAGMA_ORDER)
+        )
+    )
+    statements = []
+    for name in names:
+        value = str(pragmas[name])
+        if not PRAGMA_NAME.match(name) or not PRAGMA_VALUE.match(value):
+            raise ImproperlyConfigured(
+                f'Недопустимая PRAGMA SQLite: {name} = {value!r}'
+            )
+        statements.append(f'PRAGMA {name} = {value}')
+    return statements
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, settings_dict, *args, **kwargs):
+        super().__init__(settings_dict, *args, **kwargs)
+        options = settings_dict.get('OPTIONS', {})
+        self.pragmas = pragma_statements(options.get('pragmas', {}))
+        self.transaction_mode = (
+            options.get('transaction_mode') or 'DEFERRED'
+        ).upper()
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f'Недопустимый transaction_mode: {self.transaction_mode}'
+            )
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        # Параметры бэкенда, а не sqlite3.connect()
+        kwargs.pop('pragmas', None)
+        kwargs.pop('transaction_mode', None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for statement in self.pragmas:
+            connection.execute(statement).fetchall()
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
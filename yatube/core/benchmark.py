@@ -0,0 +1,93 @@
+"""Замер времени ответа страниц через WSGI-приложение сайта.
+
+Запросы проходят весь стек: WSGI-обработчик, middleware, view
+и шаблоны, — но без сети и HTTP-сервера. Для каждого адреса
+считаются перцентили времени ответа и количество SQL-запросов.
+"""
+import math
+import time
+from io import BytesIO
+from urllib.parse import unquote_to_bytes, urlsplit
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+
+from core.queries import QueryRecorder
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, p):
+    """Перцентиль p отсортированного списка values (метод ближайшего
+    ранга)."""
+    if not values:
+        return None
+    rank = math.ceil(p / 100 * len(values))
+    return values[max(rank, 1) - 1]
+
+
+def wsgi_environ(url, session_key=None):
+    """Окружение WSGI для GET-запроса к url."""
+    parts = urlsplit(url)
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        # Сервер передаёт путь раскодированным, байты UTF-8 — как latin-1
+        'PATH_INFO': unquote_to_bytes(parts.path).decode('iso-8859-1'),
+        'QUERY_STRING': parts.query,
+        'wsgi.input': BytesIO(),
+    }
+    if session_key is not None:
+        environ['HTTP_COOKIE'] = (
+            f'{settings.SESSION_COOKIE_NAME}={session_key}'
+        )
+    setup_testing_defaults(environ)
+    return environ
+
+
+def call_application(application, url, session_key=None):
+    """Выполняет запрос и возвращает (статус, секунды, SQL-запросы)."""
+    status = []
+
+    def start_response(status_line, headers, exc_info=None):
+        status.append(int(status_line.split()[0]))
+
+    recorder = QueryRecorder()
+    with recorder.record():
+        started = time.perf_counter()
+        response = application(wsgi_environ(url, session_key),
+                               start_response)
+        try:
+            for _ in response:
+                pass
+        finally:
+            if hasattr(response, 'close'):
+                response.close()
+        elapsed = time.perf_counter() - started
+    return status[0], elapsed, len(recorder)
+
+
+def measure(application, url, repeat, warmup=1, session_key=None):
+    """Результаты repeat запросов к url после warmup прогревочных."""
+    for _ in range(warmup):
+        call_application(application, url, session_key)
+    timings = []
+    queries = []
+    statuses = set()
+    for _ in range(repeat):
+        status, elapsed, count = call_application(
+            application, url, session_key
+        )
+        statuses.add(status)
+        timings.append(elapsed * 1000)
+        queries.append(count)
+    timings.sort()
+    result = {
+        'url': url,
+        'status': sorted(statuses),
+        'requests': repeat,
+        'mean_ms': sum(timings) / repeat,
+        'queries': max(queries),
+    }
+    for p in PERCENTILES:
+        result[f'p{p}_ms'] = percentile(timings, p)
+    return result
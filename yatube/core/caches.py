@@ -0,0 +1,50 @@
+"""Кэш, общий для всех процессов сервера, и версии в нём.
+
+Кэш default — в памяти процесса: изменения, сброшенные в нём,
+не видны другим процессам. Поэтому версии, по которым процессы
+узнают об изменениях друг друга (пользователи, кэш поиска групп
+и авторов), хранятся в кэше SHARED_CACHE_ALIAS: в файлах на диске
+сервера или в memcached (см. CACHES в настройках).
+"""
+import time
+
+from django.core.cache import caches
+from django.db import transaction
+
+SHARED_CACHE_ALIAS = 'shared'
+
+
+def shared_cache():
+    return caches[SHARED_CACHE_ALIAS]
+
+
+def get_version(key):
+    """Текущая версия key или None, если общий кэш недоступен.
+
+    Начальное значение берётся из времени, чтобы после вытеснения
+    версии из кэша она не совпала с одной из прежних.
+    """
+    cache = shared_cache()
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    """Увеличивает версию key; возвращает новую или None, если версии
+    нет в кэше (новая будет создана при обращении)."""
+    try:
+        return shared_cache().incr(key)
+    except ValueError:
+        return None
+
+
+def now_and_on_commit(func):
+    """Выполняет сброс func сейчас и, внутри транзакции, ещё раз после
+    её фиксации: другой процесс мог прочитать из базы прежнее
+    состояние до фиксации и сохранить его под новой версией."""
+    func()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(func)
@@ -0,0 +1,30 @@
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Шаг плана SQLite, означающий сортировку результата во временном индексе
+SORT_STEP = 'USE TEMP B-TREE FOR ORDER BY'
+
+
+def explain_query_plan(sql, params=None, using=DEFAULT_DB_ALIAS):
+    """Возвращает строки EXPLAIN QUERY PLAN для запроса SQLite.
+
+    Запрос с уже подставленными параметрами (например, из
+    CaptureQueriesContext) передаётся с params=None.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def explain_on_connection(connection, sql, params=None):
+    """EXPLAIN QUERY PLAN через отдельный курсор соединения connection
+    в обход execute_wrappers и журнала запросов; для баз не SQLite —
+    пустой список."""
+    if connection.vendor != 'sqlite':
+        return []
+    cursor = connection.create_cursor()
+    try:
+        with connection.wrap_database_errors:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
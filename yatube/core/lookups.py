@@ -0,0 +1,307 @@
+"""Кэш поиска объектов по уникальному полю в памяти процесса.
+
+ModelLookup хранит последние LOOKUP_CACHE_SIZE результатов поиска,
+в том числе «не найдено», не дольше LOOKUP_CACHE_TIMEOUT секунд.
+Значения, которых заведомо нет в базе, отсекает фильтр Блума по всем
+значениям поля: запросы ботов к несуществующим адресам не доходят
+до базы, даже если не помещаются в LRU. Фильтр строится одним
+запросом после первого промаха и перестраивается раз
+в LOOKUP_CACHE_TIMEOUT секунд; запрос идёт без блокировки, а до
+подмены работает прежний фильтр.
+
+Изменения в этом процессе сбрасываются сразу (invalidate), в других
+процессах — через версию в кэше, общем для процессов сервера
+(core.caches). Вместе с версией в общий кэш записываются изменённые
+значения: другие процессы сбрасывают только их записи и добавляют
+новые значения в фильтр. Если изменений не найти (вытеснены или
+процесс отстал больше чем на MAX_CHANGES), LRU и фильтр строятся
+заново. Если серверов несколько, общий кэш должен быть сетевым
+(memcached), иначе другие серверы узнают об изменениях только через
+LOOKUP_CACHE_TIMEOUT секунд.
+
+Промах, прочитанный с реплики, перепроверяется в основной базе:
+реплика могла ещё не получить новую группу или пользователя.
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from core.caches import (
+    bump_version, get_version, now_and_on_commit, shared_cache,
+)
+
+# Сколько изменений другого процесса применять по одному; при большем
+# отставании кэш строится заново
+MAX_CHANGES = 100
+
+
+class BloomFilter:
+    """Фильтр Блума по строкам на capacity значений с долей ложных
+    срабатываний error_rate."""
+    def __init__(self, capacity, error_rate):
+        self.capacity = max(capacity, 1)
+        self.size = max(64, math.ceil(
+            -self.capacity * math.log(error_rate) / math.log(2) ** 2
+        ))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, value):
+        # Двойное хэширование: k позиций из двух половин одного хэша
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [
+            (first + index * second) % self.size
+            for index in range(self.hashes)
+        ]
+
+    def add(self, value):
+        for position in self.positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self.positions(value)
+        )
+
+    @property
+    def full(self):
+        """Значений больше расчётного: ложных срабатываний больше."""
+        return self.count > self.capacity
+
+
+class ModelLookup:
+    """Поиск объектов model по уникальному строковому полю field.
+
+    В кэше хранятся значения полей, а get() каждый раз возвращает
+    новый объект, поэтому изменения объекта в одном запросе не видны
+    в других.
+    """
+    def __init__(self, name, model, field):
+        self.name = name
+        self.model = model
+        self.field = field
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.bloom = None
+        self.bloom_expires = 0.0
+        # Значения, добавленные, пока строится новый фильтр;
+        # None — фильтр не строится
+        self.pending = None
+        self.version = None
+        # Увеличивается при каждом сбросе: значение, прочитанное
+        # из базы до сброса, не записывается в кэш после него
+        self.generation = 0
+
+    @property
+    def version_key(self):
+        return f'core:lookup-version:{self.name}'
+
+    def change_key(self, version):
+        return f'core:lookup-change:{self.name}:{version}'
+
+    @property
+    def attnames(self):
+        return [field.attname for field in self.model._meta.concrete_fields]
+
+    def load(self, value, using=None):
+        """(база, значения полей объекта или None, если его нет)."""
+        queryset = self.model._default_manager.db_manager(using).filter(
+            **{self.field: value}
+        )
+        rows = list(queryset.values_list(*self.attnames)[:1])
+        return queryset.db, rows[0] if rows else None
+
+    def load_checked(self, value):
+        """load(), но промах на реплике перепроверяется в основной базе."""
+        db, values = self.load(value)
+        if values is None and db != DEFAULT_DB_ALIAS:
+            db, values = self.load(value, DEFAULT_DB_ALIAS)
+        return db, values
+
+    def remember(self, value, expires, db, values):
+        """Записывает результат поиска в LRU (под lock)."""
+        self.entries[value] = (expires, (db, values))
+        self.entries.move_to_end(value)
+        while len(self.entries) > settings.LOOKUP_CACHE_SIZE:
+            self.entries.popitem(last=False)
+
+    def build_bloom(self):
+        queryset = self.model._default_manager.using(
+            DEFAULT_DB_ALIAS
+        ).values_list(self.field, flat=True)
+        values = list(queryset.iterator())
+        # Запас на значения, добавленные до следующей перестройки
+        bloom = BloomFilter(
+            2 * len(values), settings.LOOKUP_BLOOM_ERROR_RATE
+        )
+        for value in values:
+            bloom.add(value)
+        return bloom
+
+    def rebuild_bloom(self, pending, now):
+        """Строит фильтр без блокировки и подменяет им прежний.
+
+        Значения, добавленные за время построения, дописываются
+        в новый фильтр; если за это время кэш сбросили целиком,
+        построенный фильтр мог устареть и отбрасывается.
+        """
+        try:
+            bloom = self.build_bloom()
+        except BaseException:
+            with self.lock:
+                if self.pending is pending:
+                    self.pending = None
+            raise
+        with self.lock:
+            if self.pending is not pending:
+                return
+            for value in pending:
+                bloom.add(value)
+            self.bloom = bloom
+            self.bloom_expires = now + settings.LOOKUP_CACHE_TIMEOUT
+            self.pending = None
+
+    def start_rebuild(self):
+        """Множество для значений, добавленных за время построения
+        фильтра, или None, если фильтр уже строит другой поток."""
+        if self.pending is not None:
+            return None
+        self.pending = set()
+        return self.pending
+
+    def instance(self, db, values):
+        if values is None:
+            return None
+        return self.model.from_db(db, self.attnames, values)
+
+    def bloom_stale(self, now):
+        """Фильтр пора перестроить; до подмены работает прежний."""
+        return self.bloom is not None and (
+            self.bloom.full or now >= self.bloom_expires
+        )
+
+    def fetch_changes(self, known, version):
+        """Изменения после версии known до version включительно
+        или None, если их нет в общем кэше или версия не менялась."""
+        if known is None or not 0 < version - known <= MAX_CHANGES:
+            return None
+        keys = [self.change_key(number)
+                for number in range(known + 1, version + 1)]
+        changes = shared_cache().get_many(keys)
+        if len(changes) != len(keys):
+            return None
+        return [changes[key] for key in keys]
+
+    def sync(self, known, version, changes):
+        """Догоняет версию другого процесса (под lock): изменения
+        применяются по одному, а если их нет — кэш строится заново."""
+        if version == self.version:
+            return
+        if changes is not None and known == self.version:
+            for values, pks in changes:
+                self.forget(values, pks)
+        else:
+            self.reset()
+        self.version = version
+
+    def get(self, value):
+        """Объект с полем field, равным value, или None."""
+        timeout = settings.LOOKUP_CACHE_TIMEOUT
+        if not timeout:
+            return self.instance(*self.load(value))
+        version = get_version(self.version_key)
+        if version is None:
+            # Без общего кэша об изменениях в других процессах не узнать
+            return self.instance(*self.load(value))
+        known = self.version
+        changes = self.fetch_changes(known, version)
+        now = time.monotonic()
+        with self.lock:
+            self.sync(known, version, changes)
+            entry = self.entries.get(value)
+            if entry is not None and entry[0] > now:
+                self.entries.move_to_end(value)
+                return self.instance(*entry[1])
+            # Устаревшему фильтру отказ не доверяется: значение могло
+            # появиться на другом сервере
+            rejected = (self.bloom is not None and now < self.bloom_expires
+                        and value not in self.bloom)
+            pending = self.start_rebuild() if self.bloom_stale(now) else None
+            generation = self.generation
+        if rejected:
+            if pending is not None:
+                self.rebuild_bloom(pending, now)
+            return None
+        db, values = self.load_checked(value)
+        with self.lock:
+            # Если пока шёл запрос значения сбросили, прочитанное могло
+            # устареть и в кэш не записывается
+            if generation == self.generation:
+                self.remember(value, now + timeout, db, values)
+            # Фильтр нужен только для отсутствующих значений: он строится
+            # после первого промаха одним потоком
+            if values is None and self.bloom is None and pending is None:
+                pending = self.start_rebuild()
+        if pending is not None:
+            self.rebuild_bloom(pending, now)
+        return self.instance(db, values)
+
+    def invalidate(self, values=(), pks=()):
+        """Сбрасывает записи значений values и объектов с pk из pks
+        (прежнее значение поля переименованного объекта) и сообщает
+        об изменении другим процессам; внутри транзакции — ещё раз
+        после её фиксации."""
+        values = set(values)
+        pks = set(pks)
+        now_and_on_commit(lambda: self.drop(values, pks))
+
+    def forget(self, values, pks):
+        """Сбрасывает записи и добавляет values в фильтр (под lock)."""
+        pk_index = self.attnames.index(self.model._meta.pk.attname)
+        self.generation += 1
+        for value, (_, (_, row)) in list(self.entries.items()):
+            if value in values or (
+                    row is not None and row[pk_index] in pks):
+                del self.entries[value]
+        if self.bloom is not None:
+            for value in values:
+                self.bloom.add(value)
+        if self.pending is not None:
+            self.pending.update(values)
+
+    def drop(self, values, pks):
+        with self.lock:
+            self.forget(values, pks)
+        version = bump_version(self.version_key)
+        if version is None:
+            return
+        # Другие процессы применят изменение, не сбрасывая весь кэш
+        shared_cache().set(
+            self.change_key(version), (values, pks),
+            settings.LOOKUP_CACHE_TIMEOUT,
+        )
+        with self.lock:
+            # Свой сброс уже выполнен, перестраивать не нужно
+            if self.version == version - 1:
+                self.version = version
+
+    def reset(self):
+        self.entries.clear()
+        self.bloom = None
+        self.pending = None
+        self.generation += 1
+
+    def clear(self):
+        with self.lock:
+            self.reset()
+            self.version = None
@@ -0,0 +1,91 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SORT_KEYS = {
+    'total': 'total_ms',
+    'max': 'max_ms',
+    'count': 'count',
+}
+
+
+def summarize(records):
+    """Сводка записей журнала по формам запросов."""
+    shapes = {}
+    for record in records:
+        summary = shapes.setdefault(record['shape'], {
+            'shape': record['shape'],
+            'count': 0,
+            'total_ms': 0.0,
+            'max_ms': 0.0,
+            'views': set(),
+        })
+        suppressed = record.get('suppressed') or {}
+        summary['count'] += 1 + suppressed.get('count', 0)
+        summary['total_ms'] += record['ms'] + suppressed.get('ms', 0)
+        summary['max_ms'] = max(
+            summary['max_ms'], record['ms'], suppressed.get('max_ms', 0)
+        )
+        if record.get('view'):
+            summary['views'].add(record['view'])
+        # План и пример — из самой медленной записанной строки
+        if record['ms'] >= summary.get('example_ms', 0):
+            summary.update(
+                example_ms=record['ms'], sql=record['sql'],
+                params=record.get('params'), plan=record.get('plan', [])
+            )
+    return list(shapes.values())
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводка журнала медленных SQL-запросов по формам запросов: '
+        'количество, суммарное и наибольшее время, view и план'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--log', help='Файл журнала; по умолчанию SLOW_QUERY_LOG'
+        )
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument(
+            '--sort', choices=list(SORT_KEYS), default='total',
+            help='Порядок: суммарное время, наибольшее время, количество'
+        )
+
+    def read_records(self, path):
+        try:
+            with open(path, encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        # Строка, дописанная наполовину
+                        continue
+        except FileNotFoundError:
+            raise CommandError(f'Журнал {path} не найден')
+
+    def handle(self, *args, **options):
+        path = options['log'] or settings.SLOW_QUERY_LOG
+        summaries = sorted(
+            summarize(self.read_records(path)),
+            key=lambda summary: summary[SORT_KEYS[options['sort']]],
+            reverse=True
+        )[:options['limit']]
+        if not summaries:
+            self.stdout.write('Медленных запросов нет')
+        for place, summary in enumerate(summaries, 1):
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{place}. {summary['count']} раз, всего "
+                f"{summary['total_ms']:.0f} мс, наибольшее "
+                f"{summary['max_ms']:.0f} мс, view: "
+                f"{', '.join(sorted(summary['views'])) or '—'}"
+            ))
+            self.stdout.write(f"   {summary['shape']}")
+            self.stdout.write(
+                f"   Самый медленный ({summary['example_ms']:.0f} мс): "
+                f"{summary['sql']} {summary['params'] or ''}"
+            )
+            for step in summary['plan']:
+                self.stdout.write(f'     {step}')
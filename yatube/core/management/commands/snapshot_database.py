@@ -0,0 +1,47 @@
+import os
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Снимает согласованную копию основной базы SQLite для реплики '
+        'только для чтения (см. переменную окружения YATUBE_REPLICA_DB)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл копии базы')
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='База, с которой снимается копия'
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError('Копию можно снять только с базы SQLite')
+        if connection.in_atomic_block:
+            # Резервное копирование ждёт конца своей же транзакции
+            raise CommandError('Копию нельзя снять внутри транзакции')
+        path = options['path']
+        started = time.perf_counter()
+        connection.ensure_connection()
+        # Копия пишется во временный файл и подменяет прежнюю целиком:
+        # реплика не бывает прочитана наполовину обновлённой
+        temporary = f'{path}.tmp'
+        target = sqlite3.connect(temporary)
+        try:
+            connection.connection.backup(target)
+            # Копия открывается только для чтения, а файл в режиме WAL
+            # без права записи прочитать нельзя
+            target.execute('PRAGMA journal_mode = DELETE').fetchall()
+        finally:
+            target.close()
+        os.replace(temporary, path)
+        self.stdout.write(self.style.SUCCESS(
+            f'Копия базы сохранена в {path} '
+            f'за {time.perf_counter() - started:.2f} с'
+        ))
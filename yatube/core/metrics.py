@@ -0,0 +1,347 @@
+"""Метрики запросов к сайту в текстовом формате Prometheus.
+
+Каждый процесс WSGI-сервера пишет значения в свой файл в METRICS_DIR,
+отображённый в память (MmapedDict): запись — это изменение числа
+в памяти, без блокировок между процессами. Страница метрик читает
+файлы всех процессов и складывает значения, поэтому метрики верны
+при любом количестве процессов. Счётчики и гистограммы завершившихся
+процессов продолжают учитываться; текущие запросы (live_<pid>.db)
+учитываются только у живых процессов.
+
+Счётчики завершившегося процесса переносятся в общий файл archive.db
+(mark_process_dead): сумма по всем файлам при этом не меняется,
+а каталог не растёт, сколько бы обработчиков ни перезапускал сервер.
+Уменьшение суммы Prometheus принимает за сброс счётчика и считает
+rate() неверно, поэтому файлы удаляются целиком только при новом
+запуске сервера.
+
+Каждый процесс-обработчик при импорте yatube/wsgi.py вызывает
+prepare_metrics_dir(). Запуск считается новым, если родитель
+процесса (мастер WSGI-сервера) не тот, что при прошлом вызове, или
+уже завершился: тогда каталог очищается. Иначе перезапустился только
+обработчик, и в архив переносятся файлы завершившихся процессов.
+При завершении обработчика можно сразу вызвать mark_process_dead(pid)
+(например, из хука child_exit gunicorn).
+"""
+import contextlib
+import fcntl
+import glob
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+
+from django.conf import settings
+
+# Гистограммы: границы корзин
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERY_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576)
+
+# Счётчики завершившихся процессов, блокировка каталога и мастер
+# сервера, для которого он заполнен
+ARCHIVE_FILE = 'archive.db'
+LOCK_FILE = 'metrics.lock'
+SERVER_FILE = 'server.pid'
+
+COUNTER, GAUGE, HISTOGRAM = 'counter', 'gauge', 'histogram'
+METRICS = {
+    'yatube_http_requests_total': (
+        COUNTER, 'Запросы к сайту', None
+    ),
+    'yatube_http_request_duration_seconds': (
+        HISTOGRAM, 'Время ответа', DURATION_BUCKETS
+    ),
+    'yatube_http_request_queries': (
+        HISTOGRAM, 'SQL-запросов на запрос к сайту', QUERY_BUCKETS
+    ),
+    'yatube_http_response_size_bytes': (
+        HISTOGRAM, 'Размер ответа без потоковых ответов', SIZE_BUCKETS
+    ),
+    'yatube_http_requests_in_flight': (
+        GAUGE, 'Запросы, обрабатываемые сейчас', None
+    ),
+}
+
+INITIAL_SIZE = 64 * 1024
+# Длина записи: ключ (int32), ключ в UTF-8, выравнивание до 8, double
+HEADER = struct.Struct('i')
+VALUE = struct.Struct('d')
+
+
+class MmapedDict:
+    """Словарь строка → число в файле, отображённом в память.
+
+    Пишет в файл только создавший его процесс. Формат: размер занятой
+    части (int32, с выравниванием до 8 байт), затем записи
+    «длина ключа, ключ, выравнивание, значение»."""
+    def __init__(self, path):
+        self.file = open(path, 'a+b')
+        if os.fstat(self.file.fileno()).st_size == 0:
+            self.file.truncate(INITIAL_SIZE)
+        self.capacity = os.fstat(self.file.fileno()).st_size
+        self.memory = mmap.mmap(self.file.fileno(), self.capacity)
+        self.positions = {}
+        self.used = HEADER.unpack_from(self.memory, 0)[0]
+        if self.used == 0:
+            self.used = 8
+            HEADER.pack_into(self.memory, 0, self.used)
+        for key, _, position in read_entries(self.memory, self.used):
+            self.positions[key] = position
+
+    def init_value(self, key):
+        encoded = key.encode()
+        padding = 8 - (HEADER.size + len(encoded)) % 8
+        entry = (
+            HEADER.pack(len(encoded)) + encoded + b' ' * padding
+            + VALUE.pack(0.0)
+        )
+        while self.used + len(entry) > self.capacity:
+            self.capacity *= 2
+            self.file.truncate(self.capacity)
+            self.memory.close()
+            self.memory = mmap.mmap(self.file.fileno(), self.capacity)
+        self.memory[self.used:self.used + len(entry)] = entry
+        self.used += len(entry)
+        HEADER.pack_into(self.memory, 0, self.used)
+        self.positions[key] = self.used - VALUE.size
+
+    def add(self, key, amount):
+        if key not in self.positions:
+            self.init_value(key)
+        position = self.positions[key]
+        value = VALUE.unpack_from(self.memory, position)[0]
+        VALUE.pack_into(self.memory, position, value + amount)
+
+    def close(self):
+        self.memory.close()
+        self.file.close()
+
+
+def read_entries(data, used):
+    """(ключ, значение, позиция значения) записей файла метрик."""
+    position = 8
+    while position < used:
+        length = HEADER.unpack_from(data, position)[0]
+        start = position + HEADER.size
+        key = bytes(data[start:start + length]).decode()
+        position = start + length
+        position += 8 - position % 8
+        yield key, VALUE.unpack_from(data, position)[0], position
+        position += VALUE.size
+
+
+def read_file(path):
+    with open(path, 'rb') as file:
+        data = file.read()
+    if len(data) < 8:
+        return
+    yield from read_entries(data, HEADER.unpack_from(data, 0)[0])
+
+
+class ProcessMetrics:
+    """Файлы метрик текущего процесса; после fork открываются заново."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.owner = None
+        self.files = {}
+
+    def file(self, kind):
+        owner = (os.getpid(), settings.METRICS_DIR)
+        if owner != self.owner:
+            # Новый процесс (fork) или каталог: свои файлы
+            self.files = {}
+            self.owner = owner
+        if kind not in self.files:
+            os.makedirs(settings.METRICS_DIR, exist_ok=True)
+            self.files[kind] = MmapedDict(os.path.join(
+                settings.METRICS_DIR, f'{kind}_{os.getpid()}.db'
+            ))
+        return self.files[kind]
+
+    def add(self, kind, key, amount):
+        with self.lock:
+            self.file(kind).add(key, amount)
+
+
+process_metrics = ProcessMetrics()
+
+
+def metric_key(name, labels, suffix=None):
+    return json.dumps([name, sorted(labels.items()), suffix])
+
+
+def inc(name, labels, amount=1):
+    """Увеличивает счётчик или показатель name."""
+    kind = 'live' if METRICS[name][0] == GAUGE else 'total'
+    process_metrics.add(kind, metric_key(name, labels), amount)
+
+
+def observe(name, labels, value):
+    """Добавляет значение value в гистограмму name."""
+    buckets = METRICS[name][2]
+    index = next(
+        (index for index, bound in enumerate(buckets) if value <= bound),
+        len(buckets)
+    )
+    for suffix, amount in ((index, 1), ('sum', value), ('count', 1)):
+        process_metrics.add('total', metric_key(name, labels, suffix), amount)
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+@contextlib.contextmanager
+def locked(operation):
+    """Блокировка каталога метрик: LOCK_SH для чтения, LOCK_EX для
+    переноса и удаления файлов."""
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    path = os.path.join(settings.METRICS_DIR, LOCK_FILE)
+    with open(path, 'a') as lock:
+        fcntl.flock(lock, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def archive_process(pid):
+    """Переносит счётчики процесса pid в архив (под LOCK_EX)."""
+    live = os.path.join(settings.METRICS_DIR, f'live_{pid}.db')
+    if os.path.exists(live):
+        os.remove(live)
+    total = os.path.join(settings.METRICS_DIR, f'total_{pid}.db')
+    if not os.path.exists(total):
+        return
+    archive = MmapedDict(os.path.join(settings.METRICS_DIR, ARCHIVE_FILE))
+    try:
+        for key, value, _ in read_file(total):
+            archive.add(key, value)
+    finally:
+        archive.close()
+    os.remove(total)
+
+
+def mark_process_dead(pid):
+    """Удаляет текущие запросы завершившегося процесса и переносит
+    его счётчики в архив."""
+    with locked(fcntl.LOCK_EX):
+        archive_process(pid)
+
+
+def process_files():
+    """Файлы метрик всех процессов: (путь, вид, pid)."""
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, '*_*.db')):
+        kind, _, pid = os.path.basename(path)[:-3].partition('_')
+        if pid.isdigit():
+            yield path, kind, int(pid)
+
+
+def read_server(path):
+    try:
+        with open(path) as file:
+            return int(file.read())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def prepare_metrics_dir():
+    """Готовит каталог метрик при запуске процесса-обработчика.
+
+    При новом запуске сервера удаляет все файлы, иначе переносит
+    в архив файлы завершившихся процессов.
+    """
+    server = os.getppid()
+    path = os.path.join(settings.METRICS_DIR, SERVER_FILE)
+    with locked(fcntl.LOCK_EX):
+        previous = read_server(path)
+        if previous == server and process_alive(server):
+            for _, _, pid in process_files():
+                if not process_alive(pid):
+                    archive_process(pid)
+            return
+        for name in os.listdir(settings.METRICS_DIR):
+            if name.endswith('.db'):
+                os.remove(os.path.join(settings.METRICS_DIR, name))
+        with open(path, 'w') as file:
+            file.write(str(server))
+
+
+def collect():
+    """Сумма значений по файлам всех процессов и архиву:
+    {ключ: значение}."""
+    values = {}
+    with locked(fcntl.LOCK_SH):
+        paths = [
+            path for path, kind, pid in process_files()
+            if kind == 'total' or process_alive(pid)
+        ]
+        archive = os.path.join(settings.METRICS_DIR, ARCHIVE_FILE)
+        if os.path.exists(archive):
+            paths.append(archive)
+        for path in paths:
+            for key, value, _ in read_file(path):
+                values[key] = values.get(key, 0) + value
+    return values
+
+
+def escape(value):
+    return (str(value).replace('\\', r'\\').replace('\n', r'\n')
+            .replace('"', r'\"'))
+
+
+def format_sample(name, labels, value):
+    if labels:
+        name += '{' + ','.join(
+            f'{label}="{escape(label_value)}"'
+            for label, label_value in labels
+        ) + '}'
+    return f'{name} {float(value)!r}'
+
+
+def format_bound(bound):
+    return '+Inf' if math.isinf(bound) else repr(float(bound))
+
+
+def render_metrics():
+    """Все метрики в текстовом формате Prometheus 0.0.4."""
+    samples = {}
+    for key, value in collect().items():
+        name, labels, suffix = json.loads(key)
+        if name in METRICS:
+            labels = tuple(tuple(label) for label in labels)
+            samples.setdefault(name, {}).setdefault(labels, {})[
+                suffix] = value
+    lines = []
+    for name, (metric_type, help_text, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for labels, values in sorted(samples.get(name, {}).items()):
+            if metric_type != HISTOGRAM:
+                lines.append(format_sample(name, labels, values[None]))
+                continue
+            cumulative = 0
+            for index, bound in enumerate(buckets + (math.inf,)):
+                cumulative += values.get(index, 0)
+                lines.append(format_sample(
+                    f'{name}_bucket',
+                    labels + (('le', format_bound(bound)),), cumulative
+                ))
+            lines.append(format_sample(
+                f'{name}_sum', labels, values.get('sum', 0)
+            ))
+            lines.append(format_sample(
+                f'{name}_count', labels, values.get('count', 0)
+            ))
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,169 @@
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.functional import SimpleLazyObject
+
+from core.auth import get_user
+from core.metrics import inc, observe
+from core.profiler import (
+    install_template_timing, profile_request, save_report, token_owner
+)
+
+from core.queries import QueryBudgetExceeded, QueryRecorder, budget_violations
+from core.routers import has_written, reset_writes
+from core.slowlog import set_current_view
+from core.staticfiles import static_response
+
+logger = logging.getLogger('yatube.queries')
+
+
+class QueryBudgetMiddleware:
+    """Проверяет каждый запрос к сайту на превышение бюджета
+    SQL-запросов (settings.QUERY_BUDGETS) и на повторы N+1.
+
+    Нарушения пишутся в лог yatube.queries, а при
+    QUERY_BUDGET_STRICT = True приводят к QueryBudgetExceeded.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = self.get_response(request)
+        match = request.resolver_match
+        if match is None:
+            return response
+        violations = budget_violations(match.view_name, recorder)
+        if violations:
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded('\n'.join(violations))
+            for violation in violations:
+                logger.warning(violation)
+        return response
+
+
+class ReplicaPinMiddleware:
+    """Read-your-writes: после запроса, записавшего в базу, ставит
+    cookie, с которой чтение в течение REPLICA_PIN_SECONDS идёт
+    в основную базу, а не на отстающую реплику."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        reset_writes()
+        response = self.get_response(request)
+        if settings.DATABASE_REPLICAS and has_written():
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax'
+            )
+        return response
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware, берущий пользователя из кэша
+    (core.auth.get_user), а не из базы на каждом запросе."""
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную collectstatic статику из STATIC_ROOT
+    (см. core.staticfiles); запросы к остальным адресам и к
+    отсутствующим файлам проходят дальше."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (settings.STATIC_ROOT and request.method in ('GET', 'HEAD')
+                and request.path_info.startswith(settings.STATIC_URL)):
+            response = static_response(
+                request, request.path_info[len(settings.STATIC_URL):]
+            )
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+
+class ProfilerMiddleware:
+    """Профилирует запрос с токеном сотрудника в параметре
+    PROFILER_PARAM или заголовке X-Profile (см. core.profiler);
+    id отчёта возвращается в заголовке X-Profile-Report."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_template_timing()
+
+    def __call__(self, request):
+        token = (request.GET.get(settings.PROFILER_PARAM)
+                 or request.META.get('HTTP_X_PROFILE'))
+        owner = token and token_owner(token)
+        if not owner:
+            return self.get_response(request)
+        response, profile, profiler, seconds = profile_request(
+            self.get_response, request
+        )
+        response['X-Profile-Report'] = save_report(
+            request, response, owner, profile, profiler, seconds
+        )
+        return response
+
+
+class MetricsMiddleware:
+    """Записывает метрики запроса по имени URL и статусу ответа:
+    время ответа, количество SQL-запросов, размер ответа и текущие
+    запросы (см. core.metrics)."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Имя URL известно только после разбора адреса
+        request.metrics_view = request.resolver_match.view_name
+        inc('yatube_http_requests_in_flight', {'view': request.metrics_view})
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        try:
+            with recorder.record():
+                response = self.get_response(request)
+        finally:
+            view = getattr(request, 'metrics_view', None)
+            if view is not None:
+                inc('yatube_http_requests_in_flight', {'view': view}, -1)
+        seconds = time.perf_counter() - started
+        labels = {
+            'view': view or 'unresolved',
+            'status': str(response.status_code),
+        }
+        inc('yatube_http_requests_total', {
+            **labels, 'method': request.method
+        })
+        observe('yatube_http_request_duration_seconds', labels, seconds)
+        observe('yatube_http_request_queries', labels, len(recorder))
+        if not response.streaming:
+            observe(
+                'yatube_http_response_size_bytes', labels,
+                len(response.content)
+            )
+        return response
+
+
+class SlowQueryMiddleware:
+    """Сообщает журналу медленных запросов (core.slowlog) имя view,
+    в котором выполняются запросы."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        set_current_view(request.resolver_match.view_name)
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            set_current_view(None)
@@ -0,0 +1,214 @@
+"""Пажинаторы для лент постов."""
+import base64
+import binascii
+from datetime import datetime
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+# Направления перехода, закодированные в курсоре
+CURSOR_FORWARD = 'n'
+CURSOR_BACKWARD = 'p'
+
+
+def encode_cursor(direction, pub_date, pk):
+    """Упаковывает ключ строки (pub_date, pk) в непрозрачный токен."""
+    raw = f'{direction}|{pub_date.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Возвращает (direction, pub_date, pk) или None для пустого
+    или повреждённого токена."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, stamp, pk = raw.split('|')
+        if direction not in (CURSOR_FORWARD, CURSOR_BACKWARD):
+            return None
+        return direction, datetime.fromisoformat(stamp), int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+
+
+def row_key(row):
+    """Ключ пажинации строки: объекта модели или словаря из .values()."""
+    if isinstance(row, dict):
+        return row['pub_date'], row.get('pk', row.get('id'))
+    return row.pub_date, row.pk
+
+
+def keyset_queryset(queryset, direction=CURSOR_FORWARD, pub_date=None,
+                    pk=None, key_field='pk'):
+    """Упорядочивает выборку по (pub_date, pk) и отсекает строки до ключа.
+
+    Условие записано как pub_date <= X AND (pub_date < X OR pk < Y),
+    чтобы SQLite начинал просмотр индекса сразу с нужной позиции.
+    key_field — поле второй части ключа, если это не первичный ключ
+    (например, post_id в таблице ленты подписок).
+    """
+    if direction == CURSOR_FORWARD:
+        queryset = queryset.order_by('-pub_date', f'-{key_field}')
+        if pub_date is not None:
+            queryset = queryset.filter(
+                Q(pub_date__lte=pub_date)
+                & (Q(pub_date__lt=pub_date) | Q(**{f'{key_field}__lt': pk}))
+            )
+        return queryset
+    queryset = queryset.order_by('pub_date', key_field)
+    if pub_date is not None:
+        queryset = queryset.filter(
+            Q(pub_date__gte=pub_date)
+            & (Q(pub_date__gt=pub_date) | Q(**{f'{key_field}__gt': pk}))
+        )
+    return queryset
+
+
+class WindowedPage(Page):
+    """Страница с окном номеров для шаблона пажинатора."""
+    @property
+    def page_window(self):
+        return list(self.paginator.get_elided_page_range(self.number))
+
+
+class CountedPaginator(Paginator):
+    """Пажинатор, получающий количество объектов от внешнего источника
+    (кэша, таблицы счётчиков), а не через SELECT COUNT(*).
+
+    count — готовое количество или функция без аргументов, которая
+    вызывается только если количество действительно понадобилось.
+
+    Вместо всех номеров страниц шаблон выводит окно: первые и последние
+    on_ends страниц и по on_each_side страниц вокруг текущей, поэтому
+    размер пажинатора не зависит от длины ленты.
+    """
+    ELLIPSIS = '…'
+
+    def __init__(self, object_list, per_page, count=None, on_each_side=3,
+                 on_ends=1, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.known_count = count
+        self.on_each_side = on_each_side
+        self.on_ends = on_ends
+
+    @cached_property
+    def count(self):
+        if self.known_count is None:
+            return super().count
+        if callable(self.known_count):
+            return self.known_count()
+        return self.known_count
+
+    def _get_page(self, *args, **kwargs):
+        return WindowedPage(*args, **kwargs)
+
+    def get_elided_page_range(self, number=1):
+        """Номера страниц окна вокруг number с ELLIPSIS на месте
+        пропусков (как Paginator.get_elided_page_range в Django 3.2)."""
+        number = self.validate_number(number)
+        on_each_side, on_ends = self.on_each_side, self.on_ends
+        if self.num_pages <= (on_each_side + on_ends) * 2:
+            yield from self.page_range
+            return
+        if number > (1 + on_each_side + on_ends) + 1:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < (self.num_pages - on_each_side - on_ends) - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield self.ELLIPSIS
+            yield from range(self.num_pages - on_ends + 1, self.num_pages + 1)
+        else:
+            yield from range(number + 1, self.num_pages + 1)
+
+
+class CursorPage(Page):
+    """Страница keyset-пажинатора, совместимая с django Page.
+
+    Номер страницы и общее количество не вычисляются, вместо них
+    шаблон использует токены next_cursor и previous_cursor.
+    """
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None):
+        super().__init__(object_list, None, paginator)
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage {self.next_cursor!r}>'
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def next_page_number(self):
+        return self.next_cursor
+
+    def previous_page_number(self):
+        return self.previous_cursor
+
+    def start_index(self):
+        return None
+
+    def end_index(self):
+        return None
+
+
+class CursorPaginator(Paginator):
+    """Keyset-пажинатор по (pub_date, pk).
+
+    Вместо LIMIT/OFFSET каждая страница выбирается условием на ключ
+    последней показанной строки, поэтому стоимость запроса не зависит
+    от того, насколько далеко пользователь пролистал ленту.
+    """
+    is_cursor = True
+
+    def page_from_rows(self, rows, direction, has_key):
+        """Собирает страницу из per_page + 1 строк, выбранных
+        в направлении direction после ключа (если has_key)."""
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == CURSOR_BACKWARD:
+            rows.reverse()
+            # Назад идём только со страницы, у которой есть следующая
+            has_next, has_previous = bool(rows), has_more
+        else:
+            has_next, has_previous = has_more, has_key
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor(CURSOR_FORWARD, *row_key(rows[-1]))
+        if rows and has_previous:
+            previous_cursor = encode_cursor(
+                CURSOR_BACKWARD, *row_key(rows[0])
+            )
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+    def fetch_rows(self, direction, pub_date, pk):
+        """Не более per_page + 1 строк в направлении direction после
+        ключа (pub_date, pk); ключ None — с начала ленты."""
+        queryset = keyset_queryset(self.object_list, direction, pub_date, pk)
+        return list(queryset[:self.per_page + 1])
+
+    def get_page(self, cursor):
+        """Возвращает страницу по токену; пустой или битый токен
+        означает первую страницу."""
+        decoded = decode_cursor(cursor)
+        if decoded is None:
+            direction, key = CURSOR_FORWARD, (None, None)
+        else:
+            direction, key = decoded[0], decoded[1:]
+        rows = self.fetch_rows(direction, *key)
+        if direction == CURSOR_BACKWARD and len(rows) <= self.per_page:
+            # Дошли до начала ленты: показываем полноценную первую страницу
+            return self.get_page(None)
+        return self.page_from_rows(rows, direction, decoded is not None)
+
+    def page(self, cursor):
+        return self.get_page(cursor)
@@ -0,0 +1,245 @@
+"""Профилирование отдельных запросов к сайту по подписанному токену.
+
+Запрос профилируется, если в параметре PROFILER_PARAM или заголовке
+X-Profile передан токен, выданный сотруднику на странице отчётов
+(profile_token). Для такого запроса ProfilerMiddleware записывает:
+- профиль cProfile всего запроса (middleware, view, шаблоны);
+- каждый SQL-запрос с длительностью и местом вызова в коде проекта;
+- время отрисовки каждого шаблона, включая {% include %}.
+
+Отчёт сохраняется в PROFILER_ROOT как <id>.json и <id>.prof (для
+pstats и snakeviz); хранятся последние PROFILER_REPORTS_LIMIT отчётов.
+Тело потоковых ответов отдаётся после выхода из middleware и в
+профиль не попадает.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import traceback
+import uuid
+from collections import defaultdict
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.template import base
+from django.utils import timezone
+
+from core.queries import QueryRecorder
+
+SIGNER_SALT = 'core.profiler'
+REPORT_ID = re.compile(r'^\d{8}T\d{6}-[0-9a-f]{8}$')
+# Модули, замеряющие запросы: их вызовы не считаются местом запроса
+INSTRUMENTATION_FILES = {
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+    for name in ('profiler.py', 'queries.py', 'slowlog.py')
+}
+
+_state = threading.local()
+
+
+def profile_token(username):
+    """Токен включения профилирования, выданный сотруднику username."""
+    return signing.TimestampSigner(salt=SIGNER_SALT).sign(username)
+
+
+def token_owner(token):
+    """Имя сотрудника из действующего токена или None.
+
+    Токен перестаёт действовать, как только его владелец удалён,
+    отключён или больше не сотрудник.
+    """
+    try:
+        username = signing.TimestampSigner(salt=SIGNER_SALT).unsign(
+            token, max_age=settings.PROFILER_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return None
+    User = get_user_model()
+    staff = User._default_manager.filter(
+        **{User.USERNAME_FIELD: username}, is_active=True, is_staff=True
+    )
+    return username if staff.exists() else None
+
+
+def recorded_path(request):
+    """Путь запроса для отчёта, без токена профилирования."""
+    params = request.GET.copy()
+    params.pop(settings.PROFILER_PARAM, None)
+    query = params.urlencode()
+    return f'{request.path}?{query}' if query else request.path
+
+
+def code_origin(depth=3):
+    """Ближайшие depth вызовов из кода проекта, начиная с самого
+    глубокого: «файл:строка в функции ← ...». Запросы ленивых QuerySet
+    выполняются при отрисовке, поэтому одного вызова мало."""
+    origins = []
+    for frame in reversed(traceback.extract_stack()):
+        filename = os.path.abspath(frame.filename)
+        if (filename.startswith(settings.BASE_DIR)
+                and filename not in INSTRUMENTATION_FILES):
+            path = os.path.relpath(filename, settings.BASE_DIR)
+            origins.append(f'{path}:{frame.lineno} in {frame.name}')
+            if len(origins) == depth:
+                break
+    return ' ← '.join(origins) or None
+
+
+class RequestProfile(QueryRecorder):
+    """SQL-запросы с местом вызова и время отрисовки шаблонов."""
+    def __init__(self):
+        super().__init__()
+        self.origins = []
+        self.templates = defaultdict(lambda: {'count': 0, 'ms': 0.0})
+
+    def __call__(self, execute, sql, params, many, context):
+        self.origins.append(code_origin())
+        return super().__call__(execute, sql, params, many, context)
+
+    def add_template(self, name, seconds):
+        timing = self.templates[name or '<строка>']
+        timing['count'] += 1
+        timing['ms'] += seconds * 1000
+
+    def sql_report(self):
+        return [
+            {'sql': sql, 'ms': seconds * 1000, 'origin': origin}
+            for (sql, seconds), origin in zip(self.queries, self.origins)
+        ]
+
+    def template_report(self):
+        return sorted(
+            ({'name': name, **timing}
+             for name, timing in self.templates.items()),
+            key=lambda timing: -timing['ms']
+        )
+
+
+def timed_render(render, template_name):
+    """Обёртка метода отрисовки шаблона, замеряющая время, когда
+    запрос профилируется."""
+    @wraps(render)
+    def wrapper(self, *args, **kwargs):
+        profile = getattr(_state, 'profile', None)
+        if profile is None:
+            return render(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            profile.add_template(
+                template_name(self), time.perf_counter() - started
+            )
+    wrapper.profiler_timed = True
+    return wrapper
+
+
+def install_template_timing():
+    """Подключает замер шаблонов Django и Jinja2 (один раз)."""
+    if not getattr(base.Template._render, 'profiler_timed', False):
+        base.Template._render = timed_render(
+            base.Template._render, lambda template: template.name
+        )
+    try:
+        from django.template.backends.jinja2 import Template
+    except ImportError:
+        return
+    if not getattr(Template.render, 'profiler_timed', False):
+        Template.render = timed_render(
+            Template.render, lambda template: template.template.name
+        )
+
+
+def profile_request(get_response, request):
+    """Выполняет запрос под профилировщиком; возвращает
+    (ответ, замеры, cProfile, секунды)."""
+    profile = RequestProfile()
+    profiler = cProfile.Profile()
+    _state.profile = profile
+    started = time.perf_counter()
+    try:
+        with profile.record():
+            response = profiler.runcall(get_response, request)
+    finally:
+        _state.profile = None
+    return response, profile, profiler, time.perf_counter() - started
+
+
+def stats_text(profiler):
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.strip_dirs().sort_stats('cumulative').print_stats(
+        settings.PROFILER_STATS_LIMIT
+    )
+    return stream.getvalue()
+
+
+def save_report(request, response, owner, profile, profiler, seconds):
+    """Сохраняет отчёт и возвращает его id."""
+    os.makedirs(settings.PROFILER_ROOT, exist_ok=True)
+    now = timezone.now()
+    report_id = f'{now:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}'
+    queries = profile.sql_report()
+    report = {
+        'id': report_id,
+        'created': now.isoformat(),
+        'owner': owner,
+        'method': request.method,
+        'path': recorded_path(request),
+        'status': response.status_code,
+        'ms': seconds * 1000,
+        'sql_ms': sum(query['ms'] for query in queries),
+        'queries': queries,
+        'templates': profile.template_report(),
+        'stats': stats_text(profiler),
+    }
+    path = os.path.join(settings.PROFILER_ROOT, report_id)
+    with open(f'{path}.json', 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=1)
+    profiler.dump_stats(f'{path}.prof')
+    prune_reports()
+    return report_id
+
+
+def report_ids():
+    """id отчётов от новых к старым."""
+    try:
+        names = os.listdir(settings.PROFILER_ROOT)
+    except FileNotFoundError:
+        return []
+    return sorted(
+        (name[:-5] for name in names
+         if name.endswith('.json') and REPORT_ID.match(name[:-5])),
+        reverse=True
+    )
+
+
+def prune_reports():
+    for report_id in report_ids()[settings.PROFILER_REPORTS_LIMIT:]:
+        for extension in ('.json', '.prof'):
+            path = os.path.join(settings.PROFILER_ROOT, report_id + extension)
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def report_path(report_id, extension):
+    """Путь к файлу отчёта или None для недопустимого id."""
+    if not REPORT_ID.match(report_id):
+        return None
+    path = os.path.join(settings.PROFILER_ROOT, report_id + extension)
+    return path if os.path.exists(path) else None
+
+
+def load_report(report_id):
+    path = report_path(report_id, '.json')
+    if path is None:
+        return None
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
@@ -0,0 +1,84 @@
+"""Учёт SQL-запросов запроса к сайту и проверка бюджетов запросов.
+
+Бюджеты задаются в settings.QUERY_BUDGETS по имени URL
+('posts:index', 'users:login', ...). Повторяющиеся запросы одной формы
+(признак N+1) ищутся по нормализованному тексту SQL: числа, строки
+и списки IN заменяются заполнителями.
+"""
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+# Служебные запросы транзакций не входят в бюджет и не считаются
+# повторами
+SERVICE_PREFIXES = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+SHAPE_PATTERNS = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\bIN \((?:\?, )*\?\)'), 'IN (...)'),
+)
+
+
+class QueryBudgetExceeded(Exception):
+    """Запрос к сайту превысил бюджет SQL-запросов или выполнил N+1."""
+
+
+def query_shape(sql):
+    """Форма запроса: SQL без значений параметров."""
+    for pattern, replacement in SHAPE_PATTERNS:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+
+class QueryRecorder:
+    """Записывает SQL-запросы всех подключений через execute_wrapper."""
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+    @contextmanager
+    def record(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    def statements(self):
+        """Запросы без служебных команд точек сохранения."""
+        return [
+            sql for sql, _ in self.queries
+            if not sql.startswith(SERVICE_PREFIXES)
+        ]
+
+    def __len__(self):
+        return len(self.statements())
+
+    def repeated(self, limit):
+        """Формы запросов, выполненных больше limit раз."""
+        shapes = Counter(query_shape(sql) for sql in self.statements())
+        return {shape: n for shape, n in shapes.items() if n > limit}
+
+
+def budget_violations(view_name, recorder):
+    """Нарушения бюджета запросов для view с именем view_name."""
+    violations = []
+    budget = settings.QUERY_BUDGETS.get(view_name)
+    if budget is not None and len(recorder) > budget:
+        violations.append(
+            f'{view_name}: {len(recorder)} SQL-запросов при бюджете {budget}'
+        )
+    for shape, n in recorder.repeated(settings.QUERY_REPEAT_LIMIT).items():
+        violations.append(f'{view_name}: запрос повторён {n} раз: {shape}')
+    return violations
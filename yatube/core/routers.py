@@ -0,0 +1,104 @@
+"""Чтение из копий основной базы данных (реплик).
+
+На реплику уходит только чтение внутри view, обёрнутых read_replica,
+и только пока пользователь сам ничего не записывал: после записи
+ReplicaPinMiddleware ставит cookie REPLICA_PIN_COOKIE, и в течение
+REPLICA_PIN_SECONDS все его запросы читают основную базу
+(read-your-writes). Запись всегда идёт в основную базу.
+
+Реплики перечислены в settings.DATABASE_REPLICAS; без них все
+запросы идут в основную базу.
+
+Реплика может отставать от версий лент в кэше, поэтому страницы,
+которые кэшируются или получают ETag под текущей версией, читаются
+из основной базы (primary_reads) или остаются без ETag
+(replica_read_count).
+"""
+import random
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_state = threading.local()
+
+
+def reset_writes():
+    """Начало запроса к сайту: записей в базу ещё не было."""
+    _state.written = False
+
+
+def has_written():
+    return getattr(_state, 'written', False)
+
+
+@contextmanager
+def replica_reads():
+    """Чтение внутри блока идёт на реплику, если она есть."""
+    previous = getattr(_state, 'replica', False)
+    _state.replica = True
+    try:
+        yield
+    finally:
+        _state.replica = previous
+
+
+@contextmanager
+def primary_reads():
+    """Чтение внутри блока идёт в основную базу даже во view,
+    обёрнутом read_replica."""
+    previous = getattr(_state, 'replica', False)
+    _state.replica = False
+    try:
+        yield
+    finally:
+        _state.replica = previous
+
+
+def replica_read_count():
+    """Сколько раз в этом потоке чтение направлялось на реплику."""
+    return getattr(_state, 'replica_reads', 0)
+
+
+class ReplicaRouter:
+    """Маршрутизатор баз: чтение на реплику внутри replica_reads(),
+    остальное — в основную базу."""
+    def db_for_read(self, model, **hints):
+        if (settings.DATABASE_REPLICAS and not has_written()
+                and getattr(_state, 'replica', False)):
+            _state.replica_reads = replica_read_count() + 1
+            return random.choice(settings.DATABASE_REPLICAS)
+        # Явно основная база: иначе объект, прочитанный с реплики,
+        # читал бы связанные объекты тоже с неё
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # После записи чтение до конца запроса идёт в основную базу
+        _state.written = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии основной базы
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема реплик приходит вместе с копией основной базы
+        return db not in settings.DATABASE_REPLICAS
+
+
+def read_replica(view):
+    """Чтение во view идёт на реплику, если пользователь не
+    закреплён за основной базой после своей записи."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (not settings.DATABASE_REPLICAS
+                or settings.REPLICA_PIN_COOKIE in request.COOKIES):
+            return view(request, *args, **kwargs)
+        # Сессия и пользователь читаются из основной базы: только что
+        # зарегистрированного пользователя на реплике ещё может не быть
+        request.user.is_authenticated
+        with replica_reads():
+            return view(request, *args, **kwargs)
+    return wrapper
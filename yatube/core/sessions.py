@@ -0,0 +1,64 @@
+"""Сессии в кэше с отложенной записью в базу (write-behind).
+
+Подключаются как SESSION_ENGINE = 'core.sessions'. Сессия читается
+из кэша SESSION_CACHE_ALIAS, общего для процессов сервера (иначе
+выход в одном процессе не виден другим), а из базы — только если
+её нет в кэше. Изменения всегда
+пишутся в кэш, а в базу — сразу только при создании сессии и при
+смене пользователя или хэша пароля в ней (вход, смена пароля).
+Остальные изменения попадают в базу не чаще раза в
+SESSION_WRITE_BEHIND_SECONDS: при вытеснении из кэша сессия теряет
+только их, но не вход пользователя.
+
+Таблица сессий очищается от просроченных записей при создании
+новой сессии с вероятностью SESSION_CLEANUP_PROBABILITY.
+"""
+import random
+import time
+
+from django.conf import settings
+from django.contrib.auth import HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.sessions.backends import cached_db
+
+
+class SessionStore(cached_db.SessionStore):
+    @property
+    def synced_key(self):
+        """Ключ кэша с отметкой последней записи сессии в базу."""
+        return f'{self.cache_key}:synced'
+
+    def auth_state(self):
+        return (self._session.get(SESSION_KEY),
+                self._session.get(HASH_SESSION_KEY))
+
+    def needs_db_write(self):
+        synced = self._cache.get(self.synced_key)
+        return (
+            synced is None
+            or synced['auth'] != self.auth_state()
+            or time.time() - synced['at']
+            >= settings.SESSION_WRITE_BEHIND_SECONDS
+        )
+
+    def save(self, must_create=False):
+        if must_create or self.session_key is None or self.needs_db_write():
+            super().save(must_create)
+            self._cache.set(
+                self.synced_key,
+                {'at': time.time(), 'auth': self.auth_state()},
+                self.get_expiry_age()
+            )
+            return
+        self._cache.set(self.cache_key, self._session, self.get_expiry_age())
+
+    def create(self):
+        super().create()
+        if random.random() < settings.SESSION_CLEANUP_PROBABILITY:
+            self.clear_expired()
+
+    def delete(self, session_key=None):
+        if session_key is None and self.session_key is not None:
+            session_key = self.session_key
+        if session_key is not None:
+            self._cache.delete(f'{self.cache_key_prefix}{session_key}:synced')
+        super().delete(session_key)
@@ -0,0 +1,21 @@
+from django import shortcuts
+from django.conf import settings
+from django.template import engines
+
+
+def template_engine(template_name):
+    """Имя движка для шаблона: Jinja2 для шаблонов из
+    settings.JINJA2_TEMPLATES, если он подключён, иначе движок
+    по умолчанию."""
+    if (template_name in settings.JINJA2_TEMPLATES
+            and 'jinja2' in engines.templates):
+        return 'jinja2'
+    return None
+
+
+def render(request, template_name, context=None, **kwargs):
+    """django.shortcuts.render с выбором движка по имени шаблона."""
+    return shortcuts.render(
+        request, template_name, context,
+        using=template_engine(template_name), **kwargs
+    )
@@ -0,0 +1,30 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.auth import invalidate_user
+from core.slowlog import slow_query_wrapper
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Смена пароля, имени, активности или удаление пользователя
+    invalidate_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def invalidate_user_on_logout(sender, request, user, **kwargs):
+    if user is not None:
+        invalidate_user(user.pk)
+
+
+@receiver(connection_created)
+def install_slow_query_log(sender, connection, **kwargs):
+    # Первым в списке: execute_wrapper() снимает обёртки с конца
+    if slow_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, slow_query_wrapper)
@@ -0,0 +1,155 @@
+"""Журнал медленных SQL-запросов с планом выполнения.
+
+slow_query_wrapper подключается к каждому соединению с базой
+(сигнал connection_created, см. core.signals) и замеряет каждый
+запрос. Запрос дольше SLOW_QUERY_THRESHOLD_MS записывается строкой
+JSON в SLOW_QUERY_LOG: SQL, view, место вызова в коде и EXPLAIN QUERY
+PLAN. Сводку по формам запросов выводит команда slow_queries.
+
+Параметры запросов — это данные пользователей, поэтому они пишутся
+только при SLOW_QUERY_LOG_PARAMS = True, и даже тогда параметры
+запросов к таблицам SLOW_QUERY_SENSITIVE_TABLES (хэши паролей, почта,
+сессии) заменяются на REDACTED.
+
+Чтобы журнал сам не стал узким местом, запрос одной формы
+записывается не чаще раза в SLOW_QUERY_SHAPE_INTERVAL секунд, а всего
+записей — не больше SLOW_QUERY_LOG_RATE в минуту на процесс.
+Пропущенные запросы учитываются в поле suppressed следующей записи
+той же формы.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+from core.explain import explain_on_connection
+from core.profiler import code_origin
+from core.queries import query_shape
+
+logger = logging.getLogger('yatube.slow_queries')
+
+# Сколько форм запросов помнит ограничитель частоты записи
+SHAPES_LIMIT = 1000
+# Длина параметра запроса в журнале
+PARAM_LENGTH = 200
+# Чем заменяются параметры запросов к таблицам с личными данными
+REDACTED = '<скрыто>'
+EXPLAINED = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')
+
+_state = threading.local()
+_lock = threading.Lock()
+_shapes = {}
+_window = {'start': 0.0, 'count': 0}
+
+
+def set_current_view(view_name):
+    _state.view = view_name
+
+
+def reset_rate_limits():
+    """Забывает ограничения частоты записи (тесты, смена настроек)."""
+    with _lock:
+        _shapes.clear()
+        _window.update(start=0.0, count=0)
+
+
+def take_slot(shape, ms, now):
+    """Можно ли записать запрос формы shape; если нет, он учитывается
+    как пропущенный. Возвращает (можно, пропущенные до него)."""
+    with _lock:
+        if len(_shapes) > SHAPES_LIMIT:
+            _shapes.clear()
+        pending = _shapes.setdefault(
+            shape, {'last': None, 'count': 0, 'ms': 0.0, 'max_ms': 0.0}
+        )
+        if now - _window['start'] >= 60:
+            _window.update(start=now, count=0)
+        if ((pending['last'] is not None
+                and now - pending['last']
+                < settings.SLOW_QUERY_SHAPE_INTERVAL)
+                or _window['count'] >= settings.SLOW_QUERY_LOG_RATE):
+            pending['count'] += 1
+            pending['ms'] += ms
+            pending['max_ms'] = max(pending['max_ms'], ms)
+            return False, None
+        _window['count'] += 1
+        suppressed = {
+            key: pending[key] for key in ('count', 'ms', 'max_ms')
+        }
+        pending.update(last=now, count=0, ms=0.0, max_ms=0.0)
+        return True, suppressed
+
+
+def touches_sensitive_table(sql):
+    tables = '|'.join(
+        re.escape(table) for table in settings.SLOW_QUERY_SENSITIVE_TABLES
+    )
+    return bool(tables) and re.search(rf'\b(?:{tables})\b', sql) is not None
+
+
+def format_params(sql, params, many):
+    if not settings.SLOW_QUERY_LOG_PARAMS or many or params is None:
+        return None
+    if isinstance(params, dict):
+        params = params.values()
+    if touches_sensitive_table(sql):
+        return [REDACTED for _ in params]
+    return [repr(param)[:PARAM_LENGTH] for param in params]
+
+
+def log_slow_query(connection, sql, params, many, ms):
+    shape = query_shape(sql)
+    allowed, suppressed = take_slot(shape, ms, time.monotonic())
+    if not allowed:
+        return
+    plan = []
+    if not many and sql.lstrip().upper().startswith(EXPLAINED):
+        try:
+            plan = explain_on_connection(connection, sql, params)
+        except DatabaseError:
+            # Например, запрос сам завершился ошибкой
+            pass
+    record = {
+        'time': timezone.now().isoformat(),
+        'database': connection.alias,
+        'ms': ms,
+        'view': getattr(_state, 'view', None),
+        'origin': code_origin(),
+        'shape': shape,
+        'sql': sql,
+        'params': format_params(sql, params, many),
+        'plan': plan,
+        'suppressed': suppressed,
+    }
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _lock:
+        os.makedirs(os.path.dirname(settings.SLOW_QUERY_LOG), exist_ok=True)
+        with open(settings.SLOW_QUERY_LOG, 'a', encoding='utf-8') as file:
+            file.write(line + '\n')
+    logger.warning(
+        'Медленный запрос %.1f мс в %s: %s', ms, record['view'], shape
+    )
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        ms = (time.perf_counter() - started) * 1000
+        if (ms >= settings.SLOW_QUERY_THRESHOLD_MS
+                and not getattr(_state, 'logging', False)):
+            _state.logging = True
+            try:
+                log_slow_query(context['connection'], sql, params, many, ms)
+            except Exception:
+                # Журнал не должен ломать сам запрос
+                logger.exception('Не удалось записать медленный запрос')
+            finally:
+                _state.logging = False
@@ -0,0 +1,158 @@
+"""Статика с хэшем содержимого в имени и заранее сжатыми копиями.
+
+collectstatic сохраняет файлы под именами с хэшем (манифест
+ManifestStaticFilesStorage) и рядом с каждым сжимаемым файлом кладёт
+копии .gz и, если установлен brotli, .br. StaticFilesMiddleware
+отдаёт файлы из STATIC_ROOT: с хэшем в имени — с кэшированием
+на год, остальные — с проверкой Last-Modified; из сжатых копий
+выбирается та, которую принимает браузер.
+"""
+import gzip
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import (
+    ManifestStaticFilesStorage, staticfiles_storage
+)
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Расширения файлов, которые имеет смысл сжимать
+COMPRESSIBLE = (
+    '.css', '.js', '.svg', '.html', '.txt', '.json', '.map', '.xml', '.ico'
+)
+
+
+def compress_gzip(data):
+    # mtime=0: одинаковый файл даёт одинаковую сжатую копию
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def compress_brotli(data):
+    return brotli.compress(data, quality=11)
+
+
+# Суффикс сжатой копии, кодирование в Accept-Encoding и функция сжатия
+# в порядке предпочтения
+ENCODINGS = [('.gz', 'gzip', compress_gzip)]
+if brotli is not None:
+    ENCODINGS.insert(0, ('.br', 'br', compress_brotli))
+
+
+def compress_file(path):
+    """Сохраняет сжатые копии файла path, если они меньше исходного."""
+    with open(path, 'rb') as file:
+        data = file.read()
+    if len(data) < settings.STATIC_COMPRESS_MIN_SIZE:
+        return
+    for suffix, _, compress in ENCODINGS:
+        compressed = compress(data)
+        if len(compressed) < len(data):
+            with open(path + suffix, 'wb') as file:
+                file.write(compressed)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage, сжимающий файлы при collectstatic.
+
+    Без манифеста (collectstatic ещё не выполнялся: разработка, тесты)
+    ссылки ведут на файлы без хэша, а не вызывают ошибку.
+    """
+    def stored_name(self, name):
+        hash_key = self.hash_key(self.clean_name(name))
+        return self.hashed_files.get(hash_key, name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.lower().endswith(COMPRESSIBLE) and self.exists(name):
+                compress_file(self.path(name))
+
+
+def accepted_encodings(request):
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    return {
+        encoding for _, encoding, _ in ENCODINGS
+        if re.search(rf'\b{encoding}\b', header)
+    }
+
+
+# Манифест, число записей в нём и имена с хэшем: множество строится
+# заново, только когда хранилище загрузило другой манифест или
+# collectstatic дополнил текущий
+_hashed_names = (None, 0, frozenset())
+
+
+def hashed_names():
+    """Имена файлов с хэшем из манифеста collectstatic."""
+    global _hashed_names
+    hashed_files = getattr(staticfiles_storage, 'hashed_files', {})
+    manifest, size, names = _hashed_names
+    if manifest is not hashed_files or size != len(hashed_files):
+        names = frozenset(hashed_files.values())
+        _hashed_names = (hashed_files, len(hashed_files), names)
+    return names
+
+
+def compressed_variant(request, path):
+    """(путь, кодирование, есть ли сжатые копии) для файла path:
+    первая сжатая копия, которую принимает браузер, или сам файл."""
+    accepted = accepted_encodings(request)
+    variants = False
+    for suffix, encoding, _ in ENCODINGS:
+        if not os.path.isfile(path + suffix):
+            continue
+        variants = True
+        if encoding in accepted:
+            return path + suffix, encoding, True
+    return path, None, variants
+
+
+def static_response(request, name):
+    """Ответ с файлом name из STATIC_ROOT или None, если его нет."""
+    try:
+        path = safe_join(settings.STATIC_ROOT, name)
+    except SuspiciousFileOperation:
+        return None
+    if not os.path.isfile(path):
+        return None
+    stat = os.stat(path)
+    if not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'),
+            stat.st_mtime, stat.st_size):
+        return HttpResponseNotModified()
+    content_type, _ = mimetypes.guess_type(path)
+    served_path, content_encoding, variants = compressed_variant(
+        request, path
+    )
+    response = FileResponse(
+        open(served_path, 'rb'),
+        content_type=content_type or 'application/octet-stream'
+    )
+    if content_encoding:
+        response['Content-Encoding'] = content_encoding
+    if variants:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if name in hashed_names():
+        response['Cache-Control'] = (
+            f'public, max-age={settings.STATIC_CACHE_MAX_AGE}, immutable'
+        )
+    else:
+        # Файл без хэша может измениться под тем же именем
+        response['Cache-Control'] = 'no-cache'
+    return response
@@ -7,3 +7,21 @@ register = template.Library()
 @register.filter
 def addclass(field, css):
     return field.as_widget(attrs={'class': css})
+
+
+def replace_query(request, **params):
+    """Строка запроса request с заменёнными параметрами."""
+    query = request.GET.copy()
+    for name, value in params.items():
+        query[name] = value
+    return query.urlencode()
+
+
+@register.simple_tag(takes_context=True)
+def query_with(context, **params):
+    """Строка запроса текущей страницы с заменёнными параметрами.
+
+    Ссылки пажинатора сохраняют остальные параметры, например
+    поисковый запрос: href="?{% query_with page=2 %}".
+    """
+    return replace_query(context['request'], **params)
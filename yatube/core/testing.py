@@ -0,0 +1,89 @@
+import shutil
+import tempfile
+import unittest
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+from django.urls import resolve
+
+from core.caches import SHARED_CACHE_ALIAS
+from core.queries import QueryRecorder, budget_violations
+
+
+def isolated_settings(directory):
+    """Настройки тестов: файлы сервера (общий кэш, метрики, отчёты, журналы)
+    переносятся в каталог directory, чтобы не смешиваться с данными
+    сервера, а превышение бюджета SQL-запросов проваливает тест."""
+    caches = {alias: dict(config) for alias, config in settings.CACHES.items()}
+    shared = caches[SHARED_CACHE_ALIAS]
+    if shared['BACKEND'].endswith('FileBasedCache'):
+        shared['LOCATION'] = f'{directory}/shared-cache'
+    return override_settings(
+        CACHES=caches, METRICS_DIR=f'{directory}/metrics',
+        PROFILER_ROOT=f'{directory}/profiles',
+        SLOW_QUERY_LOG=f'{directory}/logs/slow_queries.ndjson',
+        QUERY_BUDGET_STRICT=True
+    )
+
+
+def other_process(name='other'):
+    """Настройки, под которыми кэш default — память другого процесса
+    сервера с именем name, а общий кэш тот же: так тесты проверяют,
+    что изменение в одном процессе видно в остальных."""
+    caches = {alias: dict(config) for alias, config in settings.CACHES.items()}
+    caches['default']['LOCATION'] = f'process-{name}'
+    return override_settings(CACHES=caches)
+
+
+def clear_caches():
+    """Очищает все кэши, в том числе общий: страницы и версии
+    не переходят из теста в тест, базу которого уже откатили."""
+    for alias in settings.CACHES:
+        caches[alias].clear()
+
+
+class ClearCachesMixin:
+    """Результат тестов, очищающий кэши перед каждым тестом."""
+    def startTest(self, test):
+        clear_caches()
+        super().startTest(test)
+
+
+class TestRunner(DiscoverRunner):
+    """DiscoverRunner с файлами тестов во временном каталоге
+    и чистыми кэшами в начале каждого теста."""
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.directory = tempfile.mkdtemp(prefix='yatube-tests-')
+        self.isolated_settings = isolated_settings(self.directory)
+        self.isolated_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.isolated_settings.disable()
+        shutil.rmtree(self.directory, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
+
+    def get_resultclass(self):
+        base = super().get_resultclass() or unittest.TextTestResult
+        return type('ClearCachesResult', (ClearCachesMixin, base), {})
+
+
+class QueryBudgetTestMixin:
+    """Проверки бюджета SQL-запросов для TestCase."""
+    def assertWithinQueryBudget(self, client, url, data=None,
+                                method='get'):
+        """Выполняет запрос клиентом client и проверяет бюджет
+        SQL-запросов view и отсутствие N+1."""
+        view_name = resolve(urlsplit(url).path).view_name
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = getattr(client, method)(url, data)
+        violations = budget_violations(view_name, recorder)
+        if violations:
+            self.fail('\n'.join(
+                violations + [sql for sql, _ in recorder.queries]
+            ))
+        return response
@@ -0,0 +1,18 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('metrics/', views.metrics, name='metrics'),
+    path('profiles/', views.profile_reports, name='profile_reports'),
+    path(
+        'profiles/<str:report_id>/', views.profile_report,
+        name='profile_report'
+    ),
+    path(
+        'profiles/<str:report_id>/download/', views.profile_download,
+        name='profile_download'
+    ),
+]
@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404, HttpResponse
+from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+
+from core.metrics import render_metrics
+from core.profiler import (
+    load_report, profile_token, report_ids, report_path
+)
+
+
+@staff_member_required
+def profile_reports(request):
+    # Список отчётов и токен для включения профилирования
+    reports = [load_report(report_id) for report_id in report_ids()]
+    context = {
+        'reports': [report for report in reports if report],
+        'param': settings.PROFILER_PARAM,
+        'token': profile_token(request.user.get_username()),
+    }
+    return render(request, 'core/profile_reports.html', context)
+
+
+@staff_member_required
+def profile_report(request, report_id):
+    report = load_report(report_id)
+    if report is None:
+        raise Http404('Отчёт не найден')
+    return render(request, 'core/profile_report.html', {'report': report})
+
+
+@staff_member_required
+def profile_download(request, report_id):
+    # Профиль cProfile для pstats или snakeviz
+    path = report_path(report_id, '.prof')
+    if path is None:
+        raise Http404('Отчёт не найден')
+    return FileResponse(
+        open(path, 'rb'), as_attachment=True, filename=f'{report_id}.prof'
+    )
+
+
+def metrics_allowed(request):
+    if settings.METRICS_TOKEN:
+        scheme, _, token = request.META.get(
+            'HTTP_AUTHORIZATION', ''
+        ).partition(' ')
+        return scheme.lower() == 'bearer' and constant_time_compare(
+            token.strip(), settings.METRICS_TOKEN
+        )
+    # За прокси REMOTE_ADDR — адрес прокси, а не клиента: запросы,
+    # прошедшие через прокси, без токена не принимаются
+    if 'HTTP_X_FORWARDED_FOR' in request.META:
+        return False
+    if 'HTTP_FORWARDED' in request.META:
+        return False
+    return request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS
+
+
+def metrics(request):
+    # Метрики всех процессов сервера для Prometheus
+    if not metrics_allowed(request):
+        raise PermissionDenied
+    return HttpResponse(
+        render_metrics(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -1,6 +1,24 @@
-from django.contrib import admin
+from functools import partial
 
+from django import forms
+from django.contrib import admin, messages
+from django.core.exceptions import ValidationError
+from django.contrib.admin.helpers import ActionForm
+
+from core.paginator import CountedPaginator
+from .counts import count_posts
 from .models import Post, Group
+from .services import move_posts_to_group
+
+
+class PostActionForm(ActionForm):
+    # Группа для действия «Перенести в группу»
+    group = forms.ModelChoiceField(
+        queryset=Group.objects.all(),
+        required=False,
+        label='Группа',
+        empty_label='-без группы-'
+    )
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -14,6 +32,54 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     # Это свойство сработает для всех колонок: где пусто — там будет эта строка
     empty_value_display = '-пусто-'
+    # Автор и группа загружаются одним запросом вместе с постами
+    list_select_related = ('author', 'group')
+    # Не считаем все посты таблицы рядом с количеством найденных
+    show_full_result_count = False
+    action_form = PostActionForm
+    actions = ('move_to_group',)
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        # Для больших выборок количество оценивается, а не считается
+        return CountedPaginator(
+            queryset,
+            per_page,
+            orphans=orphans,
+            allow_empty_first_page=allow_empty_first_page,
+            count=partial(count_posts, queryset)
+        )
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(
+            db_field, request, **kwargs
+        )
+        if db_field.name == 'group' and request is not None:
+            # Варианты выбора группы загружаются один раз за запрос,
+            # а не в каждой строке списка с list_editable
+            choices = getattr(request, '_group_choices', None)
+            if choices is None:
+                # Перебор без len() обходится без запроса COUNT
+                choices = [choice for choice in formfield.choices]
+                request._group_choices = choices
+            formfield.choices = choices
+        return formfield
+
+    def move_to_group(self, request, queryset):
+        # Посты переносятся одним UPDATE, без сохранения по одному
+        try:
+            group = PostActionForm.base_fields['group'].clean(
+                request.POST.get('group')
+            )
+        except ValidationError:
+            self.message_user(
+                request, 'Группа не найдена', level=messages.ERROR
+            )
+            return
+        count = move_posts_to_group(queryset, group)
+        self.message_user(request, f'Перенесено постов: {count}')
+
+    move_to_group.short_description = 'Перенести в группу'
 
 
 # При регистрации модели Post источником конфигурации для неё назначаем
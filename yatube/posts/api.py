@@ -0,0 +1,175 @@
+"""Read-only JSON API лент и постов.
+
+Посты выбираются через .values() только с запрошенными полями
+(?fields=id,text), листаются курсором по (pub_date, pk) — ?cursor=
+из поля next прошлого ответа — и сериализуются по одной строке
+во время отправки ответа, без сборки всей страницы в памяти.
+"""
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from core.paginator import (
+    CURSOR_FORWARD, decode_cursor, encode_cursor, keyset_queryset, row_key
+)
+from posts.lookups import authors, groups
+from posts.models import Post
+
+# Поля API и соответствующие им поля для .values()
+FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+}
+# Поля ключа курсора выбираются всегда
+KEY_FIELDS = ('id', 'pub_date')
+
+encoder = DjangoJSONEncoder(ensure_ascii=False)
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def error_response(error):
+    return JsonResponse(
+        {'error': str(error)}, status=error.status,
+        json_dumps_params={'ensure_ascii': False}
+    )
+
+
+def api_view(view):
+    """Только GET; ApiError превращается в ответ JSON с ошибкой."""
+    @require_GET
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as error:
+            return error_response(error)
+    return wrapper
+
+
+def requested_fields(request):
+    """Поля из ?fields=; без параметра — все поля."""
+    value = request.GET.get('fields')
+    if not value:
+        return list(FIELDS)
+    fields = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in FIELDS]
+    if unknown or not fields:
+        raise ApiError(
+            f'Неизвестные поля: {", ".join(unknown)}; доступны: '
+            f'{", ".join(FIELDS)}'
+        )
+    return fields
+
+
+def page_size(request):
+    value = request.GET.get('limit')
+    if value is None:
+        return settings.OBJECTS_ON_THE_PAGE
+    try:
+        size = int(value)
+    except ValueError:
+        size = 0
+    if not 1 <= size <= settings.API_PAGE_SIZE_LIMIT:
+        raise ApiError(
+            f'limit должен быть от 1 до {settings.API_PAGE_SIZE_LIMIT}'
+        )
+    return size
+
+
+def serialize(row, fields):
+    return encoder.encode({name: row[FIELDS[name]] for name in fields})
+
+
+def stream_page(rows, fields, size):
+    """Части ответа: строки страницы по одной, затем курсор next.
+
+    rows — итератор по не более чем size + 1 строкам; лишняя
+    строка означает, что у ленты есть следующая страница.
+    """
+    yield '{"results": ['
+    last = None
+    for index, row in enumerate(rows):
+        if index == size:
+            break
+        yield (',' if index else '') + serialize(row, fields)
+        last = row
+    else:
+        last = None
+    next_cursor = None
+    if last is not None:
+        next_cursor = encode_cursor(CURSOR_FORWARD, *row_key(last))
+    yield '], "next": ' + json.dumps(next_cursor) + '}'
+
+
+def feed_response(request, posts):
+    fields = requested_fields(request)
+    size = page_size(request)
+    cursor = request.GET.get('cursor')
+    key = (None, None)
+    if cursor:
+        decoded = decode_cursor(cursor)
+        if decoded is None or decoded[0] != CURSOR_FORWARD:
+            raise ApiError('Неверный курсор')
+        key = decoded[1:]
+    lookups = {FIELDS[name] for name in fields} | set(KEY_FIELDS)
+    rows = (
+        keyset_queryset(posts, CURSOR_FORWARD, *key)
+        .values(*lookups)[:size + 1]
+        .iterator()
+    )
+    return StreamingHttpResponse(
+        stream_page(rows, fields, size),
+        content_type='application/json; charset=utf-8'
+    )
+
+
+def get_or_error(lookup, message, value):
+    instance = lookup.get(value)
+    if instance is None:
+        raise ApiError(message, status=404)
+    return instance
+
+
+@api_view
+def index(request):
+    return feed_response(request, Post.objects.all())
+
+
+@api_view
+def group_posts(request, slug):
+    group = get_or_error(groups, 'Группа не найдена', slug)
+    return feed_response(request, Post.objects.filter(group_id=group.pk))
+
+
+@api_view
+def profile(request, username):
+    author = get_or_error(authors, 'Пользователь не найден', username)
+    return feed_response(request, Post.objects.filter(author_id=author.pk))
+
+
+@api_view
+def post_detail(request, post_id):
+    fields = requested_fields(request)
+    row = (
+        Post.objects.filter(pk=post_id)
+        .values(*{FIELDS[name] for name in fields})
+        .first()
+    )
+    if row is None:
+        raise ApiError('Пост не найден', status=404)
+    return JsonResponse(
+        {name: row[FIELDS[name]] for name in fields},
+        json_dumps_params={'ensure_ascii': False}
+    )
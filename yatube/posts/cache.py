@@ -0,0 +1,176 @@
+"""Кэш страниц лент для анонимных посетителей.
+
+Ключ страницы включает версию ленты. При создании, изменении
+или удалении поста версии общей ленты, ленты его группы и ленты
+его автора увеличиваются (см. posts.signals), и старые страницы
+этих лент перестают использоваться. Остальные ленты остаются в кэше.
+Версии и страницы хранятся в кэше, общем для процессов сервера
+(core.caches): изменение в одном процессе меняет страницы и ETag
+во всех.
+
+Те же версии служат валидаторами условного GET: ETag страницы
+ленты или поста строится из версий лент, от которых зависит
+страница, и при совпадении с If-None-Match view не выполняется.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from core.caches import (
+    bump_version, get_version, now_and_on_commit, shared_cache
+)
+from core.routers import primary_reads, replica_read_count
+from posts.counts import FEED_AUTHOR, FEED_GROUP, FEED_INDEX
+from posts.models import Post
+
+# Параметры запроса, от которых зависит содержимое страницы ленты
+PAGE_PARAMS = ('page', 'cursor')
+
+
+def feed_version_key(feed, arg=None):
+    if feed == FEED_INDEX:
+        return 'posts:feed-version:index'
+    # slug и имя пользователя — ввод пользователя: в ключе memcached
+    # недопустимы пробелы, управляющие символы и длина больше 250
+    digest = hashlib.md5(str(arg).encode()).hexdigest()
+    return f'posts:feed-version:{feed}:{digest}'
+
+
+def feed_version(feed, arg=None):
+    """Текущая версия ленты из кэша, общего для процессов сервера,
+    или None, если он недоступен."""
+    return get_version(feed_version_key(feed, arg))
+
+
+def bump_feed_versions(feeds):
+    """Делает недействительными страницы лент [(feed, arg), ...]
+    во всех процессах; внутри транзакции — ещё раз после её фиксации."""
+    keys = [feed_version_key(feed, arg) for feed, arg in feeds]
+
+    def bump():
+        for key in keys:
+            # Версии нет в кэше: новая будет создана при обращении
+            bump_version(key)
+    now_and_on_commit(bump)
+
+
+def feed_page_key(feed, arg, request):
+    """Ключ страницы ленты или None, если версия ленты неизвестна."""
+    version = feed_version(feed, arg)
+    if version is None:
+        return None
+    params = '&'.join(
+        f'{name}={request.GET.get(name, "")}' for name in PAGE_PARAMS
+    )
+    digest = hashlib.md5(f'{arg}?{params}'.encode()).hexdigest()
+    return f'posts:feed-page:{feed}:{version}:{digest}'
+
+
+def cache_feed_page(feed, arg_name=None):
+    """Кэширует ответ view ленты для неавторизованных пользователей.
+
+    arg_name — имя аргумента view, определяющего ленту (slug группы
+    или имя автора). Время хранения задаёт FEED_PAGE_CACHE_TIMEOUT,
+    0 отключает кэш.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            timeout = settings.FEED_PAGE_CACHE_TIMEOUT
+            # Посторонние параметры попадают в ссылки пажинатора,
+            # такие страницы не кэшируем
+            if (not timeout or request.method != 'GET'
+                    or set(request.GET) - set(PAGE_PARAMS)
+                    or request.user.is_authenticated):
+                return view(request, *args, **kwargs)
+            key = feed_page_key(feed, kwargs.get(arg_name), request)
+            if key is None:
+                return view(request, *args, **kwargs)
+            response = shared_cache().get(key)
+            if response is None:
+                # Страница сохраняется под текущей версией ленты,
+                # а отстающая реплика могла ещё не получить изменения
+                with primary_reads():
+                    response = view(request, *args, **kwargs)
+                if response.status_code == 200:
+                    shared_cache().set(key, response, timeout)
+            return response
+        return wrapper
+    return decorator
+
+
+def page_etag(request, feeds):
+    """ETag страницы, зависящей от лент feeds [(feed, arg), ...].
+
+    Авторизованный пользователь видит свою шапку и кнопки, поэтому
+    его страницы отличаются от страниц других посетителей. Без версий
+    лент (общий кэш недоступен) ETag нет: изменения не отследить.
+    """
+    versions = [(feed, feed_version(feed, arg)) for feed, arg in feeds]
+    if any(version is None for _, version in versions):
+        return None
+    versions = ':'.join(f'{feed}={version}' for feed, version in versions)
+    params = request.GET.urlencode()
+    user_id = request.user.pk if request.user.is_authenticated else 0
+    return hashlib.md5(
+        f'{versions}?{params}#{user_id}'.encode()
+    ).hexdigest()
+
+
+def conditional_page(etag_func):
+    """Отвечает 304 Not Modified, если ETag от etag_func совпал
+    с If-None-Match, до запросов view к базе и отрисовки шаблона.
+
+    etag_func(request, *args, **kwargs) возвращает ETag или None,
+    если проверять нечего. ETag ставится только на ответы 200,
+    прочитанные без реплики.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            etag = etag_func(request, *args, **kwargs)
+            if etag is None:
+                return view(request, *args, **kwargs)
+            etag = quote_etag(etag)
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                replica_reads = replica_read_count()
+                response = view(request, *args, **kwargs)
+                # Страница с отстающей реплики могла не соответствовать
+                # версиям в ETag: такой ответ браузер не кэширует
+                if (response.status_code == 200
+                        and replica_read_count() == replica_reads):
+                    response.setdefault('ETag', etag)
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional_feed(feed, arg_name=None):
+    """Условный GET для ленты: версия ленты берётся из кэша,
+    без запросов к базе."""
+    def etag_func(request, *args, **kwargs):
+        return page_etag(request, [(feed, kwargs.get(arg_name))])
+    return conditional_page(etag_func)
+
+
+def post_etag(request, post_id):
+    """ETag страницы поста: она меняется вместе с лентой автора
+    (пост, имя автора, количество его постов) и группой поста."""
+    feeds = (
+        Post.objects.filter(pk=post_id)
+        .values_list('author__username', 'group__slug')
+        .first()
+    )
+    if feeds is None:
+        return None
+    username, slug = feeds
+    feeds = [(FEED_AUTHOR, username)]
+    if slug is not None:
+        feeds.append((FEED_GROUP, slug))
+    return page_etag(request, feeds)
@@ -0,0 +1,163 @@
+"""Количество постов в лентах без SELECT COUNT(*) на каждый запрос.
+
+Количество хранится по ключу ленты в кэше, общем для процессов
+сервера (core.caches). Сигналы модели Post (см. posts.signals)
+меняют таблицы счётчиков в транзакции записи и сбрасывают ключи
+затронутых лент — сразу и ещё раз после фиксации, поэтому другие
+процессы не пагинируют по устаревшему количеству, а откат записи
+не оставляет в кэше неверного значения. При промахе кэша количество
+постов автора и группы берётся из таблиц счётчиков, общей ленты —
+из суммы счётчиков авторов. Произвольные выборки (списки админки) считаются
+с ограничением FEED_COUNT_EXACT_LIMIT: для больших выборок вместо
+точного значения берётся оценка по диапазону первичных ключей,
+не больше количества всех постов.
+"""
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from core.caches import now_and_on_commit, shared_cache
+from posts.models import AuthorPostCounter, GroupPostCounter, Post
+
+FEED_INDEX = 'index'
+FEED_GROUP = 'group'
+FEED_AUTHOR = 'author'
+
+
+def feed_key(kind=FEED_INDEX, pk=None):
+    """Ключ кэша количества постов ленты автора или группы с id pk."""
+    if kind == FEED_INDEX:
+        return 'posts:count:index'
+    # Только id: slug или имя пользователя в ключе — ошибка
+    return f'posts:count:{kind}:{int(pk)}'
+
+
+def post_feed_keys(author_id, group_id):
+    """Ключи всех лент, в которых показывается пост."""
+    keys = [feed_key(), feed_key(FEED_AUTHOR, author_id)]
+    if group_id is not None:
+        keys.append(feed_key(FEED_GROUP, group_id))
+    return keys
+
+
+def pk_bound(queryset, order_by):
+    """Первый pk выборки в порядке order_by: один запрос ORDER BY
+    ... LIMIT 1, который читает индекс первичного ключа с края."""
+    return queryset.order_by(order_by).values_list('pk', flat=True).first()
+
+
+def estimate_count(queryset):
+    """Оценка сверху по диапазону первичных ключей выборки.
+
+    Крайние pk берутся двумя отдельными запросами по индексу (MIN
+    и MAX в одном запросе SQLite читает полным проходом). Выборка
+    с фильтром может занимать редкие pk широкого диапазона, поэтому
+    оценка ограничена количеством всех постов.
+    """
+    low = pk_bound(queryset, 'pk')
+    if low is None:
+        return 0
+    high = pk_bound(queryset, '-pk')
+    return min(high - low + 1, index_posts_count())
+
+
+def count_posts(queryset):
+    """Точное количество до FEED_COUNT_EXACT_LIMIT, выше — оценка."""
+    limit = settings.FEED_COUNT_EXACT_LIMIT
+    count = queryset.order_by()[:limit + 1].count()
+    if count <= limit:
+        return count
+    return max(estimate_count(queryset), count)
+
+
+def total_posts_count():
+    """Количество всех постов по счётчикам авторов: у каждого поста
+    есть автор, а авторов намного меньше, чем постов."""
+    total = AuthorPostCounter.objects.aggregate(total=Sum('posts_count'))
+    return total['total'] or 0
+
+
+def get_feed_count(key, queryset, counter=None):
+    """Количество постов ленты из кэша.
+
+    При промахе значение берётся из counter (функции чтения таблицы
+    счётчиков), а без неё — подсчётом по queryset.
+    """
+    cache = shared_cache()
+    count = cache.get(key)
+    if count is None:
+        count = counter() if counter is not None else count_posts(queryset)
+        cache.add(key, count, settings.FEED_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def index_posts_count():
+    return get_feed_count(
+        feed_key(), Post.objects.all(), total_posts_count
+    )
+
+
+def group_posts_count(group):
+    return get_feed_count(
+        feed_key(FEED_GROUP, group.pk),
+        group.posts.all(),
+        partial(GroupPostCounter.value, group.pk)
+    )
+
+
+def author_posts_count(author):
+    return get_feed_count(
+        feed_key(FEED_AUTHOR, author.pk),
+        author.posts.all(),
+        partial(AuthorPostCounter.value, author.pk)
+    )
+
+
+def invalidate_feed_counts(keys):
+    """Сбрасывает количества лент keys во всех процессах: сейчас
+    и, внутри транзакции, ещё раз после её фиксации. Новое значение
+    читается из таблиц счётчиков при следующем обращении к ленте."""
+    keys = list(keys)
+    now_and_on_commit(lambda: shared_cache().delete_many(keys))
+
+
+def rebuild_post_counters():
+    """Пересчитывает таблицы счётчиков постов авторов и групп.
+
+    Нужен после операций в обход Post.save(): bulk_create,
+    QuerySet.update() и правок базы вручную.
+    """
+    authors = (
+        Post.objects.order_by().values_list('author')
+        .annotate(n=Count('pk'))
+    )
+    groups = (
+        Post.objects.order_by().filter(group__isnull=False)
+        .values_list('group').annotate(n=Count('pk'))
+    )
+    # Ключи кэша сбрасываются и для лент, в которых постов не осталось
+    keys = [feed_key()]
+    keys += [
+        feed_key(FEED_AUTHOR, pk)
+        for pk in AuthorPostCounter.objects.values_list('pk', flat=True)
+    ]
+    keys += [
+        feed_key(FEED_GROUP, pk)
+        for pk in GroupPostCounter.objects.values_list('pk', flat=True)
+    ]
+    with transaction.atomic():
+        AuthorPostCounter.objects.all().delete()
+        GroupPostCounter.objects.all().delete()
+        AuthorPostCounter.objects.bulk_create(
+            AuthorPostCounter(author_id=pk, posts_count=n)
+            for pk, n in authors
+        )
+        GroupPostCounter.objects.bulk_create(
+            GroupPostCounter(group_id=pk, posts_count=n)
+            for pk, n in groups
+        )
+    keys += [feed_key(FEED_AUTHOR, pk) for pk, _ in authors]
+    keys += [feed_key(FEED_GROUP, pk) for pk, _ in groups]
+    invalidate_feed_counts(keys)
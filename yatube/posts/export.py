@@ -0,0 +1,87 @@
+"""Потоковая выгрузка постов автора или группы в CSV и NDJSON.
+
+Строки читаются QuerySet.iterator(chunk_size) пачками по
+EXPORT_CHUNK_SIZE и сразу превращаются в текст, поэтому память
+не зависит от количества постов. Сжатие gzip выполняется на лету
+по мере выдачи частей ответа.
+"""
+import csv
+import re
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.text import compress_sequence
+
+# Поля выгрузки и соответствующие им поля для .values_list()
+EXPORT_FIELDS = {
+    'id': 'id',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'text': 'text',
+}
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+# Размер части ответа перед сжатием, в байтах
+BUFFER_SIZE = 64 * 1024
+
+accepts_gzip = re.compile(r'\bgzip\b').search
+encoder = DjangoJSONEncoder(ensure_ascii=False)
+
+
+class Echo:
+    """Файлоподобный объект для csv.writer: возвращает строку,
+    а не записывает её."""
+    def write(self, value):
+        return value
+
+
+def export_rows(posts):
+    """Строки постов от новых к старым, прочитанные пачками."""
+    return posts.order_by('-pub_date', '-pk').values_list(
+        *EXPORT_FIELDS.values()
+    ).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(list(EXPORT_FIELDS))
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield encoder.encode(dict(zip(EXPORT_FIELDS, row))) + '\n'
+
+
+FORMATS = {
+    'csv': csv_lines,
+    'ndjson': ndjson_lines,
+}
+
+
+def encode_chunks(lines, size=BUFFER_SIZE):
+    """Склеивает строки в части по size байт в UTF-8."""
+    buffer = []
+    length = 0
+    for line in lines:
+        data = line.encode()
+        buffer.append(data)
+        length += len(data)
+        if length >= size:
+            yield b''.join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def export_posts(posts, export_format, compress=False):
+    """Части выгрузки постов posts в формате export_format (bytes)."""
+    chunks = encode_chunks(FORMATS[export_format](export_rows(posts)))
+    if compress:
+        return compress_sequence(chunks)
+    return chunks
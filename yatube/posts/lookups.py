@@ -0,0 +1,32 @@
+"""Группы по slug и авторы по имени из кэша в памяти процесса.
+
+Страницы групп и профилей начинаются с поиска группы или автора;
+ModelLookup отвечает на повторные запросы, в том числе к
+несуществующим адресам, без запроса к базе. Записи сбрасываются
+сигналами моделей (posts.signals) и после bulk_create в командах
+загрузки.
+"""
+from django.contrib.auth import get_user_model
+from django.http import Http404
+
+from core.lookups import ModelLookup
+from posts.models import Group
+
+User = get_user_model()
+
+groups = ModelLookup('groups', Group, 'slug')
+authors = ModelLookup('authors', User, 'username')
+
+
+def get_group_or_404(slug):
+    group = groups.get(slug)
+    if group is None:
+        raise Http404('Группа не найдена')
+    return group
+
+
+def get_author_or_404(username):
+    author = authors.get(username)
+    if author is None:
+        raise Http404('Пользователь не найден')
+    return author
@@ -0,0 +1,156 @@
+import json
+import subprocess
+from contextlib import ExitStack
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+import about.urls
+import posts.urls
+import users.urls
+from core.benchmark import PERCENTILES, measure
+from posts.models import Post
+
+URLCONFS = (posts.urls, users.urls, about.urls)
+# Параметр поискового запроса страниц с поиском
+SEARCH_PARAMS = {
+    'posts:search': 'q',
+}
+# Страницы, которые нельзя открывать от имени пользователя без
+# потери его сессии
+ANONYMOUS_ONLY = ('users:logout',)
+
+
+def git_commit():
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True
+        )
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время ответа (p50/p95/p99) и количество SQL-запросов '
+        'всех страниц posts, users и about через WSGI-приложение'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument(
+            '--output', help='Файл для результатов в формате JSON'
+        )
+        parser.add_argument(
+            '--compare', help='Файл с результатами прошлого замера'
+        )
+        parser.add_argument(
+            '--no-page-cache', action='store_true',
+            help='Отключить кэш страниц лент'
+        )
+
+    def sample_kwargs(self, post):
+        """Значения параметров адресов для поста post и его автора."""
+        return {
+            'slug': post.group.slug,
+            'username': post.author.username,
+            'post_id': post.pk,
+            'uidb64': urlsafe_base64_encode(force_bytes(post.author.pk)),
+            'token': default_token_generator.make_token(post.author),
+        }
+
+    def urls(self, post):
+        values = self.sample_kwargs(post)
+        word = post.text.split()[0] if post.text.split() else 'пост'
+        for urlconf in URLCONFS:
+            for pattern in urlconf.urlpatterns:
+                name = f'{urlconf.app_name}:{pattern.name}'
+                url = reverse(name, kwargs={
+                    key: values[key] for key in pattern.pattern.converters
+                })
+                if name in SEARCH_PARAMS:
+                    url += '?' + urlencode({SEARCH_PARAMS[name]: word})
+                yield name, url
+
+    def compare(self, results, path):
+        with open(path, encoding='utf-8') as file:
+            previous = {
+                (row['name'], row['user']): row
+                for row in json.load(file)['results']
+            }
+        for row in results:
+            old = previous.get((row['name'], row['user']))
+            if old is None:
+                continue
+            self.stdout.write(
+                f"{row['name']:32} {row['user']:9} p95 "
+                f"{old['p95_ms']:8.2f} -> {row['p95_ms']:8.2f} мс, "
+                f"запросов {old['queries']} -> {row['queries']}"
+            )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat должен быть больше нуля')
+        post = (
+            Post.objects.filter(group__isnull=False)
+            .select_related('author', 'group').first()
+        )
+        if post is None:
+            raise CommandError(
+                'Нет постов с группой: создайте данные командой '
+                'generate_posts'
+            )
+        # Импорт приложения WSGI настраивает его так же, как на сервере
+        from yatube.wsgi import application
+
+        client = Client()
+        client.force_login(post.author)
+        sessions = {
+            'anonymous': None,
+            'user': client.cookies[settings.SESSION_COOKIE_NAME].value,
+        }
+        results = []
+        with ExitStack() as stack:
+            if options['no_page_cache']:
+                stack.enter_context(
+                    override_settings(FEED_PAGE_CACHE_TIMEOUT=0)
+                )
+            for user, session_key in sessions.items():
+                for name, url in self.urls(post):
+                    if session_key is not None and name in ANONYMOUS_ONLY:
+                        continue
+                    result = measure(
+                        application, url, options['repeat'],
+                        options['warmup'], session_key
+                    )
+                    result.update(name=name, user=user)
+                    results.append(result)
+                    self.stdout.write(
+                        f"{name:32} {user:9} " + ' '.join(
+                            f"p{p} {result[f'p{p}_ms']:7.2f}"
+                            for p in PERCENTILES
+                        ) + f" мс, запросов {result['queries']}"
+                    )
+        report = {
+            'commit': git_commit(),
+            'created': timezone.now().isoformat(),
+            'posts': Post.objects.count(),
+            'repeat': options['repeat'],
+            'page_cache': not options['no_page_cache'],
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        if options['compare']:
+            self.compare(results, options['compare'])
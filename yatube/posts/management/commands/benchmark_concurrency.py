@@ -0,0 +1,176 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from copy import deepcopy
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+
+from core.benchmark import PERCENTILES, percentile
+from posts.models import Post
+
+User = get_user_model()
+
+# Настройки баз сравниваемых профилей; NAME подставляется командой
+PROFILES = {
+    'django': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {},
+    },
+    'tuned': None,
+}
+
+
+def profile_settings(profile, path):
+    """Настройки базы профиля; tuned — как у основной базы сайта."""
+    database = deepcopy(
+        PROFILES[profile] or settings.DATABASES['default']
+    )
+    database['NAME'] = path
+    return database
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность и ошибки "database is locked" '
+        'у читателей ленты и авторов постов, работающих одновременно, '
+        'на копии базы с настройками Django по умолчанию и настроенными'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument(
+            '--seconds', type=float, default=5,
+            help='Длительность замера каждого профиля'
+        )
+        parser.add_argument(
+            '--profile', action='append', choices=list(PROFILES),
+            help='Профиль для замера; по умолчанию все'
+        )
+        parser.add_argument(
+            '--output', help='Файл для результатов в формате JSON'
+        )
+
+    def read_feed(self, alias):
+        list(
+            Post.objects.using(alias).select_related('author', 'group')
+            .order_by('-pub_date', '-pk')[:settings.OBJECTS_ON_THE_PAGE]
+        )
+
+    def write_post(self, alias):
+        # Чтение и запись в одной транзакции, как при создании поста
+        with transaction.atomic(using=alias):
+            Post.objects.using(alias).filter(author_id=self.author_id).exists()
+            Post.objects.using(alias).bulk_create([
+                Post(author_id=self.author_id, text='Нагрузочный пост')
+            ])
+
+    def worker(self, alias, operation, deadline, results):
+        """Выполняет operation до deadline; каждая операция — отдельный
+        запрос к сайту со своим закрытием соединения."""
+        connection = connections[alias]
+        timings = []
+        errors = 0
+        try:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    operation(alias)
+                except OperationalError:
+                    errors += 1
+                else:
+                    timings.append((time.perf_counter() - started) * 1000)
+                connection.close_if_unusable_or_obsolete()
+        finally:
+            connection.close()
+        results.append((timings, errors))
+
+    def summary(self, results, seconds):
+        timings = sorted(
+            timing for worker_timings, _ in results
+            for timing in worker_timings
+        )
+        summary = {
+            'operations': len(timings),
+            'per_second': len(timings) / seconds,
+            'errors': sum(errors for _, errors in results),
+        }
+        for p in PERCENTILES:
+            summary[f'p{p}_ms'] = percentile(timings, p)
+        return summary
+
+    def run_profile(self, profile, path, options):
+        alias = f'benchmark_{profile}'
+        connections.databases[alias] = profile_settings(profile, path)
+        readers, writers = [], []
+        try:
+            deadline = time.perf_counter() + options['seconds']
+            threads = [
+                threading.Thread(
+                    target=self.worker,
+                    args=(alias, self.read_feed, deadline, readers)
+                )
+                for _ in range(options['readers'])
+            ] + [
+                threading.Thread(
+                    target=self.worker,
+                    args=(alias, self.write_post, deadline, writers)
+                )
+                for _ in range(options['writers'])
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            del connections.databases[alias]
+        return {
+            'profile': profile,
+            'reads': self.summary(readers, options['seconds']),
+            'writes': self.summary(writers, options['seconds']),
+        }
+
+    def handle(self, *args, **options):
+        if options['seconds'] <= 0:
+            raise CommandError('--seconds должен быть больше нуля')
+        self.author_id = User.objects.values_list('pk', flat=True).first()
+        if self.author_id is None:
+            raise CommandError(
+                'Нет пользователей: создайте данные командой generate_posts'
+            )
+        results = []
+        with tempfile.TemporaryDirectory() as directory:
+            snapshot = os.path.join(directory, 'snapshot.sqlite3')
+            call_command('snapshot_database', snapshot, stdout=StringIO())
+            for profile in options['profile'] or PROFILES:
+                # Каждый профиль начинает с одной и той же копии базы
+                path = os.path.join(directory, f'{profile}.sqlite3')
+                shutil.copyfile(snapshot, path)
+                result = self.run_profile(profile, path, options)
+                results.append(result)
+                self.stdout.write(f'{profile:8} ' + '; '.join(
+                    f"{kind}: {result[kind]['per_second']:8.0f}/с, "
+                    f"p95 {result[kind]['p95_ms'] or 0:7.2f} мс, "
+                    f"ошибок {result[kind]['errors']}"
+                    for kind in ('reads', 'writes')
+                ))
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(
+                    {
+                        'readers': options['readers'],
+                        'writers': options['writers'],
+                        'seconds': options['seconds'],
+                        'results': results,
+                    },
+                    file, ensure_ascii=False, indent=2
+                )
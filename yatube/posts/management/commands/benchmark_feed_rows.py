@@ -0,0 +1,116 @@
+import gc
+import json
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import PERCENTILES, percentile
+from posts.models import Post
+from posts.rows import feed_rows
+
+
+def model_rows(limit):
+    return Post.objects.select_related('group', 'author')[:limit]
+
+
+def slot_rows(limit):
+    return feed_rows(Post.objects.all())[:limit]
+
+
+PATHS = {
+    'models': model_rows,
+    'rows': slot_rows,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает выборку ленты объектами моделей '
+        '(select_related) и строками posts.rows.feed_rows: '
+        'время выборки и память на строку'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=1000,
+            help='Сколько постов выбирается за раз'
+        )
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument(
+            '--output', help='Файл для результатов в формате JSON'
+        )
+
+    def measure_time(self, path, limit, repeat, warmup):
+        for _ in range(warmup):
+            list(path(limit))
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            rows = list(path(limit))
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        result = {'mean_ms': sum(timings) / repeat}
+        for p in PERCENTILES:
+            result[f'p{p}_ms'] = percentile(timings, p)
+        result['rows_per_second'] = len(rows) / (result['mean_ms'] / 1000)
+        return result
+
+    def measure_memory(self, path, limit):
+        """Память, которую занимают выбранные строки, и пик
+        во время выборки, в байтах."""
+        gc.collect()
+        tracemalloc.start()
+        try:
+            before, _ = tracemalloc.get_traced_memory()
+            rows = list(path(limit))
+            gc.collect()
+            retained, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return {
+            'retained_bytes': retained - before,
+            'peak_bytes': peak - before,
+            'bytes_per_row': (retained - before) / max(len(rows), 1),
+        }
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1 or options['rows'] < 1:
+            raise CommandError('--repeat и --rows должны быть больше нуля')
+        if not Post.objects.exists():
+            raise CommandError(
+                'Нет постов: создайте данные командой generate_posts'
+            )
+        limit = options['rows']
+        results = {}
+        for name, path in PATHS.items():
+            results[name] = self.measure_time(
+                path, limit, options['repeat'], options['warmup']
+            )
+            results[name].update(self.measure_memory(path, limit))
+            row = results[name]
+            self.stdout.write(
+                f"{name:7} p50 {row['p50_ms']:7.2f} мс, "
+                f"p95 {row['p95_ms']:7.2f} мс, "
+                f"{row['rows_per_second']:9.0f} строк/с, "
+                f"{row['bytes_per_row']:6.0f} байт/строку, "
+                f"пик {row['peak_bytes'] / 1024:8.1f} КБ"
+            )
+        speedup = results['models']['mean_ms'] / results['rows']['mean_ms']
+        memory = (
+            results['models']['retained_bytes']
+            / max(results['rows']['retained_bytes'], 1)
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Строки быстрее в {speedup:.1f} раза '
+            f'и занимают в {memory:.1f} раза меньше памяти'
+        ))
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(
+                    {'rows': limit, 'repeat': options['repeat'],
+                     'speedup': speedup, 'memory_ratio': memory,
+                     'results': results},
+                    file, ensure_ascii=False, indent=2
+                )
@@ -0,0 +1,127 @@
+import json
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.template import engines
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from core.benchmark import PERCENTILES, percentile
+from core.paginator import CountedPaginator
+from posts.counts import author_posts_count
+from posts.models import Post
+
+ENGINES = ('django', 'jinja2')
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время отрисовки шаблонов лент и поста движками '
+        'Django и Jinja2 на готовом контексте, без SQL-запросов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument(
+            '--output', help='Файл для результатов в формате JSON'
+        )
+
+    def request(self, url):
+        request = RequestFactory().get(url)
+        request.user = AnonymousUser()
+        request.resolver_match = resolve(request.path_info)
+        return request
+
+    def pages(self, post):
+        """(шаблон, адрес, контекст) страниц с постами post.group."""
+        # Посты выбираются один раз: замеряется только отрисовка
+        posts = list(
+            Post.objects.filter(group=post.group)
+            .select_related('author', 'group')
+            [:settings.OBJECTS_ON_THE_PAGE]
+        )
+        page_obj = CountedPaginator(
+            posts, settings.OBJECTS_ON_THE_PAGE,
+            count=len(posts) * 10
+        ).get_page(2)
+        posts_count = author_posts_count(post.author)
+        yield 'posts/index.html', reverse('posts:index'), {
+            'page_obj': page_obj,
+        }
+        yield 'posts/group_list.html', reverse(
+            'posts:group_list', args=[post.group.slug]
+        ), {
+            'group': post.group,
+            'page_obj': page_obj,
+        }
+        yield 'posts/profile.html', reverse(
+            'posts:profile', args=[post.author.username]
+        ), {
+            'author': post.author,
+            'page_obj': page_obj,
+            'posts_count': posts_count,
+            'following': False,
+        }
+        yield 'posts/post_detail.html', reverse(
+            'posts:post_detail', args=[post.pk]
+        ), {
+            'post': post,
+            'posts_count': posts_count,
+        }
+
+    def measure(self, template, request, context, repeat, warmup):
+        for _ in range(warmup):
+            template.render(context, request)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            template.render(context, request)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        result = {'mean_ms': sum(timings) / repeat}
+        for p in PERCENTILES:
+            result[f'p{p}_ms'] = percentile(timings, p)
+        return result
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat должен быть больше нуля')
+        if 'jinja2' not in engines.templates:
+            raise CommandError('Jinja2 не установлен')
+        post = (
+            Post.objects.filter(group__isnull=False)
+            .select_related('author', 'group').first()
+        )
+        if post is None:
+            raise CommandError(
+                'Нет постов с группой: создайте данные командой '
+                'generate_posts'
+            )
+        results = []
+        for template_name, url, context in self.pages(post):
+            request = self.request(url)
+            row = {'template': template_name}
+            for engine in ENGINES:
+                template = engines[engine].get_template(template_name)
+                row[engine] = self.measure(
+                    template, request, context,
+                    options['repeat'], options['warmup']
+                )
+            row['speedup'] = (
+                row['django']['mean_ms'] / row['jinja2']['mean_ms']
+            )
+            results.append(row)
+            self.stdout.write(f'{template_name:24} ' + ', '.join(
+                f"{engine} p50 {row[engine]['p50_ms']:6.2f} "
+                f"p95 {row[engine]['p95_ms']:6.2f} мс"
+                for engine in ENGINES
+            ) + f" (быстрее в {row['speedup']:.1f} раза)")
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(
+                    {'repeat': options['repeat'], 'results': results},
+                    file, ensure_ascii=False, indent=2
+                )
@@ -0,0 +1,74 @@
+from itertools import product
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.explain import SORT_STEP, explain_query_plan
+from core.paginator import CURSOR_FORWARD, encode_cursor
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверяет по EXPLAIN QUERY PLAN, что ленты index, group_list '
+        'и profile читают посты по индексам без сортировки'
+    )
+
+    def feed_queries(self, client, url, params):
+        """Запросы страницы к таблице постов с сортировкой."""
+        with CaptureQueriesContext(connection) as context:
+            client.get(url, params)
+        for query in context.captured_queries:
+            sql = query['sql']
+            if 'FROM "posts_post"' in sql and 'ORDER BY' in sql:
+                yield sql
+
+    def handle(self, *args, **options):
+        post = (
+            Post.objects.filter(group__isnull=False)
+            .select_related('author', 'group')
+            .first()
+        )
+        if post is None:
+            raise CommandError(
+                'Для проверки нужен хотя бы один пост с группой'
+            )
+        # Индекс, которым должна читаться каждая лента
+        feeds = {
+            reverse('posts:index'): 'post_feed_idx',
+            reverse('posts:group_list', args=[post.group.slug]):
+                'post_group_feed_idx',
+            reverse('posts:profile', args=[post.author.username]):
+                'post_author_feed_idx',
+        }
+        # Первая страница и страница после поста post в обоих режимах
+        pages = {
+            'page': ({}, {'page': 2}),
+            'cursor': ({}, {'cursor': encode_cursor(
+                CURSOR_FORWARD, post.pub_date, post.pk
+            )}),
+        }
+        client = Client()
+        problems = []
+        for mode, mode_pages in pages.items():
+            # Кэш страниц отключаем, чтобы view выполнили запросы
+            with override_settings(
+                PAGINATION_MODE=mode, FEED_PAGE_CACHE_TIMEOUT=0
+            ):
+                for (url, index_name), params in product(
+                    feeds.items(), mode_pages
+                ):
+                    for sql in self.feed_queries(client, url, params):
+                        plan = ' | '.join(explain_query_plan(sql))
+                        self.stdout.write(f'{mode} {url}: {plan}')
+                        if SORT_STEP in plan or index_name not in plan:
+                            problems.append(f'{mode} {url}: {plan}')
+        if problems:
+            raise CommandError(
+                'Ленты читаются без индекса или с сортировкой:\n'
+                + '\n'.join(problems)
+            )
+        self.stdout.write(self.style.SUCCESS('Все ленты читаются по индексам'))
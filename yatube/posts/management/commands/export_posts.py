@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import FORMATS, export_posts
+from posts.models import Group
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Выгружает все посты автора или группы в CSV или NDJSON'
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument('--author', help='Имя пользователя')
+        source.add_argument('--group', help='slug группы')
+        parser.add_argument(
+            '--format', choices=list(FORMATS), default='csv'
+        )
+        parser.add_argument(
+            '--output', help='Файл выгрузки; без него — в stdout'
+        )
+        parser.add_argument(
+            '--gzip', action='store_true', help='Сжать выгрузку gzip'
+        )
+
+    def handle(self, *args, **options):
+        if options['gzip'] and not options['output']:
+            raise CommandError('Для сжатой выгрузки укажите --output')
+        if options['author']:
+            source = User.objects.filter(username=options['author']).first()
+        else:
+            source = Group.objects.filter(slug=options['group']).first()
+        if source is None:
+            raise CommandError('Автор или группа не найдены')
+        chunks = export_posts(
+            source.posts.all(), options['format'], options['gzip']
+        )
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk.decode(), ending='')
+            return
+        with open(options['output'], 'wb') as file:
+            for chunk in chunks:
+                file.write(chunk)
@@ -0,0 +1,152 @@
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate
+from uuid import uuid4
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from posts.lookups import authors, groups
+from posts.models import Group, Post
+from posts.services import bulk_create_posts, refresh_post_feeds
+
+User = get_user_model()
+
+# Слова для текстов постов
+WORDS = (
+    'лес река поле город дорога утро вечер дождь солнце ветер море '
+    'горы книга письмо друг дом окно сад весна лето осень зима '
+    'песня память время путь небо звезда огонь вода земля свет'
+).split()
+
+
+def zipf_cum_weights(size, skew):
+    """Накопленные веса распределения Ципфа для size элементов.
+
+    При skew = 0 элементы равновероятны, с ростом skew всё больше
+    постов приходится на первые элементы.
+    """
+    return list(accumulate(1 / (rank ** skew) for rank in range(1, size + 1)))
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт пользователей, группы и посты для проверки '
+        'производительности на больших данных'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель распределения Ципфа постов по авторам '
+                 'и группам; 0 — равномерное распределение'
+        )
+        parser.add_argument(
+            '--no-group', type=float, default=0.2,
+            help='Доля постов без группы'
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней распределены даты публикации'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=None)
+
+    def create_users(self, prefix, count, batch_size):
+        # Пароль непригоден для входа и хешируется один раз
+        password = make_password(None)
+        usernames = [f'{prefix}{index}' for index in range(count)]
+        User.objects.bulk_create(
+            (User(username=name, password=password) for name in usernames),
+            batch_size=batch_size
+        )
+        # bulk_create не отправляет сигналы
+        authors.invalidate(usernames)
+        # SQLite не возвращает id из bulk_create, читаем их по префиксу
+        return list(
+            User.objects.filter(username__startswith=prefix)
+            .order_by('pk').values_list('pk', flat=True)
+        )
+
+    def create_groups(self, prefix, count, batch_size):
+        Group.objects.bulk_create(
+            (
+                Group(
+                    title=f'Группа {index}',
+                    slug=f'{prefix}{index}',
+                    description=f'Описание группы {index}'
+                )
+                for index in range(count)
+            ),
+            batch_size=batch_size
+        )
+        groups.invalidate(f'{prefix}{index}' for index in range(count))
+        return list(
+            Group.objects.filter(slug__startswith=prefix)
+            .order_by('pk').values_list('pk', flat=True)
+        )
+
+    def post_text(self, rnd):
+        # Длины текстов тоже неравномерны: много коротких, мало длинных
+        length = min(int(rnd.lognormvariate(2.5, 0.8)) + 1, 300)
+        return ' '.join(rnd.choice(WORDS) for _ in range(length))
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь')
+        rnd = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        prefix = f'gen_{uuid4().hex[:8]}_'
+        started = time.perf_counter()
+        with transaction.atomic():
+            author_ids = self.create_users(
+                prefix, options['users'], batch_size
+            )
+            group_ids = self.create_groups(
+                prefix, options['groups'], batch_size
+            )
+        author_weights = zipf_cum_weights(len(author_ids), options['skew'])
+        group_weights = zipf_cum_weights(len(group_ids), options['skew'])
+        # Посты идут по возрастанию даты, как при обычной публикации
+        total = options['posts']
+        end = timezone.now()
+        step = timedelta(days=options['days']) / max(total, 1)
+        start = end - step * total
+        created = 0
+        while created < total:
+            size = min(batch_size, total - created)
+            authors = rnd.choices(author_ids, cum_weights=author_weights,
+                                  k=size)
+            groups = rnd.choices(group_ids, cum_weights=group_weights,
+                                 k=size) if group_ids else [None] * size
+            posts = []
+            for author_id, group_id in zip(authors, groups):
+                if rnd.random() < options['no_group']:
+                    group_id = None
+                posts.append(Post(
+                    author_id=author_id,
+                    group_id=group_id,
+                    text=self.post_text(rnd),
+                    pub_date=start + step * created
+                ))
+                created += 1
+            with transaction.atomic():
+                bulk_create_posts(posts)
+            self.stdout.write(f'Постов: {created} из {total}')
+        refresh_post_feeds(
+            User.objects.filter(username__startswith=prefix),
+            Group.objects.filter(slug__startswith=prefix)
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {len(author_ids)}, групп: '
+            f'{len(group_ids)}, постов: {total} за {elapsed:.1f} с '
+            f'({total / elapsed:.0f} постов/с), префикс {prefix}'
+        ))
@@ -0,0 +1,296 @@
+import csv
+import gzip
+import json
+import os
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.lookups import authors, groups
+from posts.models import Group, ImportCheckpoint, Post
+from posts.search import create_search_index, drop_search_triggers
+from posts.services import bulk_create_posts, refresh_post_feeds
+
+User = get_user_model()
+
+# Размер списка для фильтра __in при чтении id новых авторов и групп
+LOOKUP_CHUNK_SIZE = 500
+
+
+class RowError(ValueError):
+    """Строку источника нельзя превратить в пост."""
+
+
+class SourceLines:
+    """Строки файла, открытого в двоичном режиме, и смещение в байтах
+    после последней прочитанной."""
+    def __init__(self, file):
+        self.file = file
+        self.position = 0
+
+    def seek(self, offset):
+        if offset:
+            self.file.seek(offset)
+            self.position = offset
+
+    def __iter__(self):
+        for line in self.file:
+            self.position += len(line)
+            yield line.decode('utf-8')
+
+
+def read_records(path, source_format, offset=0):
+    """Записи источника по одной, без чтения файла целиком:
+    (запись, смещение в байтах после неё).
+
+    Чтение начинается со смещения offset — пропущенные строки
+    не разбираются. У CSV заголовок читается из начала файла.
+    """
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as file:
+        lines = SourceLines(file)
+        if source_format == 'csv':
+            # csv.reader не читает строки впрок: после каждой записи
+            # смещение указывает на её конец
+            fieldnames = next(csv.reader(lines), None)
+            lines.seek(offset)
+            for record in csv.DictReader(lines, fieldnames=fieldnames):
+                yield record, lines.position
+            return
+        lines.seek(offset)
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield record, lines.position
+
+
+def parse_pub_date(value):
+    """Дата публикации из источника; пустая — None (текущее время)."""
+    if not value:
+        return None
+    try:
+        pub_date = parse_datetime(value)
+    except ValueError:
+        pub_date = None
+    if pub_date is None:
+        raise RowError(f'неверная дата {value!r}')
+    if settings.USE_TZ and timezone.is_naive(pub_date):
+        pub_date = timezone.make_aware(pub_date)
+    return pub_date
+
+
+def chunked(items, size=LOOKUP_CHUNK_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает посты из NDJSON или CSV (поля author, group, '
+        'pub_date, text) пачками bulk_create с продолжением '
+        'с контрольной точки'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл .ndjson, .csv или .gz')
+        parser.add_argument('--format', choices=('ndjson', 'csv'))
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--transaction-size', type=int, default=20000,
+            help='Сколько строк загружается в одной транзакции'
+        )
+        parser.add_argument(
+            '--create-authors', action='store_true',
+            help='Создавать отсутствующих авторов без пароля'
+        )
+        parser.add_argument(
+            '--create-groups', action='store_true',
+            help='Создавать отсутствующие группы по slug'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Имя контрольной точки в базе; по умолчанию полный '
+                 'путь к файлу'
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Пропустить строки, загруженные до контрольной точки'
+        )
+        parser.add_argument(
+            '--defer-search-index', action='store_true',
+            help='Отключить триггеры поиска на время загрузки '
+                 '(поиск работает по прежним постам) и перестроить '
+                 'индекс в конце'
+        )
+
+    def source_format(self, path, options):
+        if options['format']:
+            return options['format']
+        name = path[:-3] if path.endswith('.gz') else path
+        return 'csv' if name.endswith('.csv') else 'ndjson'
+
+    def read_checkpoint(self, source):
+        """(строк, смещение) загруженной части источника."""
+        checkpoint = ImportCheckpoint.objects.filter(source=source).first()
+        if checkpoint is None:
+            return 0, 0
+        return checkpoint.rows, checkpoint.offset
+
+    def load_maps(self):
+        """Словари имя → id авторов и slug → id групп."""
+        self.authors = dict(User.objects.values_list('username', 'pk'))
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+
+    def create_missing(self, records, options):
+        """Создаёт авторов и группы пачки, которых ещё нет в словарях."""
+        usernames = {
+            record.get('author') for record in records
+            if isinstance(record, dict) and record.get('author')
+        }
+        slugs = {
+            record.get('group') for record in records
+            if isinstance(record, dict) and record.get('group')
+        }
+        new_authors = usernames - self.authors.keys()
+        new_groups = slugs - self.groups.keys()
+        if options['create_authors'] and new_authors:
+            password = make_password(None)
+            User.objects.bulk_create(
+                User(username=name, password=password)
+                for name in new_authors
+            )
+            # bulk_create не отправляет сигналы
+            authors.invalidate(new_authors)
+            for part in chunked(new_authors):
+                self.authors.update(User.objects.filter(
+                    username__in=part
+                ).values_list('username', 'pk'))
+        if options['create_groups'] and new_groups:
+            Group.objects.bulk_create(
+                Group(slug=slug, title=slug, description='')
+                for slug in new_groups
+            )
+            groups.invalidate(new_groups)
+            for part in chunked(new_groups):
+                self.groups.update(Group.objects.filter(
+                    slug__in=part
+                ).values_list('slug', 'pk'))
+
+    def build_post(self, record):
+        if not isinstance(record, dict):
+            raise RowError('не удалось разобрать строку')
+        author_id = self.authors.get(record.get('author'))
+        if author_id is None:
+            raise RowError(f'нет автора {record.get("author")!r}')
+        group_id = None
+        if record.get('group'):
+            group_id = self.groups.get(record['group'])
+            if group_id is None:
+                raise RowError(f'нет группы {record["group"]!r}')
+        text = record.get('text')
+        if not text:
+            raise RowError('пустой текст')
+        return Post(
+            author_id=author_id, group_id=group_id, text=text,
+            pub_date=parse_pub_date(record.get('pub_date'))
+        )
+
+    def load(self, records, options, checkpoint):
+        """Загружает пачку записей в одной транзакции с контрольной
+        точкой checkpoint — (источник, строк, смещение).
+
+        Возвращает (загружено, пропущено).
+        """
+        posts = []
+        skipped = 0
+        source, rows, offset = checkpoint
+        with transaction.atomic():
+            self.create_missing(records, options)
+            for record in records:
+                try:
+                    posts.append(self.build_post(record))
+                except RowError as error:
+                    skipped += 1
+                    if options['verbosity'] > 1:
+                        self.stderr.write(f'Строка пропущена: {error}')
+            bulk_create_posts(posts, batch_size=options['batch_size'])
+            ImportCheckpoint.objects.update_or_create(
+                source=source, defaults={'rows': rows, 'offset': offset}
+            )
+        return len(posts), skipped
+
+    def import_records(self, records, source, start, options):
+        """Загружает записи транзакциями по transaction_size строк,
+        отмечая контрольные точки. Возвращает (загружено, пропущено)."""
+        consumed = start
+        loaded = skipped = 0
+        started = time.perf_counter()
+        batch = []
+        for record, offset in records:
+            consumed += 1
+            batch.append(record)
+            if len(batch) < options['transaction_size']:
+                continue
+            batch_loaded, batch_skipped = self.load(
+                batch, options, (source, consumed, offset)
+            )
+            loaded += batch_loaded
+            skipped += batch_skipped
+            batch = []
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'Строк: {consumed}, загружено: {loaded}, '
+                f'{loaded / elapsed:.0f} строк/с'
+            )
+        if batch:
+            batch_loaded, batch_skipped = self.load(
+                batch, options, (source, consumed, offset)
+            )
+            loaded += batch_loaded
+            skipped += batch_skipped
+        return loaded, skipped
+
+    def handle(self, *args, **options):
+        path = options['path']
+        source = options['checkpoint'] or os.path.abspath(path)
+        start, offset = 0, 0
+        if options['resume']:
+            start, offset = self.read_checkpoint(source)
+        self.load_maps()
+        records = read_records(
+            path, self.source_format(path, options), offset
+        )
+        started = time.perf_counter()
+        if options['defer_search_index']:
+            with connection.schema_editor() as schema_editor:
+                drop_search_triggers(schema_editor)
+        try:
+            loaded, skipped = self.import_records(
+                records, source, start, options
+            )
+        finally:
+            # И после ошибки: загруженные до неё транзакции уже
+            # зафиксированы, а без триггеров поиск не увидит новых постов
+            if options['defer_search_index']:
+                self.stdout.write('Перестройка поискового индекса')
+                with connection.schema_editor() as schema_editor:
+                    # create_search_index() возвращает триггеры
+                    # и заполняет индекс заново
+                    create_search_index(schema_editor)
+            refresh_post_feeds()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено постов: {loaded}, пропущено строк: {skipped} '
+            f'за {elapsed:.1f} с ({loaded / max(elapsed, 1e-9):.0f} строк/с)'
+        ))
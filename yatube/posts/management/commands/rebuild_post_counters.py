@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts.counts import rebuild_post_counters
+from posts.models import AuthorPostCounter, GroupPostCounter
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов авторов и групп'
+
+    def handle(self, *args, **options):
+        rebuild_post_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'Счётчики пересчитаны: авторов '
+            f'{AuthorPostCounter.objects.count()}, групп '
+            f'{GroupPostCounter.objects.count()}'
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересоздаёт полнотекстовый индекс постов и его триггеры, '
+        'например после миграций, пересоздающих таблицу постов'
+    )
+
+    def handle(self, *args, **options):
+        rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс пересоздан'))
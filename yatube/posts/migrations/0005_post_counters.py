@@ -0,0 +1,76 @@
+# Generated by Django 2.2.19 on 2026-10-18 04:39
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_counters(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    AuthorPostCounter = apps.get_model('posts', 'AuthorPostCounter')
+    GroupPostCounter = apps.get_model('posts', 'GroupPostCounter')
+    authors = Post.objects.values('author').annotate(n=models.Count('pk'))
+    AuthorPostCounter.objects.bulk_create(
+        AuthorPostCounter(author_id=row['author'], posts_count=row['n'])
+        for row in authors.order_by()
+    )
+    groups = (
+        Post.objects.filter(group__isnull=False)
+        .values('group').annotate(n=models.Count('pk'))
+    )
+    GroupPostCounter.objects.bulk_create(
+        GroupPostCounter(group_id=row['group'], posts_count=row['n'])
+        for row in groups.order_by()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0004_auto_20221123_0008'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorPostCounter',
+            fields=[
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Количество постов')),
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='post_counter', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='GroupPostCounter',
+            fields=[
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Количество постов')),
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='post_counter', serialize=False, to='posts.Group', verbose_name='Группа')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='posts', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='group',
+            field=models.ForeignKey(blank=True, help_text='Группа, к которой будет относиться пост', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='posts', to='posts.Group', verbose_name='Группа'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='pub_date',
+            field=models.DateTimeField(auto_now_add=True, verbose_name='Дата публикации'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='text',
+            field=models.TextField(help_text='Введите текст поста', verbose_name='Текст поста'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import (
+    IntegrityError, connections, models, router, transaction
+)
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -38,7 +40,215 @@ class Post(models.Model):
 
     class Meta:
         default_related_name = 'posts'
-        ordering = ['-pub_date']
+        # pk делает порядок однозначным для постов с одинаковой датой
+        ordering = ['-pub_date', '-pk']
+        # Индексы лент: выборка страницы читается из индекса
+        # уже в нужном порядке, без сортировки во временном B-дереве
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_feed_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_feed_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_feed_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text
+
+    def save(self, *args, **kwargs):
+        # Пост и счётчики его автора и группы
+        # (обработчики в posts.signals) изменяются атомарно
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
+
+class PostCounter(models.Model):
+    """Денормализованное количество постов, чтобы не выполнять
+    COUNT(*) при каждом показе профиля или группы."""
+    posts_count = models.PositiveIntegerField(
+        'Количество постов',
+        default=0
+    )
+
+    # Поле модели Post, по которому считаются посты
+    post_field = None
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def count_posts(cls, pk):
+        return Post.objects.filter(**{cls.post_field: pk}).count()
+
+    @classmethod
+    def value(cls, pk):
+        """Количество постов; отсутствующий счётчик создаётся
+        по фактическому количеству."""
+        counter, _ = cls.objects.get_or_create(
+            pk=pk,
+            defaults={'posts_count': cls.count_posts(pk)}
+        )
+        return counter.posts_count
+
+    @classmethod
+    def adjust(cls, pk, delta):
+        """Изменяет счётчик на delta одним UPDATE."""
+        updated = cls.objects.filter(pk=pk).update(
+            posts_count=models.F('posts_count') + delta
+        )
+        # Счётчик удалённого автора не воссоздаём: при каскадном
+        # удалении он исчезает раньше постов
+        if not updated and delta > 0:
+            cls.create_counted(pk, delta)
+
+    @classmethod
+    def create_counted(cls, pk, delta):
+        """Создаёт счётчик по фактическому количеству постов
+        (изменение delta в нём уже учтено) одним INSERT ... SELECT."""
+        using = router.db_for_write(cls)
+        connection = connections[using]
+        quote = connection.ops.quote_name
+        post_field = Post._meta.get_field(cls.post_field)
+        pk_column = cls._meta.pk.column
+        sql = (
+            f'INSERT INTO {quote(cls._meta.db_table)} '
+            f'({quote(pk_column)}, {quote("posts_count")}) '
+            f'SELECT %s, COUNT(*) FROM {quote(Post._meta.db_table)} '
+            f'WHERE {quote(post_field.column)} = %s'
+        )
+        try:
+            with transaction.atomic(using=using):
+                with connection.cursor() as cursor:
+                    cursor.execute(sql, [pk, pk])
+        except IntegrityError:
+            # Счётчик создал параллельный запрос, не видевший наш пост
+            cls.objects.filter(pk=pk).update(
+                posts_count=models.F('posts_count') + delta
+            )
+
+
+class AuthorPostCounter(PostCounter):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='post_counter',
+        verbose_name='Автор'
+    )
+
+    post_field = 'author_id'
+
+
+class GroupPostCounter(PostCounter):
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='post_counter',
+        verbose_name='Группа'
+    )
+
+    post_field = 'group_id'
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower',
+        verbose_name='Подписчик'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following',
+        verbose_name='Автор'
+    )
+    # Посты популярного автора не раскладываются по лентам
+    # подписчиков, а читаются из его ленты при показе
+    pull = models.BooleanField(
+        'Читать посты из ленты автора',
+        default=False
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_follow'
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='no_self_follow'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'pull'], name='follow_pull_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user} -> {self.author}'
+
+
+class TimelineEntry(models.Model):
+    """Пост автора в ленте подписок подписчика.
+
+    Дата публикации повторяет Post.pub_date, чтобы страница ленты
+    читалась из индекса (user, -pub_date, -post) без соединения
+    с таблицей постов для сортировки.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_feed_idx'
+            ),
+        ]
+
+
+class ImportCheckpoint(models.Model):
+    """Контрольная точка команды import_posts.
+
+    Записывается в одной транзакции с пачкой постов, поэтому всегда
+    соответствует зафиксированным строкам.
+    """
+    source = models.CharField('Источник', max_length=500, unique=True)
+    rows = models.PositiveIntegerField('Прочитано строк', default=0)
+    # Смещение в байтах (в распакованном потоке для .gz) после
+    # последней загруженной строки
+    offset = models.BigIntegerField('Смещение в файле', default=0)
+    updated = models.DateTimeField('Обновлена', auto_now=True)
+
+    def __str__(self):
+        return f'{self.source}: {self.rows}'
@@ -0,0 +1,102 @@
+"""Лёгкие строки лент вместо объектов моделей.
+
+Шаблон поста в ленте (includes/one_post.html) показывает текст, дату,
+полное имя автора и ссылку на группу. feed_rows() выбирает только эти
+столбцы вместо всех полей Post, User (с хэшем пароля) и Group
+(с описанием) и возвращает объекты с __slots__: без __dict__, без
+состояния модели и без разбора лишних столбцов. Строки одного автора
+или одной группы в выборке ссылаются на один объект.
+"""
+from django.db.models.query import ValuesListIterable
+
+from posts.models import Post
+
+# Поля выборки в порядке, в котором их разбирает PostRowIterable
+ROW_FIELDS = (
+    'pk', 'text', 'pub_date',
+    'author__username', 'author__first_name', 'author__last_name',
+    'group__slug', 'group__title',
+)
+
+
+class AuthorRow:
+    __slots__ = ('username', 'first_name', 'last_name')
+
+    def __init__(self, username, first_name, last_name):
+        self.username = username
+        self.first_name = first_name
+        self.last_name = last_name
+
+    def get_full_name(self):
+        # Как User.get_full_name()
+        return f'{self.first_name} {self.last_name}'.strip()
+
+    def __str__(self):
+        return self.username
+
+
+class GroupRow:
+    __slots__ = ('slug', 'title')
+
+    def __init__(self, slug, title):
+        self.slug = slug
+        self.title = title
+
+    def __str__(self):
+        return self.title
+
+
+class PostRow:
+    __slots__ = ('pk', 'text', 'pub_date', 'author', 'group')
+
+    def __init__(self, pk, text, pub_date, author, group=None):
+        self.pk = pk
+        self.text = text
+        self.pub_date = pub_date
+        self.author = author
+        self.group = group
+
+    def __str__(self):
+        return self.text
+
+    def __eq__(self, other):
+        # Как у моделей: строка равна строке или посту с тем же pk
+        if not isinstance(other, (PostRow, Post)):
+            return NotImplemented
+        return self.pk == other.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+
+class PostRowIterable(ValuesListIterable):
+    """Превращает кортежи .values_list(*ROW_FIELDS) в PostRow."""
+    def __iter__(self):
+        authors = {}
+        groups = {}
+        for (pk, text, pub_date, username, first_name, last_name,
+                slug, title) in super().__iter__():
+            author = authors.get(username)
+            if author is None:
+                author = authors[username] = AuthorRow(
+                    username, first_name, last_name
+                )
+            group = None
+            if slug is not None:
+                group = groups.get(slug)
+                if group is None:
+                    group = groups[slug] = GroupRow(slug, title)
+            yield PostRow(pk, text, pub_date, author, group)
+
+
+def feed_rows(posts):
+    """Выборка posts, возвращающая PostRow вместо объектов Post.
+
+    Результат остаётся QuerySet: его можно фильтровать, сортировать
+    и срезать, поэтому он подходит обоим пажинаторам лент.
+    """
+    rows = posts.values_list(*ROW_FIELDS)
+    # Так же .values_list() выбирает класс, превращающий строки курсора
+    # в результат; клонирование выборки его сохраняет
+    rows._iterable_class = PostRowIterable
+    return rows
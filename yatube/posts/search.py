@@ -0,0 +1,188 @@
+"""Полнотекстовый поиск по постам на индексе SQLite FTS5.
+
+Индекс posts_post_fts хранит только токены текста (external content)
+и синхронизируется с posts_post триггерами, поэтому учитывает
+и bulk_create, и изменения в обход ORM. При пересоздании таблицы
+posts_post миграциями триггеры пропадают вместе с ней — после таких
+миграций нужно выполнить команду rebuild_search_index.
+"""
+from django.conf import settings
+from django.db import connection
+from django.utils.functional import cached_property
+
+from posts.models import Post
+from posts.rows import AuthorRow, PostRow
+
+# Маркеры начала и конца совпадения во фрагменте snippet()
+MATCH_START = '\x02'
+MATCH_END = '\x03'
+
+CREATE_SQL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS posts_post_fts USING fts5(
+        text, content='posts_post', content_rowid='id',
+        tokenize='unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS posts_post_fts_insert
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_post_fts_delete
+    AFTER DELETE ON posts_post BEGIN
+        INSERT INTO posts_post_fts(posts_post_fts, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_post_fts_update
+    AFTER UPDATE OF text ON posts_post BEGIN
+        INSERT INTO posts_post_fts(posts_post_fts, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text);
+    END""",
+    "INSERT INTO posts_post_fts(posts_post_fts) VALUES ('rebuild')",
+)
+
+DROP_TRIGGERS_SQL = (
+    'DROP TRIGGER IF EXISTS posts_post_fts_insert',
+    'DROP TRIGGER IF EXISTS posts_post_fts_delete',
+    'DROP TRIGGER IF EXISTS posts_post_fts_update',
+)
+
+DROP_SQL = DROP_TRIGGERS_SQL + ('DROP TABLE IF EXISTS posts_post_fts',)
+
+
+def create_search_index(schema_editor):
+    """Создаёт индекс и триггеры и заполняет индекс текущими постами."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_search_triggers(schema_editor):
+    """Отключает обновление индекса, не удаляя его: поиск продолжает
+    работать по прежним постам. create_search_index() возвращает
+    триггеры и заполняет индекс заново."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_TRIGGERS_SQL:
+        schema_editor.execute(sql)
+
+
+def rebuild_search_index():
+    with connection.schema_editor() as schema_editor:
+        drop_search_index(schema_editor)
+        create_search_index(schema_editor)
+
+
+def fts_query(text):
+    """Превращает ввод пользователя в запрос FTS5.
+
+    Каждое слово берётся в кавычки, чтобы символы синтаксиса FTS5
+    (кавычки, звёздочки, NEAR, OR) искались как текст, а не вызывали
+    ошибку разбора запроса. Слова объединяются по И.
+    """
+    words = text.split()
+    return ' '.join('"{}"'.format(word.replace('"', '""')) for word in words)
+
+
+# Страница результатов: bm25, LIMIT, OFFSET и snippet() считаются
+# в подзапросе к индексу FTS, и только для его строк читаются посты
+# и авторы
+PAGE_SQL = (
+    'SELECT post.id, post.text, post.pub_date, author.username, '
+    'author.first_name, author.last_name, found.snippet '
+    'FROM (SELECT rowid, rank, '
+    "snippet(posts_post_fts, 0, char(2), char(3), '…', 24) AS snippet "
+    'FROM posts_post_fts WHERE posts_post_fts MATCH %s '
+    'ORDER BY rank LIMIT %s OFFSET %s) AS found '
+    'JOIN posts_post AS post ON post.id = found.rowid '
+    'JOIN auth_user AS author ON author.id = post.author_id '
+    'ORDER BY found.rank'
+)
+# Число совпадений, но не больше заданного
+COUNT_SQL = (
+    'SELECT COUNT(*) FROM (SELECT 1 FROM posts_post_fts '
+    'WHERE posts_post_fts MATCH %s LIMIT %s)'
+)
+
+
+class SearchRow(PostRow):
+    """Найденный пост с фрагментом текста."""
+    __slots__ = ('snippet',)
+
+    def __init__(self, pk, text, pub_date, author, snippet):
+        super().__init__(pk, text, pub_date, author)
+        self.snippet = snippet
+
+
+class SearchResults:
+    """Посты, найденные по запросу FTS5, в порядке релевантности (bm25).
+
+    Срез — один запрос: индекс отбирает и ранжирует строки страницы,
+    фрагменты строятся только для них. Результатов не больше
+    SEARCH_RESULTS_LIMIT: так ограничены и подсчёт совпадений,
+    и глубина OFFSET.
+    """
+    def __init__(self, query):
+        self.query = query
+
+    @cached_property
+    def matches(self):
+        """Число совпадений, но не больше SEARCH_RESULTS_LIMIT + 1."""
+        if not self.query:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                COUNT_SQL, [self.query, settings.SEARCH_RESULTS_LIMIT + 1]
+            )
+            return cursor.fetchone()[0]
+
+    @property
+    def truncated(self):
+        """Совпадений больше, чем можно пролистать."""
+        return self.matches > settings.SEARCH_RESULTS_LIMIT
+
+    def count(self):
+        return min(self.matches, settings.SEARCH_RESULTS_LIMIT)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        stop = settings.SEARCH_RESULTS_LIMIT
+        if index.stop is not None:
+            stop = min(index.stop, stop)
+        if not self.query or stop <= start:
+            return []
+        # raw() приводит значения столбцов поста (дату) к типам модели
+        posts = Post.objects.raw(PAGE_SQL, [self.query, stop - start, start])
+        authors = {}
+        results = []
+        for post in posts:
+            author = authors.get(post.username)
+            if author is None:
+                author = authors[post.username] = AuthorRow(
+                    post.username, post.first_name, post.last_name
+                )
+            results.append(SearchRow(
+                post.pk, post.text, post.pub_date, author, post.snippet
+            ))
+        return results
+
+
+def search_posts(text):
+    """Результаты поиска по тексту (SearchResults).
+
+    У каждого поста есть атрибут snippet — фрагмент текста
+    с совпадениями между MATCH_START и MATCH_END.
+    """
+    return SearchResults(fts_query(text))
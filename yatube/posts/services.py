@@ -0,0 +1,109 @@
+"""Массовые операции с постами в обход Post.save().
+
+QuerySet.update() не отправляет сигналы модели, поэтому счётчики
+постов и кэши лент здесь обновляются явно.
+"""
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from posts.cache import bump_feed_versions
+from posts.counts import (
+    FEED_AUTHOR, FEED_GROUP, FEED_INDEX, feed_key, invalidate_feed_counts,
+    rebuild_post_counters
+)
+from posts.models import Group, GroupPostCounter, Post
+from posts.timeline import rebuild_timelines
+
+User = get_user_model()
+
+
+def move_posts_to_group(queryset, group):
+    """Переносит посты в группу group (None — без группы) одним UPDATE.
+
+    Возвращает количество перенесённых постов.
+    """
+    queryset = queryset.exclude(group=group).order_by()
+    with transaction.atomic():
+        moved = list(
+            queryset.values_list('group_id', 'group__slug')
+            .annotate(n=Count('pk'))
+        )
+        authors = list(
+            queryset.values_list('author__username', flat=True).distinct()
+        )
+        count = queryset.update(group=group)
+        feeds = [(FEED_INDEX, None)]
+        feeds += [(FEED_AUTHOR, username) for username in authors]
+        for group_id, slug, n in moved:
+            if group_id is not None:
+                GroupPostCounter.adjust(group_id, -n)
+                invalidate_feed_counts([feed_key(FEED_GROUP, group_id)])
+                feeds.append((FEED_GROUP, slug))
+        if group is not None and count:
+            GroupPostCounter.adjust(group.pk, count)
+            invalidate_feed_counts([feed_key(FEED_GROUP, group.pk)])
+            feeds.append((FEED_GROUP, group.slug))
+    bump_feed_versions(feeds)
+    return count
+
+
+@contextmanager
+def keep_pub_date():
+    """Отключает auto_now_add у Post.pub_date, чтобы bulk_create
+    сохранил заданные даты публикации.
+
+    Меняет поле модели для всего процесса, поэтому используется
+    только в командах управления, а не во view.
+    """
+    field = Post._meta.get_field('pub_date')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def bulk_create_posts(posts, batch_size=None):
+    """Создаёт посты пачками INSERT, сохраняя их pub_date.
+
+    Сигналы не отправляются: после всех вставок нужно вызвать
+    refresh_post_feeds().
+    """
+    now = timezone.now()
+    for post in posts:
+        if post.pub_date is None:
+            post.pub_date = now
+    with keep_pub_date():
+        Post.objects.bulk_create(posts, batch_size=batch_size)
+
+
+def refresh_post_feeds(author_ids=None, group_ids=None):
+    """Пересчитывает счётчики постов, дополняет ленты подписок
+    и сбрасывает кэш страниц общей ленты и лент авторов author_ids
+    и групп group_ids.
+
+    author_ids и group_ids — списки id или QuerySet,
+    None — все авторы и группы.
+    """
+    rebuild_post_counters()
+    rebuild_timelines()
+    authors = User.objects.all()
+    if author_ids is not None:
+        authors = authors.filter(pk__in=author_ids)
+    groups = Group.objects.all()
+    if group_ids is not None:
+        groups = groups.filter(pk__in=group_ids)
+    feeds = [(FEED_INDEX, None)]
+    feeds += [
+        (FEED_AUTHOR, username)
+        for username in authors.values_list('username', flat=True).iterator()
+    ]
+    feeds += [
+        (FEED_GROUP, slug)
+        for slug in groups.values_list('slug', flat=True).iterator()
+    ]
+    bump_feed_versions(feeds)
@@ -0,0 +1,163 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from posts.cache import bump_feed_versions
+from posts.lookups import authors, groups
+from posts.counts import (
+    FEED_AUTHOR, FEED_GROUP, FEED_INDEX, feed_key, invalidate_feed_counts,
+    post_feed_keys
+)
+from posts.models import (
+    AuthorPostCounter, Group, GroupPostCounter, Post, User
+)
+from posts.timeline import fan_out_post
+
+
+def adjust_post_counters(author_id, group_id, delta):
+    """Изменяет счётчики и сбрасывает кэш количеств лент с постом."""
+    AuthorPostCounter.adjust(author_id, delta)
+    if group_id is not None:
+        GroupPostCounter.adjust(group_id, delta)
+    invalidate_feed_counts(post_feed_keys(author_id, group_id))
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_feeds(sender, instance, **kwargs):
+    """Запоминает автора и группу поста до редактирования."""
+    instance._previous_feeds = None
+    if instance.pk is not None:
+        instance._previous_feeds = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('author_id', 'group_id')
+            .first()
+        )
+
+
+@receiver(post_save, sender=Post)
+def update_counts_on_save(sender, instance, created, **kwargs):
+    """Поддерживает количества постов при создании, смене автора
+    и смене группы."""
+    if created:
+        adjust_post_counters(instance.author_id, instance.group_id, 1)
+        return
+    author_id, group_id = instance._previous_feeds
+    if author_id != instance.author_id:
+        AuthorPostCounter.adjust(author_id, -1)
+        AuthorPostCounter.adjust(instance.author_id, 1)
+        invalidate_feed_counts([
+            feed_key(FEED_AUTHOR, author_id),
+            feed_key(FEED_AUTHOR, instance.author_id),
+        ])
+    if group_id != instance.group_id:
+        if group_id is not None:
+            GroupPostCounter.adjust(group_id, -1)
+            invalidate_feed_counts([feed_key(FEED_GROUP, group_id)])
+        if instance.group_id is not None:
+            GroupPostCounter.adjust(instance.group_id, 1)
+            invalidate_feed_counts([feed_key(FEED_GROUP, instance.group_id)])
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    """Добавляет новый пост в ленты подписок подписчиков автора."""
+    if created:
+        fan_out_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def update_counts_on_delete(sender, instance, **kwargs):
+    adjust_post_counters(instance.author_id, instance.group_id, -1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_feed_pages(sender, instance, **kwargs):
+    """Сбрасывает кэш страниц общей ленты, ленты группы
+    и ленты автора поста, а при переносе поста — и прежних."""
+    feeds = [(FEED_INDEX, None), (FEED_AUTHOR, instance.author.username)]
+    if instance.group_id is not None:
+        feeds.append((FEED_GROUP, instance.group.slug))
+    previous = getattr(instance, '_previous_feeds', None)
+    if previous is not None:
+        author_id, group_id = previous
+        if author_id != instance.author_id:
+            feeds += [
+                (FEED_AUTHOR, username) for username in
+                User.objects.filter(pk=author_id)
+                .values_list('username', flat=True)
+            ]
+        if group_id is not None and group_id != instance.group_id:
+            feeds += [
+                (FEED_GROUP, slug) for slug in
+                Group.objects.filter(pk=group_id)
+                .values_list('slug', flat=True)
+            ]
+    bump_feed_versions(feeds)
+
+
+@receiver(pre_save, sender=Group)
+def remember_previous_group(sender, instance, **kwargs):
+    """Запоминает slug и название группы до изменения."""
+    instance._previous_group = None
+    if instance.pk is not None:
+        instance._previous_group = (
+            Group.objects.filter(pk=instance.pk)
+            .values_list('slug', 'title')
+            .first()
+        )
+
+
+@receiver(post_save, sender=Group)
+def invalidate_group_pages(sender, instance, **kwargs):
+    """Название и описание группы показываются на её странице,
+    а slug и название — в постах группы во всех лентах."""
+    feeds = [(FEED_GROUP, instance.slug)]
+    previous = getattr(instance, '_previous_group', None)
+    if previous is not None and previous != (instance.slug, instance.title):
+        feeds += [(FEED_GROUP, previous[0]), (FEED_INDEX, None)]
+        feeds += [
+            (FEED_AUTHOR, username) for username in
+            User.objects.filter(posts__group=instance)
+            .values_list('username', flat=True).distinct()
+        ]
+    bump_feed_versions(feeds)
+
+
+@receiver(post_delete, sender=Group)
+def invalidate_pages_on_group_delete(sender, instance, **kwargs):
+    # Посты удалённой группы остаются в общей ленте без ссылки на неё
+    bump_feed_versions([(FEED_INDEX, None), (FEED_GROUP, instance.slug)])
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_pages(sender, instance, created, update_fields,
+                            **kwargs):
+    """Имя автора показывается в его постах во всех лентах."""
+    # Вход пользователя сохраняет только last_login
+    if created or (update_fields
+                   and set(update_fields) <= {'last_login', 'password'}):
+        return
+    feeds = [(FEED_INDEX, None), (FEED_AUTHOR, instance.username)]
+    feeds += [
+        (FEED_GROUP, slug) for slug in
+        Group.objects.filter(posts__author=instance)
+        .values_list('slug', flat=True).distinct()
+    ]
+    bump_feed_versions(feeds)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_lookup(sender, instance, **kwargs):
+    # pk — на случай смены slug
+    groups.invalidate([instance.slug], [instance.pk])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_author_lookup(sender, instance, update_fields=None,
+                             **kwargs):
+    # Вход пользователя и смена пароля не меняют страницу автора
+    if update_fields and set(update_fields) <= {'last_login', 'password'}:
+        return
+    authors.invalidate([instance.username], [instance.pk])
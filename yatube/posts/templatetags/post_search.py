@@ -0,0 +1,15 @@
+from django import template
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from posts.search import MATCH_END, MATCH_START
+
+register = template.Library()
+
+
+@register.filter
+def highlight(snippet):
+    """Экранирует фрагмент поиска и выделяет совпадения тегом mark."""
+    html = escape(snippet)
+    html = html.replace(MATCH_START, '<mark>').replace(MATCH_END, '</mark>')
+    return mark_safe(html)
@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, GroupPostCounter, Post
+
+User = get_user_model()
+
+
+class PostAdminTests(TestCase):
+    """Тест списка постов в админке"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin'
+        )
+        cls.groups = [
+            Group.objects.create(
+                title=f'Группа {index}',
+                slug=f'group_{index}',
+                description='Тестовое описание',
+            )
+            for index in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(PostAdminTests.admin)
+        self.url = reverse('admin:posts_post_changelist')
+
+    def create_posts(self, count, group):
+        for index in range(count):
+            Post.objects.create(
+                author=PostAdminTests.admin,
+                text=f'Текст поста {index}',
+                group=group,
+            )
+
+    def changelist_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in context.captured_queries]
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Количество запросов списка не зависит от числа строк."""
+        self.create_posts(2, PostAdminTests.groups[0])
+        # Первый запрос кладёт пользователя в кэш
+        self.changelist_queries()
+        few = len(self.changelist_queries())
+        self.create_posts(30, PostAdminTests.groups[1])
+        queries = self.changelist_queries()
+        self.assertEqual(len(queries), few)
+        group_queries = [
+            query for query in queries
+            if 'FROM "posts_group"' in query and 'JOIN' not in query
+        ]
+        # Варианты для всех строк и для формы действия
+        self.assertEqual(len(group_queries), 2)
+
+    def test_move_to_group_action(self):
+        """Действие переносит посты одним UPDATE и обновляет счётчики."""
+        source, target, _ = PostAdminTests.groups
+        self.create_posts(3, source)
+        self.create_posts(2, None)
+        pks = list(Post.objects.values_list('pk', flat=True))
+        with CaptureQueriesContext(connection) as context:
+            self.client.post(self.url, {
+                'action': 'move_to_group',
+                '_selected_action': pks,
+                'group': target.pk,
+            })
+        updates = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('UPDATE "posts_post"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(target.posts.count(), 5)
+        self.assertEqual(GroupPostCounter.value(source.pk), 0)
+        self.assertEqual(GroupPostCounter.value(target.pk), 5)
@@ -0,0 +1,103 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, Post
+from posts.services import bulk_create_posts
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    """Тест JSON API лент и постов"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='JuniorTester')
+        cls.other_user = User.objects.create_user(username='Другой')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_group',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group
+        )
+        bulk_create_posts([
+            Post(author=cls.other_user, text=f'Пост {index}')
+            for index in range(24)
+        ])
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def get_json(self, url, data=None, status=200):
+        response = self.guest_client.get(url, data)
+        self.assertEqual(response.status_code, status)
+        content = (
+            b''.join(response.streaming_content)
+            if response.streaming else response.content
+        )
+        return json.loads(content.decode())
+
+    def test_cursor_walks_whole_feed(self):
+        """Курсор next проходит ленту без пропусков и повторов."""
+        ids = []
+        params = {'limit': 10}
+        while True:
+            data = self.get_json(reverse('posts:api_index'), params)
+            ids += [row['id'] for row in data['results']]
+            if data['next'] is None:
+                break
+            params['cursor'] = data['next']
+        self.assertEqual(
+            ids, list(Post.objects.values_list('pk', flat=True))
+        )
+
+    def test_sparse_fields(self):
+        data = self.get_json(
+            reverse('posts:api_group_list', args=['test_group']),
+            {'fields': 'text,author'}
+        )
+        self.assertEqual(data, {
+            'results': [{'text': 'Тестовый пост', 'author': 'JuniorTester'}],
+            'next': None,
+        })
+        data = self.get_json(
+            reverse('posts:api_post_detail', args=[ApiTests.post.pk]),
+            {'fields': 'id,group'}
+        )
+        self.assertEqual(data, {'id': ApiTests.post.pk, 'group': 'test_group'})
+
+    def test_only_requested_columns_selected(self):
+        """В SQL выбираются только нужные поля и ключ курсора."""
+        url = reverse('posts:api_profile', args=['Другой'])
+        with CaptureQueriesContext(connection) as context:
+            data = self.get_json(url, {'fields': 'id'})
+        self.assertEqual(len(data['results']), 10)
+        sql = context.captured_queries[-1]['sql']
+        self.assertNotIn('"text"', sql)
+        self.assertNotIn('auth_user', sql)
+        self.assertEqual(len(context.captured_queries), 2)
+
+    def test_errors(self):
+        cases = (
+            (reverse('posts:api_index'), {'fields': 'password'}, 400),
+            (reverse('posts:api_index'), {'limit': 1000}, 400),
+            (reverse('posts:api_index'), {'cursor': 'broken'}, 400),
+            (reverse('posts:api_group_list', args=['none']), {}, 404),
+            (reverse('posts:api_profile', args=['none']), {}, 404),
+            (reverse('posts:api_post_detail', args=[0]), {}, 404),
+        )
+        for url, params, status in cases:
+            with self.subTest(url=url, params=params):
+                data = self.get_json(url, params, status)
+                self.assertIn('error', data)
+        response = self.guest_client.post(reverse('posts:api_index'))
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,112 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from django.db.models import Count
+from django.test import TestCase
+
+from core.benchmark import percentile
+from posts.counts import author_posts_count
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class GeneratePostsTests(TestCase):
+    """Тест команды generate_posts"""
+    def setUp(self):
+        cache.clear()
+
+    def test_generates_skewed_data(self):
+        call_command(
+            'generate_posts', users=20, groups=5, posts=500, skew=1.5,
+            batch_size=100, seed=1, stdout=StringIO()
+        )
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 5)
+        self.assertEqual(Post.objects.count(), 500)
+        # Самый активный автор пишет заметно больше среднего
+        top = (
+            Post.objects.order_by().values('author')
+            .annotate(n=Count('pk')).order_by('-n').first()
+        )
+        self.assertGreater(top['n'], 500 / 20 * 3)
+        # Заданные даты сохранены и идут по возрастанию pk
+        dates = list(Post.objects.order_by('pk')
+                     .values_list('pub_date', flat=True))
+        self.assertEqual(dates, sorted(dates))
+        self.assertLess(dates[0], dates[-1])
+        # Счётчики постов пересчитаны после bulk_create
+        author = User.objects.get(pk=top['author'])
+        self.assertEqual(author.post_counter.posts_count, top['n'])
+        self.assertEqual(author_posts_count(author), top['n'])
+
+
+class BenchmarkTests(TestCase):
+    """Тест команды benchmark"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='JuniorTester')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_group',
+            description='Тестовое описание',
+        )
+        Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        # Обработчик WSGI закрывает соединение с базой после запроса,
+        # а тест выполняется в транзакции, как и в тестовом клиенте
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        self.addCleanup(request_started.connect, close_old_connections)
+        self.addCleanup(request_finished.connect, close_old_connections)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+        self.assertIsNone(percentile([], 50))
+
+    def test_writes_results(self):
+        """Все страницы замерены, результаты записаны в JSON."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.json')
+            call_command(
+                'benchmark', repeat=3, warmup=0, output=path,
+                stdout=StringIO()
+            )
+            call_command(
+                'benchmark', repeat=1, warmup=0, compare=path,
+                stdout=StringIO()
+            )
+            with open(path, encoding='utf-8') as file:
+                report = json.load(file)
+        results = {
+            (row['name'], row['user']): row for row in report['results']
+        }
+        for name in ('posts:index', 'posts:search', 'users:login',
+                     'about:tech'):
+            for user in ('anonymous', 'user'):
+                with self.subTest(name=name, user=user):
+                    self.assertEqual(results[name, user]['status'], [200])
+        self.assertEqual(
+            results['posts:post_edit', 'user']['status'], [200]
+        )
+        self.assertNotIn(('users:logout', 'user'), results)
+        row = results['posts:index', 'anonymous']
+        self.assertLessEqual(row['p50_ms'], row['p99_ms'])
+        self.assertEqual(row['requests'], 3)
@@ -0,0 +1,277 @@
+import warnings
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.testing import other_process
+from posts.cache import feed_version_key
+from posts.counts import FEED_AUTHOR
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class FeedPageCacheTests(TestCase):
+    """Тест кэша страниц лент для анонимных посетителей"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='JuniorTester')
+        cls.other_user = User.objects.create_user(username='OtherTester')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_group',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Вторая группа',
+            slug='other_group',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group
+        )
+        cls.urls = {
+            'index': reverse('posts:index'),
+            'group': reverse('posts:group_list', args=[cls.group.slug]),
+            'other_group': reverse(
+                'posts:group_list', args=[cls.other_group.slug]
+            ),
+            'author': reverse('posts:profile', args=[cls.user.username]),
+            'other_author': reverse(
+                'posts:profile', args=[cls.other_user.username]
+            ),
+        }
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(FeedPageCacheTests.user)
+
+    def warm_up(self):
+        for url in self.urls.values():
+            self.guest_client.get(url)
+
+    def cached(self):
+        """Имена лент, страницы которых отдаются из кэша без запросов."""
+        cached = set()
+        for name, url in self.urls.items():
+            response = self.guest_client.get(url)
+            if response.context is None:
+                cached.add(name)
+        return cached
+
+    def test_anonymous_pages_are_cached(self):
+        """Повторный запрос анонима отдаётся из кэша без запросов к БД."""
+        self.warm_up()
+        for url in self.urls.values():
+            with self.subTest(url=url):
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+        # Номер страницы входит в ключ кэша
+        response = self.guest_client.get(self.urls['index'], {'page': 2})
+        self.assertIsNotNone(response.context)
+
+    def test_pages_shared_between_processes(self):
+        """Страницу, сохранённую одним процессом, отдают и другие,
+        а новый пост сбрасывает её во всех."""
+        self.warm_up()
+        with other_process():
+            self.assertEqual(self.cached(), set(self.urls))
+        Post.objects.create(
+            author=FeedPageCacheTests.user,
+            text='Новый пост',
+            group=FeedPageCacheTests.group
+        )
+        with other_process():
+            self.assertEqual(self.cached(), {'other_group', 'other_author'})
+
+    def test_authorized_pages_are_not_cached(self):
+        self.warm_up()
+        response = self.authorized_client.get(self.urls['index'])
+        self.assertIsNotNone(response.context)
+        self.assertContains(response, FeedPageCacheTests.user.username)
+
+    def test_new_post_invalidates_only_its_feeds(self):
+        """Новый пост сбрасывает общую ленту, ленту группы и автора."""
+        self.warm_up()
+        Post.objects.create(
+            author=FeedPageCacheTests.user,
+            text='Новый пост',
+            group=FeedPageCacheTests.group
+        )
+        self.assertEqual(self.cached(), {'other_group', 'other_author'})
+        response = self.guest_client.get(self.urls['group'])
+        self.assertContains(response, 'Новый пост')
+
+    def test_moved_post_invalidates_previous_group(self):
+        """Перенос поста сбрасывает ленты прежней и новой группы."""
+        self.warm_up()
+        post = Post.objects.get(pk=FeedPageCacheTests.post.pk)
+        post.group = FeedPageCacheTests.other_group
+        post.save()
+        self.assertEqual(self.cached(), {'other_author'})
+
+    def test_deleted_post_invalidates_its_feeds(self):
+        self.warm_up()
+        Post.objects.get(pk=FeedPageCacheTests.post.pk).delete()
+        self.assertEqual(self.cached(), {'other_group', 'other_author'})
+        response = self.guest_client.get(self.urls['index'])
+        self.assertNotContains(response, 'Тестовый пост')
+
+    def test_feed_keys_safe_for_memcached(self):
+        """Имя пользователя не попадает в ключи кэша как есть."""
+        username = 'Ё' * 150
+        User.objects.create_user(username=username)
+        key = feed_version_key(FEED_AUTHOR, username)
+        self.assertTrue(key.isascii())
+        self.assertLessEqual(len(key), 250)
+        url = reverse('posts:profile', args=[username])
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', CacheKeyWarning)
+            for _ in range(2):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+
+class ConditionalGetTests(TestCase):
+    """Тест условного GET (ETag) лент и страницы поста"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='JuniorTester')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_group',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ConditionalGetTests.user)
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=['test_group']),
+            reverse('posts:profile', args=['JuniorTester']),
+            reverse('posts:post_detail', args=[ConditionalGetTests.post.pk]),
+        )
+
+    def revalidate(self, client, url):
+        etag = client.get(url)['ETag']
+        return client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_not_modified_without_page_queries(self):
+        """Повторный запрос с ETag получает 304 без запроса страницы."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                # Ленты не обращаются к базе, пост - одним запросом
+                queries = 1 if 'posts/' in url else 0
+                with self.assertNumQueries(queries):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(response.status_code, 304)
+
+    def test_group_rename_invalidates_all_feeds(self):
+        """Новые slug и название группы видны во всех лентах с её
+        постами, в том числе в другом процессе."""
+        with other_process():
+            etags = {url: self.guest_client.get(url)['ETag']
+                     for url in self.urls}
+        group = Group.objects.get(pk=ConditionalGetTests.group.pk)
+        group.slug = 'renamed_group'
+        group.title = 'Новое название'
+        group.save()
+        urls = dict(etags)
+        # Страница группы теперь по новому адресу
+        del urls[reverse('posts:group_list', args=['test_group'])]
+        with other_process():
+            for url in urls:
+                with self.subTest(url=url):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=etags[url]
+                    )
+                    self.assertEqual(response.status_code, 200)
+                    self.assertContains(response, 'renamed_group')
+                    self.assertContains(response, 'Новое название')
+                    self.assertNotContains(response, 'test_group')
+        # Страница по прежнему slug не отдаётся из кэша
+        response = self.guest_client.get(
+            reverse('posts:group_list', args=['test_group'])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_change_in_other_process_invalidates_etag(self):
+        """Правка поста в одном процессе меняет ETag в другом."""
+        with other_process():
+            etags = {url: self.guest_client.get(url)['ETag']
+                     for url in self.urls}
+        post = Post.objects.get(pk=ConditionalGetTests.post.pk)
+        post.text = 'Изменённый пост'
+        post.save()
+        with other_process():
+            for url, etag in etags.items():
+                with self.subTest(url=url):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    )
+                    self.assertEqual(response.status_code, 200)
+
+    def test_changes_invalidate_etag(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                post = Post.objects.get(pk=ConditionalGetTests.post.pk)
+                post.text = f'Изменённый пост {url}'
+                post.save()
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, post.text)
+
+    def test_author_name_change_invalidates_etag(self):
+        url = reverse('posts:index')
+        etag = self.guest_client.get(url)['ETag']
+        user = User.objects.get(pk=ConditionalGetTests.user.pk)
+        user.first_name = 'Иван'
+        user.save()
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Иван')
+
+    def test_etag_depends_on_visitor_and_page(self):
+        url = reverse('posts:index')
+        guest_etag = self.guest_client.get(url)['ETag']
+        self.assertNotEqual(
+            self.authorized_client.get(url)['ETag'], guest_etag
+        )
+        self.assertNotEqual(
+            self.guest_client.get(url, {'page': 2})['ETag'], guest_etag
+        )
+        response = self.authorized_client.get(
+            url, HTTP_IF_NONE_MATCH=guest_etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_pages_have_no_etag(self):
+        for url in (reverse('posts:group_list', args=['none']),
+                    reverse('posts:post_detail', args=[0])):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 404)
+                self.assertFalse(response.has_header('ETag'))
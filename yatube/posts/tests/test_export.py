@@ -0,0 +1,100 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post
+from posts.services import bulk_create_posts
+
+User = get_user_model()
+
+
+@override_settings(EXPORT_CHUNK_SIZE=7)
+class ExportTests(TestCase):
+    """Тест выгрузки постов автора и группы"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='JuniorTester')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_group',
+            description='Тестовое описание',
+        )
+        bulk_create_posts([
+            Post(
+                author=cls.user,
+                text=f'Пост {index}, "в кавычках"\nи с переводом строки',
+                group=cls.group if index % 2 else None
+            )
+            for index in range(30)
+        ])
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ExportTests.user)
+
+    def test_profile_csv(self):
+        """CSV содержит все посты автора в порядке ленты."""
+        response = self.authorized_client.get(
+            reverse('posts:profile_export', args=['JuniorTester'])
+        )
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment', response['Content-Disposition'])
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(
+            [int(row['id']) for row in rows],
+            list(ExportTests.user.posts.values_list('pk', flat=True))
+        )
+        self.assertEqual(rows[0]['author'], 'JuniorTester')
+        self.assertIn('"в кавычках"', rows[0]['text'])
+
+    def test_group_ndjson_gzip(self):
+        """Выгрузка сжимается, если клиент принимает gzip."""
+        response = self.authorized_client.get(
+            reverse('posts:group_export', args=['test_group']),
+            {'format': 'ndjson'},
+            HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        content = gzip.decompress(b''.join(response.streaming_content))
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual(len(rows), 15)
+        self.assertTrue(all(row['group'] == 'test_group' for row in rows))
+
+    def test_access(self):
+        url = reverse('posts:profile_export', args=['JuniorTester'])
+        response = self.guest_client.get(url)
+        self.assertRedirects(response, f'/auth/login/?next={url}')
+        response = self.authorized_client.get(url, {'format': 'xml'})
+        self.assertEqual(response.status_code, 404)
+        response = self.authorized_client.get(
+            reverse('posts:group_export', args=['none'])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_command(self):
+        output = io.StringIO()
+        call_command(
+            'export_posts', '--author=JuniorTester', format='ndjson',
+            stdout=output
+        )
+        self.assertEqual(len(output.getvalue().splitlines()), 30)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'posts.csv.gz')
+            call_command(
+                'export_posts', '--group=test_group', output=path, gzip=True
+            )
+            with gzip.open(path, 'rt', encoding='utf-8') as file:
+                self.assertEqual(len(list(csv.reader(file))), 16)
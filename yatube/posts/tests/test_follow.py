@@ -0,0 +1,150 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.explain import SORT_STEP, explain_query_plan
+from posts.models import Follow, Post, TimelineEntry
+from posts.services import bulk_create_posts, refresh_post_feeds
+from posts.timeline import follow, unfollow
+
+User = get_user_model()
+
+
+class FollowTests(TestCase):
+    """Тест подписок и ленты подписок"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='JuniorTester')
+        cls.author = User.objects.create_user(username='Author')
+        cls.other_author = User.objects.create_user(username='OtherAuthor')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(FollowTests.user)
+
+    def feed(self, client=None, cursor=None):
+        client = client or self.authorized_client
+        response = client.get(
+            reverse('posts:follow_index'), {'cursor': cursor or ''}
+        )
+        return response.context['page_obj']
+
+    def walk_feed(self, client=None):
+        """Тексты всех постов ленты подписок по страницам."""
+        texts = []
+        page = self.feed(client)
+        while True:
+            texts += [post.text for post in page]
+            if not page.has_next():
+                return texts
+            page = self.feed(client, page.next_cursor)
+
+    def test_follow_and_unfollow(self):
+        profile = reverse('posts:profile', args=['Author'])
+        response = self.authorized_client.get(
+            reverse('posts:profile_follow', args=['Author'])
+        )
+        self.assertRedirects(response, profile)
+        self.assertTrue(Follow.objects.filter(
+            user=FollowTests.user, author=FollowTests.author
+        ).exists())
+        self.assertTrue(self.authorized_client.get(profile).context[
+            'following'
+        ])
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', args=['Author'])
+        )
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(self.authorized_client.get(profile).context[
+            'following'
+        ])
+
+    def test_cannot_follow_self_or_twice(self):
+        self.assertFalse(follow(FollowTests.user, FollowTests.user))
+        self.assertTrue(follow(FollowTests.user, FollowTests.author))
+        self.assertFalse(follow(FollowTests.user, FollowTests.author))
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_new_post_fans_out_to_followers(self):
+        follow(FollowTests.user, FollowTests.author)
+        Post.objects.create(author=FollowTests.author, text='Для подписчиков')
+        Post.objects.create(author=FollowTests.other_author, text='Чужой')
+        self.assertEqual(self.walk_feed(), ['Для подписчиков'])
+        unfollow(FollowTests.user, FollowTests.author)
+        self.assertEqual(self.walk_feed(), [])
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    def test_follow_backfills_recent_posts(self):
+        bulk_create_posts([
+            Post(author=FollowTests.author, text=f'Пост {index}')
+            for index in range(settings.TIMELINE_BACKFILL + 5)
+        ])
+        follow(FollowTests.user, FollowTests.author)
+        self.assertEqual(
+            TimelineEntry.objects.count(), settings.TIMELINE_BACKFILL
+        )
+
+    def test_feed_page_reads_timeline_index(self):
+        follow(FollowTests.user, FollowTests.author)
+        bulk_create_posts([
+            Post(author=FollowTests.author, text=f'Пост {index}')
+            for index in range(30)
+        ])
+        refresh_post_feeds()
+        # Сессия и пользователь берутся из кэша:
+        # страница ленты и подписки pull
+        cursor = self.feed().next_cursor
+        with CaptureQueriesContext(connection) as context:
+            page = self.feed(cursor=cursor)
+        self.assertEqual(len(page), settings.OBJECTS_ON_THE_PAGE)
+        queries = context.captured_queries
+        self.assertEqual(len(queries), 2)
+        plan = ' | '.join(explain_query_plan(queries[0]['sql']))
+        self.assertIn('timeline_feed_idx', plan)
+        self.assertNotIn(SORT_STEP, plan)
+        self.assertEqual(len(self.walk_feed()), 30)
+
+    @override_settings(FOLLOW_FANOUT_LIMIT=1)
+    def test_popular_author_is_pulled(self):
+        """Посты популярного автора читаются из его ленты."""
+        other_client = Client()
+        other_client.force_login(FollowTests.other_author)
+        Post.objects.create(author=FollowTests.author, text='Старый')
+        follow(FollowTests.user, FollowTests.author)
+        follow(FollowTests.other_author, FollowTests.author)
+        self.assertFalse(
+            Follow.objects.filter(author=FollowTests.author, pull=False)
+            .exists()
+        )
+        for index in range(12):
+            Post.objects.create(
+                author=FollowTests.author, text=f'Новый {index}'
+            )
+        # Новые посты не раскладывались, старый пост не повторяется
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=FollowTests.user).count(), 1
+        )
+        texts = self.walk_feed()
+        self.assertEqual(len(texts), 13)
+        self.assertEqual(texts[-1], 'Старый')
+        self.assertEqual(self.walk_feed(other_client), texts)
+        # Автор снова непопулярен: ленты дополнены его постами
+        unfollow(FollowTests.other_author, FollowTests.author)
+        self.assertFalse(Follow.objects.filter(pull=True).exists())
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=FollowTests.user).count(), 13
+        )
+        self.assertEqual(self.walk_feed(), texts)
+
+    def test_guest_redirected(self):
+        for url in (reverse('posts:follow_index'),
+                    reverse('posts:profile_follow', args=['Author'])):
+            with self.subTest(url=url):
+                response = Client().get(url)
+                self.assertRedirects(response, f'/auth/login/?next={url}')
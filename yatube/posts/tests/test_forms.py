@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
 
@@ -22,6 +23,8 @@ class CreatePageTest(TestCase):
         cls.user = User.objects.create_user(username='JuniorTester')
 
     def setUp(self):
+        # Кэш лент переживает откат транзакции теста
+        cache.clear()
         # Создаем авторизованный клиент
         self.authorized_client = Client()
         self.authorized_client.force_login(CreatePageTest.user)
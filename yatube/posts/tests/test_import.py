@@ -0,0 +1,199 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+
+from posts.counts import author_posts_count
+from posts.management.commands.import_posts import Command
+from posts.models import Group, ImportCheckpoint, Post
+from posts.search import search_posts
+
+User = get_user_model()
+
+
+class ImportPostsTests(TestCase):
+    """Тест команды import_posts"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='JuniorTester')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_group',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, name, lines):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines) + '\n')
+        return path
+
+    def ndjson(self, count, author='JuniorTester', group='test_group'):
+        return [
+            json.dumps({
+                'author': author,
+                'group': group,
+                'pub_date': f'2020-01-{index + 1:02d}T10:00:00+00:00',
+                'text': f'Пост {index}',
+            })
+            for index in range(count)
+        ]
+
+    def test_ndjson_keeps_pub_date(self):
+        path = self.write('posts.ndjson', self.ndjson(5))
+        call_command('import_posts', path, batch_size=2, stdout=StringIO())
+        posts = Post.objects.order_by('pub_date')
+        self.assertEqual(posts.count(), 5)
+        self.assertEqual(
+            posts[0].pub_date, datetime(2020, 1, 1, 10, tzinfo=timezone.utc)
+        )
+        self.assertEqual(
+            author_posts_count(ImportPostsTests.user), 5
+        )
+
+    def test_csv_creates_authors_and_groups(self):
+        path = self.write('posts.csv', [
+            'author,group,pub_date,text',
+            'Новичок,new_group,2021-05-01 12:00:00,"Текст, с запятой"',
+            'Новичок,,,Без группы и даты',
+        ])
+        call_command(
+            'import_posts', path, create_authors=True, create_groups=True,
+            stdout=StringIO()
+        )
+        author = User.objects.get(username='Новичок')
+        self.assertFalse(author.has_usable_password())
+        self.assertEqual(author.posts.count(), 2)
+        self.assertTrue(Group.objects.filter(slug='new_group').exists())
+        self.assertTrue(
+            Post.objects.filter(text='Текст, с запятой').exists()
+        )
+
+    def test_invalid_rows_skipped(self):
+        path = self.write('posts.ndjson', self.ndjson(2) + [
+            '{broken',
+            json.dumps({'author': 'nobody', 'text': 'Пост'}),
+            json.dumps({'author': 'JuniorTester', 'text': ''}),
+            json.dumps({'author': 'JuniorTester', 'group': 'nogroup',
+                        'text': 'Пост'}),
+        ])
+        output = StringIO()
+        call_command('import_posts', path, stdout=output)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertIn('пропущено строк: 4', output.getvalue())
+
+    def test_resume_from_checkpoint(self):
+        """Продолжение начинается со смещения контрольной точки
+        и не разбирает строки до неё."""
+        lines = self.ndjson(10)
+        path = self.write('posts.ndjson', lines)
+        call_command(
+            'import_posts', path, transaction_size=4, stdout=StringIO()
+        )
+        checkpoint = ImportCheckpoint.objects.get(
+            source=os.path.abspath(path)
+        )
+        self.assertEqual(checkpoint.rows, 10)
+        self.assertEqual(checkpoint.offset, os.path.getsize(path))
+        Post.objects.filter(text__in=['Пост 8', 'Пост 9']).delete()
+        # Загрузка оборвалась после второй транзакции; загруженные
+        # строки больше не разбираются
+        offset = sum(len(line.encode()) + 1 for line in lines[:8])
+        checkpoint.rows, checkpoint.offset = 8, offset
+        checkpoint.save()
+        with open(path, 'r+b') as file:
+            file.write(b'{broken')
+        output = StringIO()
+        call_command('import_posts', path, resume=True, stdout=output)
+        self.assertEqual(Post.objects.count(), 10)
+        self.assertIn('пропущено строк: 0', output.getvalue())
+        self.assertEqual(
+            Post.objects.filter(text='Пост 0').count(), 1
+        )
+
+    def test_resume_csv(self):
+        lines = [
+            'author,group,pub_date,text',
+            'JuniorTester,,,"Первый,\nв две строки"',
+            'JuniorTester,,,Второй',
+        ]
+        path = self.write('posts.csv', lines)
+        ImportCheckpoint.objects.create(
+            source=os.path.abspath(path), rows=1,
+            offset=len('\n'.join(lines[:2]).encode()) + 1
+        )
+        call_command('import_posts', path, resume=True, stdout=StringIO())
+        self.assertEqual(
+            list(Post.objects.values_list('text', flat=True)), ['Второй']
+        )
+        call_command('import_posts', path, stdout=StringIO())
+        self.assertTrue(
+            Post.objects.filter(text='Первый,\nв две строки').exists()
+        )
+
+
+class DeferredSearchIndexTests(TransactionTestCase):
+    """Тест import_posts --defer-search-index"""
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(username='JuniorTester')
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'posts.ndjson')
+        with open(self.path, 'w', encoding='utf-8') as file:
+            for index in range(4):
+                file.write(json.dumps({
+                    'author': 'JuniorTester', 'text': f'Сосна {index}'
+                }) + '\n')
+
+    def test_index_rebuilt(self):
+        call_command(
+            'import_posts', self.path, defer_search_index=True,
+            stdout=StringIO()
+        )
+        self.assertEqual(len(search_posts('Сосна')), 4)
+
+    def test_index_restored_after_error(self):
+        """Индекс и триггеры возвращаются, даже если загрузка упала."""
+        load = Command.load
+        calls = []
+
+        def failing_load(command, records, options, checkpoint):
+            calls.append(records)
+            # Индекс не удалён: поиск работает, а новые посты
+            # попадут в него после перестройки
+            self.assertEqual(len(search_posts('Сосна')), 0)
+            if len(calls) > 1:
+                raise RuntimeError('обрыв загрузки')
+            return load(command, records, options, checkpoint)
+
+        with mock.patch.object(Command, 'load', failing_load):
+            with self.assertRaises(RuntimeError):
+                call_command(
+                    'import_posts', self.path, defer_search_index=True,
+                    transaction_size=2, stdout=StringIO()
+                )
+        # Первая транзакция зафиксирована вместе с контрольной точкой
+        # и попала в индекс
+        self.assertEqual(len(search_posts('Сосна')), 2)
+        self.assertEqual(ImportCheckpoint.objects.get().rows, 2)
+        # Триггеры снова индексируют новые посты
+        Post.objects.create(
+            author=User.objects.get(username='JuniorTester'),
+            text='Одинокая сосна'
+        )
+        self.assertEqual(len(search_posts('Сосна')), 3)
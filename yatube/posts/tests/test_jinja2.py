@@ -0,0 +1,132 @@
+import re
+from io import StringIO
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.template import engines
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post
+from posts.services import bulk_create_posts
+
+User = get_user_model()
+
+COMMENT = re.compile(r'<!--.*?-->', re.S)
+CSRF = re.compile(r'name="csrfmiddlewaretoken" value="[^"]+"')
+SPACES = re.compile(r'\s+')
+TAG_SPACES = re.compile(r'>\s+<')
+
+
+def normalize(html):
+    """HTML без комментариев, токена CSRF и разницы в пробелах."""
+    html = COMMENT.sub('', html)
+    html = CSRF.sub('name="csrfmiddlewaretoken"', html)
+    html = TAG_SPACES.sub('><', SPACES.sub(' ', html))
+    return html.strip()
+
+
+@skipUnless('jinja2' in engines.templates, 'Jinja2 не установлен')
+@override_settings(FEED_PAGE_CACHE_TIMEOUT=0)
+class Jinja2TemplatesTests(TestCase):
+    """Тест равнозначности шаблонов Jinja2 шаблонам Django"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='JuniorTester', first_name='Иван', last_name='<Тест>'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая <группа>',
+            slug='test_group',
+            description='Тестовое описание & подробности',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый <b>пост</b>',
+            group=cls.group
+        )
+        bulk_create_posts([
+            Post(author=cls.user, text=f'Пост {index}', group=cls.group)
+            for index in range(settings.OBJECTS_ON_THE_PAGE * 3)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(Jinja2TemplatesTests.user)
+
+    def render_both(self, client, url, template, data=None):
+        """Страница url, отрисованная Django и Jinja2."""
+        pages = []
+        for names in ((), (template,)):
+            with override_settings(JINJA2_TEMPLATES=names):
+                cache.clear()
+                response = client.get(url, data)
+                self.assertEqual(response.status_code, 200)
+                pages.append(normalize(response.content.decode()))
+        return pages
+
+    def test_templates_are_equivalent(self):
+        post = Jinja2TemplatesTests.post
+        pages = (
+            (reverse('posts:index'), 'posts/index.html', {'page': 2}),
+            (reverse('posts:group_list', args=['test_group']),
+             'posts/group_list.html', None),
+            (reverse('posts:profile', args=['JuniorTester']),
+             'posts/profile.html', {'page': 4}),
+            (reverse('posts:post_detail', args=[post.pk]),
+             'posts/post_detail.html', None),
+            (reverse('posts:search'), 'posts/search.html', {'q': 'пост'}),
+        )
+        for client in (self.guest_client, self.authorized_client):
+            for url, template, data in pages:
+                with self.subTest(url=url, data=data):
+                    django_html, jinja2_html = self.render_both(
+                        client, url, template, data
+                    )
+                    self.assertEqual(jinja2_html, django_html)
+
+    def test_authorized_templates_are_equivalent(self):
+        post = Jinja2TemplatesTests.post
+        pages = (
+            (reverse('posts:follow_index'), 'posts/follow.html', None),
+            (reverse('posts:post_create'), 'posts/create_post.html', None),
+            (reverse('posts:post_edit', args=[post.pk]),
+             'posts/create_post.html', None),
+        )
+        for url, template, data in pages:
+            with self.subTest(url=url):
+                django_html, jinja2_html = self.render_both(
+                    self.authorized_client, url, template, data
+                )
+                self.assertEqual(jinja2_html, django_html)
+
+    def test_cursor_paginator_is_equivalent(self):
+        with override_settings(PAGINATION_MODE='cursor'):
+            django_html, jinja2_html = self.render_both(
+                self.guest_client, reverse('posts:index'), 'posts/index.html'
+            )
+        self.assertEqual(jinja2_html, django_html)
+
+    def test_form_errors_are_equivalent(self):
+        pages = []
+        for names in ((), ('posts/create_post.html',)):
+            with override_settings(JINJA2_TEMPLATES=names):
+                response = self.authorized_client.post(
+                    reverse('posts:post_create'), {'text': ''}
+                )
+                pages.append(normalize(response.content.decode()))
+        self.assertIn('alert-danger', pages[0])
+        self.assertEqual(pages[1], pages[0])
+
+    def test_benchmark_templates_command(self):
+        out = StringIO()
+        call_command('benchmark_templates', repeat=2, warmup=0, stdout=out)
+        output = out.getvalue()
+        for template in ('posts/index.html', 'posts/post_detail.html'):
+            self.assertIn(template, output)
@@ -0,0 +1,180 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.caches import bump_version, shared_cache
+from core.lookups import BloomFilter
+from posts.lookups import authors, groups
+from posts.models import Group
+
+User = get_user_model()
+
+
+class LookupCacheTests(TestCase):
+    """Тест кэша поиска групп и авторов в памяти процесса"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='JuniorTester')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_group',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        authors.clear()
+        groups.clear()
+        self.guest_client = Client()
+
+    def test_found_objects_cached(self):
+        author = authors.get('JuniorTester')
+        self.assertEqual(author, LookupCacheTests.user)
+        with self.assertNumQueries(0):
+            cached = authors.get('JuniorTester')
+        self.assertEqual(cached.username, 'JuniorTester')
+        # Каждый раз новый объект
+        self.assertIsNot(cached, author)
+        cached.first_name = 'Изменено'
+        self.assertEqual(authors.get('JuniorTester').first_name, '')
+
+    def test_missing_values_rejected_by_bloom_filter(self):
+        """После первого промаха несуществующие адреса не доходят
+        до базы."""
+        url = reverse('posts:group_list', args=['missing'])
+        self.assertEqual(self.guest_client.get(url).status_code, 404)
+        for slug in ('other', 'one-more', 'wp-admin'):
+            with self.subTest(slug=slug):
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(
+                        reverse('posts:group_list', args=[slug])
+                    )
+                self.assertEqual(response.status_code, 404)
+        self.assertIsNotNone(groups.get('test_group'))
+
+    def test_signup_makes_profile_visible(self):
+        url = reverse('posts:profile', args=['newbie'])
+        self.assertEqual(self.guest_client.get(url).status_code, 404)
+        self.guest_client.post(reverse('users:signup'), {
+            'username': 'newbie',
+            'password1': 'Sup3r-secret-pass',
+            'password2': 'Sup3r-secret-pass',
+        })
+        self.assertTrue(User.objects.filter(username='newbie').exists())
+        self.assertEqual(self.guest_client.get(url).status_code, 200)
+
+    def test_group_changes_invalidate(self):
+        self.assertIsNotNone(groups.get('test_group'))
+        group = Group.objects.get(slug='test_group')
+        group.slug = 'renamed'
+        group.save()
+        self.assertIsNone(groups.get('test_group'))
+        self.assertEqual(groups.get('renamed').pk, group.pk)
+        group.delete()
+        self.assertIsNone(groups.get('renamed'))
+
+    def test_change_in_other_process(self):
+        """Изменение в другом процессе видно по версии в общем кэше."""
+        self.assertEqual(authors.get('JuniorTester').first_name, '')
+        User.objects.filter(username='JuniorTester').update(
+            first_name='Иван'
+        )
+        self.assertEqual(authors.get('JuniorTester').first_name, '')
+        bump_version(authors.version_key)
+        self.assertEqual(authors.get('JuniorTester').first_name, 'Иван')
+
+    def test_change_in_other_process_applied_incrementally(self):
+        """Изменение из другого процесса не сбрасывает весь кэш."""
+        self.assertIsNone(groups.get('missing'))
+        self.assertIsNotNone(groups.get('test_group'))
+        # Другой процесс создал группу и сообщил о новом значении
+        Group.objects.bulk_create([
+            Group(title='Новая', slug='fresh', description='')
+        ])
+        version = bump_version(groups.version_key)
+        shared_cache().set(groups.change_key(version), ({'fresh'}, set()))
+        with self.assertNumQueries(0):
+            self.assertIsNotNone(groups.get('test_group'))
+            self.assertIsNone(groups.get('other'))
+        with self.assertNumQueries(1):
+            self.assertEqual(groups.get('fresh').slug, 'fresh')
+
+    def test_bloom_filter_built_without_lock(self):
+        build_bloom = groups.build_bloom
+
+        def check_unlocked():
+            self.assertFalse(groups.lock.locked())
+            return build_bloom()
+
+        with mock.patch.object(groups, 'build_bloom', check_unlocked):
+            self.assertIsNone(groups.get('missing'))
+        self.assertIsNotNone(groups.bloom)
+        self.assertIsNone(groups.pending)
+
+    def test_stale_load_not_cached(self):
+        """Прочитанное до сброса не записывается в кэш после него."""
+        load = groups.load
+
+        def load_then_create(value, using=None):
+            row = load(value, using)
+            # Группа создана, пока шёл запрос к базе
+            Group.objects.create(title=value, slug=value, description='')
+            return row
+
+        with mock.patch.object(groups, 'load', load_then_create):
+            self.assertIsNone(groups.get('new_group'))
+        self.assertNotIn('new_group', groups.entries)
+        self.assertEqual(groups.get('new_group').slug, 'new_group')
+
+    def test_replica_miss_checked_on_primary(self):
+        load = groups.load
+        calls = []
+
+        def lagging_replica(value, using=None):
+            calls.append(using)
+            if using is None:
+                return 'replica', None
+            return load(value, using)
+
+        with mock.patch.object(groups, 'load', lagging_replica):
+            group = groups.get('test_group')
+        self.assertEqual(calls, [None, 'default'])
+        self.assertEqual(group.pk, LookupCacheTests.group.pk)
+        self.assertEqual(groups.entries['test_group'][1][0], 'default')
+
+    def test_login_keeps_cache(self):
+        authors.get('JuniorTester')
+        self.guest_client.force_login(LookupCacheTests.user)
+        with self.assertNumQueries(0):
+            authors.get('JuniorTester')
+
+    @override_settings(LOOKUP_CACHE_SIZE=2)
+    def test_least_recently_used_evicted(self):
+        for slug in ('a', 'b'):
+            Group.objects.create(title=slug, slug=slug, description='')
+        for slug in ('test_group', 'a', 'test_group', 'b'):
+            groups.get(slug)
+        self.assertEqual(list(groups.entries), ['test_group', 'b'])
+
+    @override_settings(LOOKUP_CACHE_TIMEOUT=0)
+    def test_disabled(self):
+        groups.get('test_group')
+        with self.assertNumQueries(1):
+            groups.get('test_group')
+
+    def test_bloom_filter(self):
+        bloom = BloomFilter(1000, 0.01)
+        for index in range(1000):
+            bloom.add(f'user{index}')
+        self.assertTrue(all(f'user{index}' in bloom for index in range(1000)))
+        false_positives = sum(
+            f'other{index}' in bloom for index in range(10000)
+        )
+        self.assertLess(false_positives, 300)
+        self.assertFalse(bloom.full)
+        bloom.add('one-more')
+        self.assertTrue(bloom.full)
@@ -0,0 +1,212 @@
+import multiprocessing
+import os
+import re
+import tempfile
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.metrics import (
+    SERVER_FILE, MmapedDict, inc, mark_process_dead, prepare_metrics_dir,
+    process_alive, read_file,
+)
+
+
+def inc_in_child(amount):
+    inc('yatube_http_requests_total', {'view': 'child'}, amount)
+
+
+class MetricsTests(TestCase):
+    """Тест метрик запросов"""
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            METRICS_DIR=self.directory.name
+        )
+        self.settings_override.enable()
+        self.client = Client()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.directory.cleanup()
+
+    def metrics(self):
+        response = self.client.get(reverse('core:metrics'))
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def sample(self, text, name, **labels):
+        """Значение метрики name с метками labels (le — последняя)."""
+        label_text = ','.join(
+            f'{label}="{value}"' for label, value in sorted(
+                labels.items(), key=lambda item: (item[0] == 'le', item[0])
+            )
+        )
+        match = re.search(
+            rf'^{re.escape(name)}\{{{re.escape(label_text)}\}} (\S+)$',
+            text, re.M
+        )
+        return float(match.group(1)) if match else None
+
+    def test_requests_recorded_by_view_name(self):
+        for _ in range(2):
+            self.client.get(reverse('posts:index'))
+        self.client.get('/missing-page/')
+        text = self.metrics()
+        labels = {'view': 'posts:index', 'status': '200'}
+        self.assertEqual(self.sample(
+            text, 'yatube_http_requests_total', method='GET', **labels
+        ), 2)
+        self.assertEqual(self.sample(
+            text, 'yatube_http_request_duration_seconds_count', **labels
+        ), 2)
+        self.assertEqual(self.sample(
+            text, 'yatube_http_request_duration_seconds_bucket',
+            le='+Inf', **labels
+        ), 2)
+        self.assertGreater(self.sample(
+            text, 'yatube_http_response_size_bytes_sum', **labels
+        ), 0)
+        self.assertIsNotNone(self.sample(
+            text, 'yatube_http_request_queries_count', **labels
+        ))
+        self.assertEqual(self.sample(
+            text, 'yatube_http_requests_in_flight', view='posts:index'
+        ), 0)
+        self.assertEqual(self.sample(
+            text, 'yatube_http_requests_total',
+            method='GET', view='unresolved', status='404'
+        ), 1)
+        self.assertIn(
+            '# TYPE yatube_http_request_duration_seconds histogram', text
+        )
+
+    def test_processes_aggregated(self):
+        inc_in_child(1)
+        context = multiprocessing.get_context('fork')
+        for amount in (2, 3):
+            process = context.Process(target=inc_in_child, args=(amount,))
+            process.start()
+            process.join()
+        self.assertEqual(len(os.listdir(self.directory.name)), 3)
+        self.assertEqual(self.sample(
+            self.metrics(), 'yatube_http_requests_total', view='child'
+        ), 6)
+
+    def dead_pid(self):
+        pid = 999999
+        while process_alive(pid):
+            pid -= 1
+        return pid
+
+    def test_dead_process_in_flight_ignored(self):
+        pid = self.dead_pid()
+        live = MmapedDict(os.path.join(self.directory.name, f'live_{pid}.db'))
+        live.add(
+            '["yatube_http_requests_in_flight", [["view", "dead"]], null]', 1
+        )
+        live.close()
+        self.assertIsNone(self.sample(
+            self.metrics(), 'yatube_http_requests_in_flight', view='dead'
+        ))
+
+    def test_file_grows(self):
+        path = os.path.join(self.directory.name, 'total_1.db')
+        values = MmapedDict(path)
+        for index in range(5000):
+            values.add(f'key-{index}', index)
+        values.add('key-10', 0.5)
+        values.close()
+        reopened = dict(
+            (key, value) for key, value, _ in read_file(path)
+        )
+        self.assertEqual(len(reopened), 5000)
+        self.assertEqual(reopened['key-10'], 10.5)
+
+    def write_server(self, pid):
+        with open(os.path.join(self.directory.name, SERVER_FILE), 'w') as f:
+            f.write(str(pid))
+
+    def dead_process_files(self, amount):
+        """Файлы завершившегося процесса; возвращает его pid."""
+        pid = self.dead_pid()
+        total = MmapedDict(
+            os.path.join(self.directory.name, f'total_{pid}.db')
+        )
+        total.add(
+            '["yatube_http_requests_total", [["view", "alive"]], null]',
+            amount
+        )
+        total.close()
+        MmapedDict(
+            os.path.join(self.directory.name, f'live_{pid}.db')
+        ).close()
+        return pid
+
+    def db_files(self):
+        return sorted(
+            name for name in os.listdir(self.directory.name)
+            if name.endswith('.db')
+        )
+
+    def test_dead_worker_counters_archived(self):
+        """Перезапуск обработчика не уменьшает счётчики."""
+        inc('yatube_http_requests_total', {'view': 'alive'})
+        self.dead_process_files(2)
+        self.write_server(os.getppid())
+        prepare_metrics_dir()
+        self.assertEqual(
+            self.db_files(), ['archive.db', f'total_{os.getpid()}.db']
+        )
+        self.assertEqual(self.sample(
+            self.metrics(), 'yatube_http_requests_total', view='alive'
+        ), 3)
+        pid = self.dead_process_files(4)
+        mark_process_dead(pid)
+        self.assertNotIn(f'total_{pid}.db', self.db_files())
+        self.assertNotIn(f'live_{pid}.db', self.db_files())
+        self.assertEqual(self.sample(
+            self.metrics(), 'yatube_http_requests_total', view='alive'
+        ), 7)
+
+    def test_metrics_cleared_on_server_start(self):
+        self.dead_process_files(2)
+        self.write_server(self.dead_pid())
+        prepare_metrics_dir()
+        self.assertEqual(self.db_files(), [])
+        with open(os.path.join(self.directory.name, SERVER_FILE)) as file:
+            self.assertEqual(file.read(), str(os.getppid()))
+
+    def test_metrics_only_for_internal_addresses(self):
+        response = self.client.get(
+            reverse('core:metrics'), REMOTE_ADDR='10.0.0.1'
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_metrics_through_proxy_forbidden(self):
+        for header in ('HTTP_X_FORWARDED_FOR', 'HTTP_FORWARDED'):
+            with self.subTest(header=header):
+                response = self.client.get(
+                    reverse('core:metrics'), **{header: '10.0.0.1'}
+                )
+                self.assertEqual(response.status_code, 403)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        url = reverse('core:metrics')
+        cases = (
+            ({}, 403),
+            ({'HTTP_AUTHORIZATION': 'Bearer wrong'}, 403),
+            ({'HTTP_AUTHORIZATION': 'Bearer secret'}, 200),
+            ({
+                'HTTP_AUTHORIZATION': 'Bearer secret',
+                'HTTP_X_FORWARDED_FOR': '10.0.0.1',
+                'REMOTE_ADDR': '10.0.0.2',
+            }, 200),
+        )
+        for headers, status in cases:
+            with self.subTest(headers=headers):
+                response = self.client.get(url, **headers)
+                self.assertEqual(response.status_code, status)
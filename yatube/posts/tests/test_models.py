@@ -1,7 +1,11 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
 
-from posts.models import Group, Post
+from posts.models import AuthorPostCounter, Group, GroupPostCounter, Post
 
 User = get_user_model()
 
@@ -58,3 +62,53 @@ class PostModelTest(TestCase):
             with self.subTest(field=field):
                 self.assertEqual(
                     post._meta.get_field(field).help_text, expected)
+
+
+class PostCounterTest(TestCase):
+    """Тест денормализованных счётчиков постов"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_group',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Вторая группа',
+            slug='other_group',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def counters(self):
+        return (
+            AuthorPostCounter.value(self.user.pk),
+            GroupPostCounter.value(self.group.pk),
+            GroupPostCounter.value(self.other_group.pk),
+        )
+
+    def test_counters_follow_post_changes(self):
+        """Счётчики меняются при создании, смене группы и удалении."""
+        post = Post.objects.create(
+            author=self.user, text='Тестовый пост', group=self.group
+        )
+        Post.objects.create(author=self.user, text='Тестовый пост')
+        self.assertEqual(self.counters(), (2, 1, 0))
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(self.counters(), (2, 0, 1))
+        post.delete()
+        self.assertEqual(self.counters(), (1, 0, 0))
+
+    def test_rebuild_command(self):
+        """Команда rebuild_post_counters учитывает посты из bulk_create."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text='Тестовый пост', group=self.group)
+            for _ in range(3)
+        )
+        call_command('rebuild_post_counters', stdout=StringIO())
+        self.assertEqual(self.counters(), (3, 3, 0))
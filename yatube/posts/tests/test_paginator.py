@@ -0,0 +1,243 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.db import DatabaseError, transaction
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.paginator import CountedPaginator, CursorPaginator, decode_cursor
+from core.testing import other_process
+from posts.counts import count_posts, group_posts_count, index_posts_count
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(PAGINATION_MODE='cursor')
+class CursorPaginationTests(TestCase):
+    """Тест keyset-пажинации лент"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='JuniorTester')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_group',
+            description='Тестовое описание',
+        )
+        # Две с половиной страницы постов, часть с одинаковой датой,
+        # чтобы проверить разрешение равенства по pk
+        cls.posts_count = settings.OBJECTS_ON_THE_PAGE * 2 + 5
+        now = timezone.now()
+        for index in range(cls.posts_count):
+            post = Post.objects.create(
+                author=cls.user,
+                text=f'Текст поста {index}',
+                group=cls.group,
+            )
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=now - timedelta(minutes=index // 3)
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def walk(self, url):
+        """Проходит ленту по курсорам вперёд и возвращает страницы."""
+        pages = []
+        cursor = None
+        while True:
+            params = {'cursor': cursor} if cursor else {}
+            page_obj = self.guest_client.get(url, params).context['page_obj']
+            pages.append(page_obj)
+            if not page_obj.has_next():
+                return pages
+            cursor = page_obj.next_cursor
+
+    def test_feeds_walk_without_gaps(self):
+        """Проход по курсорам возвращает все посты ровно по одному разу."""
+        expected = list(
+            Post.objects.order_by('-pub_date', '-pk')
+            .values_list('pk', flat=True)
+        )
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.user.username]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                pages = self.walk(url)
+                self.assertEqual(len(pages), 3)
+                self.assertFalse(pages[0].has_previous())
+                self.assertTrue(pages[-1].has_previous())
+                walked = [post.pk for page in pages for post in page]
+                self.assertEqual(walked, expected)
+
+    def test_previous_cursor_returns_previous_page(self):
+        """Курсор назад возвращает ту же страницу, что была до перехода."""
+        url = reverse('posts:index')
+        pages = self.walk(url)
+        response = self.guest_client.get(
+            url, {'cursor': pages[2].previous_cursor}
+        )
+        self.assertEqual(
+            list(response.context['page_obj']), list(pages[1])
+        )
+        response = self.guest_client.get(
+            url, {'cursor': pages[1].previous_cursor}
+        )
+        self.assertEqual(list(response.context['page_obj']), list(pages[0]))
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_broken_cursor_returns_first_page(self):
+        """Повреждённый токен приводит к первой странице."""
+        self.assertIsNone(decode_cursor('не-курсор'))
+        response = self.guest_client.get(
+            reverse('posts:index'), {'cursor': '!!!'}
+        )
+        self.assertEqual(
+            len(response.context['page_obj']),
+            settings.OBJECTS_ON_THE_PAGE
+        )
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_page_does_not_count_rows(self):
+        """Страница курсорного пажинатора строится одним запросом."""
+        paginator = CursorPaginator(
+            Post.objects.all(), settings.OBJECTS_ON_THE_PAGE
+        )
+        with self.assertNumQueries(1):
+            page_obj = paginator.get_page(None)
+            self.assertTrue(page_obj.has_other_pages())
+
+
+class FeedCountTests(TestCase):
+    """Тест кэшированного количества постов лент"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='JuniorTester')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_group',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Вторая группа',
+            slug='other_group',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def create_post(self, group=None):
+        return Post.objects.create(
+            author=self.user, text='Тестовый пост', group=group
+        )
+
+    @override_settings(FEED_PAGE_CACHE_TIMEOUT=0)
+    def test_feed_pages_do_not_count_after_warmup(self):
+        """Повторный просмотр ленты не выполняет SELECT COUNT(*)."""
+        self.create_post(self.group)
+        url = reverse('posts:group_list', args=[self.group.slug])
+        self.guest_client.get(url)
+        with self.assertNumQueries(1):
+            # Группа берётся из кэша поиска, запрос только постов страницы
+            response = self.guest_client.get(url)
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+
+    def test_counts_follow_post_changes(self):
+        """Количества обновляются при создании, смене группы и удалении
+        во всех процессах."""
+        def counts():
+            with other_process():
+                return (
+                    index_posts_count(),
+                    group_posts_count(self.group),
+                    group_posts_count(self.other_group),
+                )
+        post = self.create_post(self.group)
+        self.assertEqual(counts(), (1, 1, 0))
+        self.create_post(self.group)
+        self.assertEqual(counts(), (2, 2, 0))
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(counts(), (2, 1, 1))
+        post.delete()
+        self.assertEqual(counts(), (1, 1, 0))
+
+    def test_rolled_back_write_keeps_count(self):
+        self.create_post(self.group)
+        self.assertEqual(group_posts_count(self.group), 1)
+        try:
+            with transaction.atomic():
+                self.create_post(self.group)
+                raise DatabaseError
+        except DatabaseError:
+            pass
+        self.assertEqual(group_posts_count(self.group), 1)
+
+    def test_index_count_from_counters(self):
+        """Количество общей ленты — сумма счётчиков авторов."""
+        posts = [self.create_post() for _ in range(6)]
+        posts[2].delete()
+        cache.clear()
+        with self.assertNumQueries(1):
+            self.assertEqual(index_posts_count(), 5)
+
+    @override_settings(FEED_COUNT_EXACT_LIMIT=1)
+    def test_large_selection_count_is_estimated(self):
+        """Выше FEED_COUNT_EXACT_LIMIT количество оценивается по pk,
+        но не больше количества всех постов."""
+        posts = [self.create_post(self.group)]
+        posts += [self.create_post() for _ in range(6)]
+        posts.append(self.create_post(self.group))
+        posts[3].delete()
+        self.assertEqual(count_posts(self.group.posts.all()), 7)
+        Post.objects.filter(group=None).delete()
+        cache.clear()
+        self.assertEqual(count_posts(self.group.posts.all()), 2)
+
+
+class WindowedPaginatorTests(TestCase):
+    """Тест окна номеров страниц пажинатора"""
+    def page(self, number, pages):
+        paginator = CountedPaginator(
+            list(range(10)), 10, count=pages * 10
+        )
+        return paginator.page(number)
+
+    def test_page_window(self):
+        ellipsis = CountedPaginator.ELLIPSIS
+        expected = {
+            (1, 5): [1, 2, 3, 4, 5],
+            (1, 50000): [1, 2, 3, 4, ellipsis, 50000],
+            (25000, 50000): [
+                1, ellipsis, 24997, 24998, 24999, 25000,
+                25001, 25002, 25003, ellipsis, 50000
+            ],
+            (50000, 50000): [1, ellipsis, 49997, 49998, 49999, 50000],
+        }
+        for (number, pages), window in expected.items():
+            with self.subTest(number=number, pages=pages):
+                self.assertEqual(self.page(number, pages).page_window, window)
+
+    def test_rendered_size_does_not_depend_on_feed_length(self):
+        request = RequestFactory().get('/', {'page': 20})
+        sizes = set()
+        for pages in (100, 50000):
+            html = render_to_string(
+                'includes/paginator.html',
+                {'page_obj': self.page(20, pages)},
+                request=request
+            )
+            sizes.add(html.count('page-item'))
+        self.assertEqual(sizes, {15})
@@ -0,0 +1,148 @@
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.profiler import load_report, profile_token, report_ids
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(FEED_PAGE_CACHE_TIMEOUT=0)
+class ProfilerTests(TestCase):
+    """Тест профилирования запросов"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='JuniorTester')
+        cls.staff = User.objects.create_user(
+            username='Staff', is_staff=True
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_group',
+            description='Тестовое описание',
+        )
+        for index in range(3):
+            Post.objects.create(
+                author=cls.user, text=f'Пост {index}', group=cls.group
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.reports = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            PROFILER_ROOT=self.reports.name
+        )
+        self.settings_override.enable()
+        self.guest_client = Client()
+        self.staff_client = Client()
+        self.staff_client.force_login(ProfilerTests.staff)
+        self.token = profile_token('Staff')
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.reports.cleanup()
+
+    def test_not_profiled_without_valid_token(self):
+        for params in ({}, {'_profile': 'Staff:broken:token'}):
+            with self.subTest(params=params):
+                response = self.guest_client.get(
+                    reverse('posts:index'), params
+                )
+                self.assertNotIn('X-Profile-Report', response)
+        self.assertEqual(report_ids(), [])
+
+    @override_settings(PROFILER_TOKEN_MAX_AGE=-1)
+    def test_expired_token(self):
+        response = self.guest_client.get(
+            reverse('posts:index'), {'_profile': self.token}
+        )
+        self.assertNotIn('X-Profile-Report', response)
+
+    def test_report(self):
+        response = self.guest_client.get(
+            reverse('posts:index'), {'_profile': self.token}
+        )
+        report = load_report(response['X-Profile-Report'])
+        self.assertEqual(report['owner'], 'Staff')
+        self.assertEqual(report['status'], 200)
+        origins = [query['origin'] or '' for query in report['queries']]
+        self.assertTrue(any(
+            os.path.join('posts', 'views.py') in origin for origin in origins
+        ), origins)
+        templates = {
+            template['name']: template for template in report['templates']
+        }
+        self.assertEqual(templates['includes/one_post.html']['count'], 3)
+        self.assertIn('posts/index.html', templates)
+        self.assertIn('cumulative', report['stats'])
+
+    def test_token_of_former_staff(self):
+        """Токен не действует, если владелец больше не сотрудник."""
+        for changes in ({'is_staff': False}, {'is_active': False}):
+            with self.subTest(changes=changes):
+                User.objects.filter(pk=ProfilerTests.staff.pk).update(
+                    **changes
+                )
+                response = self.guest_client.get(
+                    reverse('posts:index'), {'_profile': self.token}
+                )
+                self.assertNotIn('X-Profile-Report', response)
+                User.objects.filter(pk=ProfilerTests.staff.pk).update(
+                    is_staff=True, is_active=True
+                )
+        self.assertEqual(report_ids(), [])
+
+    def test_token_not_recorded(self):
+        response = self.guest_client.get(
+            reverse('posts:index'), {'_profile': self.token, 'page': 1}
+        )
+        report = load_report(response['X-Profile-Report'])
+        self.assertEqual(report['path'], reverse('posts:index') + '?page=1')
+
+    def test_header_token(self):
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=[Post.objects.first().pk]),
+            HTTP_X_PROFILE=self.token
+        )
+        self.assertIn(response['X-Profile-Report'], report_ids())
+
+    @override_settings(PROFILER_REPORTS_LIMIT=2)
+    def test_old_reports_removed(self):
+        for _ in range(3):
+            self.guest_client.get(
+                reverse('about:author'), {'_profile': self.token}
+            )
+        self.assertEqual(len(report_ids()), 2)
+        self.assertEqual(len(os.listdir(self.reports.name)), 4)
+
+    def test_viewer_for_staff_only(self):
+        report_id = self.guest_client.get(
+            reverse('posts:index'), {'_profile': self.token}
+        )['X-Profile-Report']
+        urls = (
+            reverse('core:profile_reports'),
+            reverse('core:profile_report', args=[report_id]),
+            reverse('core:profile_download', args=[report_id]),
+        )
+        user_client = Client()
+        user_client.force_login(ProfilerTests.user)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(user_client.get(url).status_code, 302)
+                self.assertEqual(
+                    self.staff_client.get(url).status_code, 200
+                )
+        response = self.staff_client.get(reverse('core:profile_reports'))
+        self.assertContains(response, report_id)
+        for report_id in ('missing', '20200101T000000-00000000'):
+            with self.subTest(report_id=report_id):
+                response = self.staff_client.get(
+                    reverse('core:profile_report', args=[report_id])
+                )
+                self.assertEqual(response.status_code, 404)
@@ -0,0 +1,133 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.queries import QueryBudgetExceeded, query_shape
+from core.testing import QueryBudgetTestMixin
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(FEED_PAGE_CACHE_TIMEOUT=0)
+class PostsQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """Тест бюджетов SQL-запросов страниц приложения Posts"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='JuniorTester')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_group',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(PostsQueryBudgetTests.user)
+
+    def grow_data(self):
+        """Добавляет посты разных авторов и групп."""
+        for index in range(20):
+            author, _ = User.objects.get_or_create(
+                username=f'author_{index % 4}'
+            )
+            group, _ = Group.objects.get_or_create(
+                slug=f'group_{index % 3}',
+                defaults={'title': 'Группа', 'description': 'Описание'}
+            )
+            Post.objects.create(
+                author=author if index % 2 else PostsQueryBudgetTests.user,
+                text=f'Тестовый пост {index}',
+                group=group if index % 5 else PostsQueryBudgetTests.group,
+            )
+
+    def check_budgets(self):
+        post = PostsQueryBudgetTests.post
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[post.group.slug]),
+            reverse('posts:profile', args=[post.author.username]),
+            reverse('posts:post_detail', args=[post.pk]),
+            reverse('posts:post_create'),
+            reverse('posts:post_edit', args=[post.pk]),
+            reverse('posts:search') + '?q=пост',
+        )
+        for client in (self.guest_client, self.authorized_client):
+            for url in urls:
+                with self.subTest(url=url):
+                    # Первый запрос заполняет кэши, второй их использует
+                    cache.clear()
+                    self.assertWithinQueryBudget(client, url)
+                    self.assertWithinQueryBudget(client, url)
+
+    def test_budgets_do_not_depend_on_data_size(self):
+        """Бюджеты соблюдаются и на малых, и на больших данных."""
+        self.check_budgets()
+        self.grow_data()
+        self.check_budgets()
+
+    def test_post_writes_within_budget(self):
+        self.assertWithinQueryBudget(
+            self.authorized_client,
+            reverse('posts:post_create'),
+            {'text': 'Новый пост', 'group': PostsQueryBudgetTests.group.pk},
+            method='post'
+        )
+        self.assertWithinQueryBudget(
+            self.authorized_client,
+            reverse('posts:post_edit', args=[PostsQueryBudgetTests.post.pk]),
+            {'text': 'Изменённый пост'},
+            method='post'
+        )
+
+    def test_first_post_writes_within_budget(self):
+        """Бюджеты записи соблюдаются, когда счётчиков автора и группы
+        ещё нет, а сессии и пользователя нет в кэше."""
+        author = User.objects.create_user(username='NewAuthor')
+        groups = [
+            Group.objects.create(
+                title='Новая группа', slug=slug, description='Описание'
+            )
+            for slug in ('new_group', 'other_group')
+        ]
+        client = Client()
+        client.force_login(author)
+        cache.clear()
+        self.assertWithinQueryBudget(
+            client,
+            reverse('posts:post_create'),
+            {'text': 'Первый пост', 'group': groups[0].pk},
+            method='post'
+        )
+        post = Post.objects.get(author=author)
+        cache.clear()
+        self.assertWithinQueryBudget(
+            client,
+            reverse('posts:post_edit', args=[post.pk]),
+            {'text': 'Первый пост', 'group': groups[1].pk},
+            method='post'
+        )
+        self.assertEqual(groups[1].post_counter.posts_count, 1)
+
+    def test_query_shape(self):
+        self.assertEqual(
+            query_shape('SELECT * FROM t WHERE a = 5 AND b IN (%s, %s, %s)'),
+            'SELECT * FROM t WHERE a = ? AND b IN (...)'
+        )
+
+    @override_settings(QUERY_BUDGET_STRICT=True, QUERY_BUDGETS={
+        'posts:index': 0
+    })
+    def test_middleware_rejects_budget_overrun(self):
+        """В строгом режиме превышение бюджета вызывает ошибку."""
+        with self.assertRaises(QueryBudgetExceeded):
+            self.guest_client.get(reverse('posts:index'))
@@ -0,0 +1,137 @@
+import os
+import sqlite3
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import (
+    Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+)
+from django.urls import reverse
+
+from core.routers import (
+    ReplicaRouter, read_replica, replica_reads, reset_writes
+)
+from posts.cache import cache_feed_page, conditional_feed
+from posts.counts import FEED_INDEX
+from posts.models import Post
+
+User = get_user_model()
+
+
+@read_replica
+def database_view(request):
+    """Имя базы, из которой view читал бы посты."""
+    return HttpResponse(Post.objects.all().db)
+
+
+@read_replica
+@conditional_feed(FEED_INDEX)
+@cache_feed_page(FEED_INDEX)
+def cached_feed_view(request):
+    return HttpResponse(Post.objects.all().db)
+
+
+@override_settings(DATABASE_REPLICAS=('replica',))
+class ReplicaRouterTests(TestCase):
+    """Тест маршрутизации чтения на реплику"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='JuniorTester')
+        cls.router = ReplicaRouter()
+
+    def setUp(self):
+        cache.clear()
+        reset_writes()
+        self.factory = RequestFactory()
+
+    def read_database(self, cookies=None):
+        request = self.factory.get('/')
+        request.user = ReplicaRouterTests.user
+        request.COOKIES.update(cookies or {})
+        return database_view(request).content.decode()
+
+    def test_reads_go_to_replica_only_inside_views(self):
+        self.assertEqual(Post.objects.all().db, 'default')
+        with replica_reads():
+            self.assertEqual(Post.objects.all().db, 'replica')
+        self.assertEqual(self.read_database(), 'replica')
+
+    @override_settings(DATABASE_REPLICAS=())
+    def test_without_replicas_reads_go_to_default(self):
+        self.assertEqual(self.read_database(), 'default')
+
+    def test_writes_go_to_default(self):
+        post = Post(author=ReplicaRouterTests.user, text='Пост')
+        post._state.db = 'replica'
+        with replica_reads():
+            self.assertEqual(self.router.db_for_write(Post), 'default')
+            self.assertEqual(
+                self.router.db_for_write(Post, instance=post), 'default'
+            )
+
+    def test_read_your_writes(self):
+        """После записи чтение идёт в основную базу."""
+        with replica_reads():
+            self.router.db_for_write(Post)
+            self.assertEqual(Post.objects.all().db, 'default')
+        reset_writes()
+        self.assertEqual(self.read_database(), 'replica')
+        self.assertEqual(
+            self.read_database({settings.REPLICA_PIN_COOKIE: '1'}),
+            'default'
+        )
+
+    @override_settings(FEED_PAGE_CACHE_TIMEOUT=60)
+    def test_cached_pages_not_read_from_replica(self):
+        """Кэшируемая страница читается из основной базы, страница
+        с реплики остаётся без ETag."""
+        for user, database, etag in (
+                (AnonymousUser(), 'default', True),
+                (ReplicaRouterTests.user, 'replica', False)):
+            with self.subTest(database=database):
+                request = self.factory.get('/')
+                request.user = user
+                response = cached_feed_view(request)
+                self.assertEqual(response.content.decode(), database)
+                self.assertEqual(response.has_header('ETag'), etag)
+
+    def test_replica_is_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+
+    def test_write_pins_user_to_default(self):
+        client = Client()
+        client.force_login(ReplicaRouterTests.user)
+        response = client.get(reverse('about:author'))
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+        response = client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'}
+        )
+        cookie = response.cookies[settings.REPLICA_PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_PIN_SECONDS)
+
+
+class SnapshotDatabaseTests(TransactionTestCase):
+    """Тест копии базы для реплики"""
+    # Копия снимается вне транзакции теста
+    def test_snapshot_contains_posts(self):
+        user = User.objects.create_user(username='JuniorTester')
+        Post.objects.create(author=user, text='Пост в копии')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'replica.sqlite3')
+            call_command('snapshot_database', path, stdout=StringIO())
+            replica = sqlite3.connect(path)
+            try:
+                texts = replica.execute(
+                    'SELECT text FROM posts_post'
+                ).fetchall()
+            finally:
+                replica.close()
+        self.assertEqual(texts, [('Пост в копии',)])
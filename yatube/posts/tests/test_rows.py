@@ -0,0 +1,103 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.template import engines
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.paginator import CountedPaginator
+from posts.models import Group, Post
+from posts.rows import PostRow, feed_rows
+from posts.tests.test_jinja2 import normalize
+
+User = get_user_model()
+
+
+class FeedRowsTests(TestCase):
+    """Тест лёгких строк лент"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='JuniorTester', first_name='Иван', last_name='<Тест>'
+        )
+        cls.other_user = User.objects.create_user(username='Другой')
+        cls.group = Group.objects.create(
+            title='Тестовая <группа>',
+            slug='test_group',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Тестовый <b>пост</b>', group=cls.group
+        )
+        Post.objects.create(author=cls.other_user, text='Без группы')
+        Post.objects.create(author=cls.user, text='Ещё пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_rows_match_posts(self):
+        rows = list(feed_rows(Post.objects.all()))
+        posts = list(Post.objects.select_related('author', 'group'))
+        self.assertEqual(rows, posts)
+        for row, post in zip(rows, posts):
+            with self.subTest(post=post.text):
+                self.assertIsInstance(row, PostRow)
+                self.assertEqual(str(row), str(post))
+                self.assertEqual(row.pub_date, post.pub_date)
+                self.assertEqual(
+                    row.author.get_full_name(), post.author.get_full_name()
+                )
+                self.assertEqual(str(row.group), str(post.group))
+                self.assertFalse(hasattr(row, '__dict__'))
+        self.assertIsNone(rows[1].group)
+        # Строки одного автора ссылаются на один объект
+        self.assertIs(rows[0].author, rows[2].author)
+
+    def test_only_used_columns_selected(self):
+        with CaptureQueriesContext(connection) as context:
+            list(feed_rows(FeedRowsTests.group.posts.all())[:10])
+        sql = context.captured_queries[0]['sql']
+        for column in ('password', 'email', 'description'):
+            self.assertNotIn(column, sql)
+        self.assertEqual(len(context.captured_queries), 1)
+
+    def test_templates_render_rows_like_models(self):
+        request = RequestFactory().get('/')
+        request.user = FeedRowsTests.user
+        pages = []
+        for posts in (
+                list(feed_rows(Post.objects.all())),
+                list(Post.objects.select_related('author', 'group'))):
+            page_obj = CountedPaginator(posts, 10).get_page(1)
+            pages.append([
+                normalize(engine.get_template('posts/index.html').render(
+                    {'page_obj': page_obj}, request
+                ))
+                for engine in engines.all()
+            ])
+        self.assertEqual(pages[0], pages[1])
+        self.assertIn('Иван &lt;Тест&gt;', pages[0][0])
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'rows.json')
+            call_command(
+                'benchmark_feed_rows', rows=3, repeat=2, warmup=0,
+                output=output, stdout=out
+            )
+            with open(output, encoding='utf-8') as file:
+                results = json.load(file)['results']
+        self.assertEqual(set(results), {'models', 'rows'})
+        self.assertLess(
+            results['rows']['bytes_per_row'],
+            results['models']['bytes_per_row']
+        )
+        self.assertIn('Строки быстрее', out.getvalue())
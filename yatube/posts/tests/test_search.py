@@ -0,0 +1,119 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.explain import explain_query_plan
+from posts.models import Group, Post
+from posts.search import PAGE_SQL, fts_query, search_posts
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    """Тест полнотекстового поиска по постам"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='JuniorTester')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_group',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Весенний лес шумит, лес просыпается',
+            group=cls.group,
+        )
+        cls.other_post = Post.objects.create(
+            author=cls.user,
+            text='Осенний лес <b>молчит</b>',
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def found(self, text):
+        return list(search_posts(text))
+
+    def test_results_are_ranked(self):
+        """Пост с большим числом совпадений идёт первым."""
+        self.assertEqual(
+            self.found('лес'), [SearchTests.post, SearchTests.other_post]
+        )
+        self.assertEqual(self.found('весенний лес'), [SearchTests.post])
+        self.assertEqual(self.found('болото'), [])
+
+    def test_index_follows_post_changes(self):
+        """Индекс обновляется при изменении и удалении поста."""
+        post = Post.objects.get(pk=SearchTests.other_post.pk)
+        post.text = 'Зимнее поле'
+        post.save()
+        self.assertEqual(self.found('поле'), [post])
+        self.assertEqual(self.found('осенний'), [])
+        post.delete()
+        self.assertEqual(self.found('поле'), [])
+        # Посты из bulk_create индексируются триггером
+        Post.objects.bulk_create([
+            Post(author=SearchTests.user, text='Летний луг')
+        ])
+        self.assertEqual(len(self.found('луг')), 1)
+
+    def test_query_syntax_is_escaped(self):
+        """Символы синтаксиса FTS5 не ломают поиск."""
+        for text in ('"лес', 'лес*', 'NEAR(', 'лес OR', '-', 'AND'):
+            with self.subTest(text=text):
+                response = self.guest_client.get(
+                    reverse('posts:search'), {'q': text}
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_search_page(self):
+        """Страница поиска выделяет совпадения и экранирует текст."""
+        response = self.guest_client.get(
+            reverse('posts:search'), {'q': 'молчит'}
+        )
+        self.assertTemplateUsed(response, 'posts/search.html')
+        self.assertEqual(
+            list(response.context['page_obj']), [SearchTests.other_post]
+        )
+        self.assertContains(response, '&lt;b&gt;<mark>молчит</mark>')
+        response = self.guest_client.get(reverse('posts:search'))
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_search_pagination_keeps_query(self):
+        Post.objects.bulk_create(
+            Post(author=SearchTests.user, text=f'Река {index}')
+            for index in range(settings.OBJECTS_ON_THE_PAGE + 1)
+        )
+        response = self.guest_client.get(
+            reverse('posts:search'), {'q': 'река', 'page': 2}
+        )
+        self.assertEqual(len(response.context['page_obj']), 1)
+        self.assertContains(response, 'href="?q=%D1%80%D0%B5%D0%BA%D0%B0')
+
+    def test_search_uses_fts_index(self):
+        """Поиск начинается с индекса FTS, а не с просмотра постов."""
+        params = [fts_query('лес'), settings.OBJECTS_ON_THE_PAGE, 0]
+        with connection.cursor() as cursor:
+            sql = PAGE_SQL
+            sql = connection.ops.last_executed_query(cursor, sql, params)
+        plan = explain_query_plan(sql)
+        self.assertTrue(
+            any('VIRTUAL TABLE INDEX' in step for step in plan)
+        )
+        # посты страницы читаются по первичному ключу, без просмотра
+        self.assertFalse(
+            [step for step in plan if step.startswith('SCAN post ')]
+        )
+
+    def test_results_limited(self):
+        """Совпадения сверх SEARCH_RESULTS_LIMIT не считаются и не видны."""
+        with self.settings(SEARCH_RESULTS_LIMIT=1):
+            results = search_posts('лес')
+            self.assertTrue(results.truncated)
+            self.assertEqual(results.count(), 1)
+            self.assertEqual(len(results[0:10]), 1)
+            self.assertEqual(results[1:10], [])
@@ -0,0 +1,131 @@
+import json
+import logging
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.slowlog import reset_rate_limits
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(
+    FEED_PAGE_CACHE_TIMEOUT=0, SLOW_QUERY_SHAPE_INTERVAL=60,
+    SLOW_QUERY_LOG_RATE=1000
+)
+class SlowQueryLogTests(TestCase):
+    """Тест журнала медленных запросов"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='JuniorTester')
+        Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        reset_rate_limits()
+        self.directory = tempfile.TemporaryDirectory()
+        self.log = os.path.join(self.directory.name, 'logs', 'slow.ndjson')
+        self.settings_override = override_settings(
+            SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_LOG=self.log,
+            SLOW_QUERY_LOG_PARAMS=True
+        )
+        self.settings_override.enable()
+        logging.disable(logging.WARNING)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+        self.settings_override.disable()
+        self.directory.cleanup()
+        reset_rate_limits()
+
+    def records(self):
+        if not os.path.exists(self.log):
+            return []
+        with open(self.log, encoding='utf-8') as file:
+            return [json.loads(line) for line in file]
+
+    def run_query(self, times):
+        for index in range(times):
+            list(Post.objects.filter(text=f'Пост {index}'))
+
+    def test_view_query_logged_with_plan(self):
+        Client().get(reverse('posts:profile', args=['JuniorTester']))
+        records = [
+            record for record in self.records()
+            if 'posts_post' in record['sql']
+        ]
+        self.assertTrue(records)
+        record = records[0]
+        self.assertEqual(record['view'], 'posts:profile')
+        self.assertEqual(record['database'], 'default')
+        self.assertTrue(record['plan'])
+        self.assertTrue(record['origin'])
+        self.assertIsNotNone(record['params'])
+
+    @override_settings(SLOW_QUERY_LOG_PARAMS=False)
+    def test_params_not_logged_by_default(self):
+        self.run_query(1)
+        self.assertIsNone(self.records()[0]['params'])
+
+    def test_sensitive_params_redacted(self):
+        """Параметры запросов к пользователям и сессиям скрыты."""
+        User.objects.filter(password='pbkdf2_sha256$secret').exists()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT session_data FROM django_session '
+                'WHERE session_key = %s', ['secret-key']
+            )
+        records = self.records()
+        self.assertEqual(len(records), 2)
+        for record in records:
+            self.assertEqual(record['params'], ['<скрыто>'])
+        self.assertNotIn('secret', json.dumps(records))
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=60 * 1000)
+    def test_fast_queries_not_logged(self):
+        self.run_query(3)
+        self.assertEqual(self.records(), [])
+
+    def test_same_shape_rate_limited(self):
+        self.run_query(5)
+        records = self.records()
+        self.assertEqual(len(records), 1)
+        with override_settings(SLOW_QUERY_SHAPE_INTERVAL=0):
+            self.run_query(1)
+        records = self.records()
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[1]['suppressed']['count'], 4)
+        self.assertEqual(records[1]['params'], ["'Пост 0'"])
+
+    @override_settings(SLOW_QUERY_LOG_RATE=2, SLOW_QUERY_SHAPE_INTERVAL=0)
+    def test_log_rate_limited(self):
+        self.run_query(5)
+        self.assertEqual(len(self.records()), 2)
+
+    def test_failed_query_does_not_break_log(self):
+        with self.assertRaises(Exception):
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT * FROM missing_table')
+        self.assertEqual(self.records()[0]['plan'], [])
+
+    def test_summary_command(self):
+        """Пропущенные запросы учитываются в количестве формы."""
+        self.run_query(5)
+        with override_settings(SLOW_QUERY_SHAPE_INTERVAL=0):
+            self.run_query(1)
+            list(User.objects.all())
+        out = StringIO()
+        call_command('slow_queries', sort='count', stdout=out)
+        output = out.getvalue()
+        self.assertIn('1. 6 раз', output)
+        self.assertIn('FROM "posts_post"', output)
+        self.assertIn('2. 1 раз', output)
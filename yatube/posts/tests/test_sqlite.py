@@ -0,0 +1,109 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import TestCase, TransactionTestCase
+
+from core.backends.sqlite3.base import pragma_statements
+from posts.models import Post
+
+User = get_user_model()
+
+
+class SqliteBackendTests(TestCase):
+    """Тест настройки соединений SQLite"""
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.alias = 'sqlite_test'
+        connections.databases[self.alias] = {
+            **settings.DATABASES['default'],
+            'NAME': os.path.join(self.directory.name, 'test.sqlite3'),
+        }
+
+    def tearDown(self):
+        connections[self.alias].close()
+        del connections[self.alias]
+        del connections.databases[self.alias]
+        self.directory.cleanup()
+
+    def pragma(self, name, alias='default'):
+        with connections[alias].cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_on_connect(self):
+        self.assertEqual(
+            self.pragma('busy_timeout'),
+            settings.SQLITE_PRAGMAS['busy_timeout']
+        )
+        self.assertEqual(self.pragma('journal_mode', self.alias), 'wal')
+        self.assertEqual(
+            self.pragma('mmap_size', self.alias),
+            settings.SQLITE_PRAGMAS['mmap_size']
+        )
+        # synchronous = NORMAL
+        self.assertEqual(self.pragma('synchronous', self.alias), 1)
+
+    def test_transaction_mode(self):
+        statements = []
+
+        def record(execute, sql, params, many, context):
+            statements.append(sql)
+            return execute(sql, params, many, context)
+
+        database = connections[self.alias]
+        database.ensure_connection()
+        with database.execute_wrapper(record):
+            with transaction.atomic(using=self.alias):
+                pass
+        self.assertEqual(statements[0], 'BEGIN IMMEDIATE')
+
+    def test_persistent_connection(self):
+        self.assertEqual(connection.settings_dict['CONN_MAX_AGE'], 60)
+        database = connections[self.alias]
+        database.ensure_connection()
+        raw_connection = database.connection
+        database.close_if_unusable_or_obsolete()
+        self.assertIs(database.connection, raw_connection)
+
+    def test_invalid_pragmas(self):
+        for pragmas in ({'journal_mode': 'WAL; DROP TABLE x'},
+                        {'cache size': 10}):
+            with self.subTest(pragmas=pragmas):
+                with self.assertRaises(ImproperlyConfigured):
+                    pragma_statements(pragmas)
+        self.assertEqual(
+            pragma_statements({'journal_mode': 'WAL', 'busy_timeout': 10}),
+            ['PRAGMA busy_timeout = 10', 'PRAGMA journal_mode = WAL']
+        )
+
+
+class BenchmarkConcurrencyTests(TransactionTestCase):
+    """Тест замера одновременных чтения и записи"""
+    # Копия базы снимается вне транзакции теста
+    def test_command_reports_profiles(self):
+        user = User.objects.create_user(username='JuniorTester')
+        Post.objects.create(author=user, text='Тестовый пост')
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'result.json')
+            call_command(
+                'benchmark_concurrency', readers=2, writers=1, seconds=0.2,
+                output=output, stdout=StringIO()
+            )
+            with open(output, encoding='utf-8') as file:
+                report = json.load(file)
+        self.assertEqual(
+            [row['profile'] for row in report['results']],
+            ['django', 'tuned']
+        )
+        for row in report['results']:
+            self.assertGreater(row['reads']['operations'], 0)
+            self.assertGreater(row['writes']['operations'], 0)
+        # Копия базы не затронута: посты писались в копию
+        self.assertEqual(Post.objects.count(), 1)
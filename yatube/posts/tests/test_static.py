@@ -0,0 +1,96 @@
+import gzip
+import tempfile
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import Client, SimpleTestCase, override_settings
+
+from core.staticfiles import brotli, hashed_names
+
+
+class StaticFilesTests(SimpleTestCase):
+    """Тест сборки и отдачи статики"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.TemporaryDirectory()
+        cls.settings_override = override_settings(
+            STATIC_ROOT=cls.static_root.name
+        )
+        cls.settings_override.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.static_root.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client()
+
+    def content(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_hashed_names_cached_forever(self):
+        url = static('css/bootstrap.min.css')
+        self.assertRegex(
+            url, r'^/static/css/bootstrap\.min\.[0-9a-f]{12}\.css$'
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(
+            response['Cache-Control'],
+            f'public, max-age={settings.STATIC_CACHE_MAX_AGE}, immutable'
+        )
+        self.assertIn('immutable', self.client.get(
+            static('img/logo.png')
+        )['Cache-Control'])
+
+    def test_hashed_names_built_once(self):
+        """Имена из манифеста не собираются заново на каждый запрос."""
+        names = hashed_names()
+        url = static('css/bootstrap.min.css')
+        self.assertIn(url[len(settings.STATIC_URL):], names)
+        self.assertIs(hashed_names(), names)
+
+    def test_precompressed_variant(self):
+        url = static('css/bootstrap.min.css')
+        plain = self.content(self.client.get(url))
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        compressed = self.content(response)
+        self.assertLess(len(compressed), len(plain))
+        self.assertEqual(gzip.decompress(compressed), plain)
+        # Картинки не сжимаются
+        response = self.client.get(
+            static('img/logo.png'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertNotIn('Content-Encoding', response)
+
+    @skipUnless(brotli, 'brotli не установлен')
+    def test_brotli_preferred(self):
+        response = self.client.get(
+            static('css/bootstrap.min.css'),
+            HTTP_ACCEPT_ENCODING='gzip, deflate, br'
+        )
+        self.assertEqual(response['Content-Encoding'], 'br')
+
+    def test_unhashed_names_revalidated(self):
+        url = f'{settings.STATIC_URL}css/bootstrap.min.css'
+        response = self.client.get(url)
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_and_outside_files(self):
+        for url in (f'{settings.STATIC_URL}css/missing.css',
+                    f'{settings.STATIC_URL}../manage.py'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
@@ -1,5 +1,6 @@
 from django.test import TestCase, Client
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from http import HTTPStatus
 
 from posts.models import Group, Post
@@ -36,6 +37,8 @@ class PostsURLTests(TestCase):
         cls.unexisting_url = 'unexisting_url'
 
     def setUp(self):
+        # Кэш лент переживает откат транзакции теста
+        cache.clear()
         # Устанавливаем данные для тестирования
         # Создаём экземпляр клиента. Он неавторизован.
         self.guest_client = Client()
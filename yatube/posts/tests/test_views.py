@@ -1,10 +1,15 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import Client, TestCase
 from django.urls import reverse
 
 # Импортируем глобальные настройки
 from django.conf import settings
 
+from posts.counts import rebuild_post_counters
 from posts.models import Group, Post
 from posts.forms import PostForm
 
@@ -32,6 +37,8 @@ class PostsPagesTests(TestCase):
         )
 
     def setUp(self):
+        # Кэш лент переживает откат транзакции теста
+        cache.clear()
         # Устанавливаем данные для тестирования
         # Создаём экземпляр неавторизованного клиента.
         self.guest_client = Client()
@@ -156,8 +163,10 @@ class PostsPagesTests(TestCase):
                     group=PostsPagesTests.group,
                 )
             ]
-        # Создаем посты
+        # Создаем посты; bulk_create обходит Post.save(),
+        # поэтому пересчитываем счётчики постов
         Post.objects.bulk_create(bulk_data)
+        rebuild_post_counters()
         # Проверяем количество постов на страницах
         for url, args in paginated_urls:
             for page, count in pages:
@@ -176,6 +185,13 @@ class PostsPagesTests(TestCase):
                         len(response.context['page_obj']),
                         count)
 
+    def test_feed_queries_use_indexes(self):
+        """Ленты читаются по составным индексам без сортировки."""
+        output = StringIO()
+        # Команда завершается CommandError, если план не подходит
+        call_command('check_feed_plans', stdout=output)
+        self.assertNotIn('TEMP B-TREE', output.getvalue())
+
     def test_correct_group_list(self):
         # Создаем новую группу
         self.group_new = Group.objects.create(
@@ -0,0 +1,150 @@
+"""Лента подписок: посты авторов, на которых подписан пользователь.
+
+Новый пост раскладывается по лентам подписчиков (таблица
+TimelineEntry) при сохранении, поэтому страница ленты читается одним
+просмотром индекса (user, -pub_date, -post). У популярных авторов
+(больше FOLLOW_FANOUT_LIMIT подписчиков) посты не раскладываются:
+их подписки помечены pull, и посты таких авторов при показе ленты
+выбираются из их лент и объединяются со страницей TimelineEntry.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from core.paginator import (
+    CURSOR_FORWARD, CursorPaginator, keyset_queryset, row_key
+)
+from posts.cache import bump_feed_versions
+from posts.counts import FEED_AUTHOR
+from posts.models import Follow, Post, TimelineEntry
+
+# Размер пачки INSERT при раскладке постов по лентам
+FANOUT_BATCH_SIZE = 500
+
+
+def add_entries(user_ids, posts):
+    """Добавляет посты [(pk, pub_date), ...] в ленты пользователей."""
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+            for user_id in user_ids
+            for pk, pub_date in posts
+        ),
+        batch_size=FANOUT_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def backfill(user_ids, author_id):
+    """Добавляет в ленты последние TIMELINE_BACKFILL постов автора."""
+    posts = list(
+        Post.objects.filter(author_id=author_id)
+        .order_by('-pub_date', '-pk')
+        .values_list('pk', 'pub_date')[:settings.TIMELINE_BACKFILL]
+    )
+    if posts:
+        add_entries(user_ids, posts)
+
+
+def fan_out_post(post):
+    """Раскладывает новый пост по лентам подписчиков автора,
+    которые читают его посты не напрямую из ленты автора."""
+    followers = list(
+        Follow.objects.filter(author_id=post.author_id, pull=False)
+        .values_list('user_id', flat=True)
+    )
+    if followers:
+        add_entries(followers, [(post.pk, post.pub_date)])
+
+
+def followers_count(author):
+    return Follow.objects.filter(author=author).count()
+
+
+def follow(user, author):
+    """Подписывает user на author; возвращает False, если подписка
+    уже была или это подписка на себя."""
+    if user == author:
+        return False
+    with transaction.atomic():
+        _, created = Follow.objects.get_or_create(user=user, author=author)
+        if not created:
+            return False
+        if followers_count(author) > settings.FOLLOW_FANOUT_LIMIT:
+            # Автор стал или уже был популярным: все подписчики
+            # читают его посты из его ленты
+            Follow.objects.filter(author=author, pull=False).update(
+                pull=True
+            )
+        else:
+            backfill([user.pk], author.pk)
+    # Кнопка подписки на странице автора
+    bump_feed_versions([(FEED_AUTHOR, author.username)])
+    return True
+
+
+def unfollow(user, author):
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(user=user, author=author).delete()
+        if not deleted:
+            return False
+        TimelineEntry.objects.filter(user=user, post__author=author).delete()
+        pulling = Follow.objects.filter(author=author, pull=True)
+        if (pulling.exists() and followers_count(author)
+                <= settings.FOLLOW_FANOUT_LIMIT):
+            # Автор перестал быть популярным: его посты снова
+            # раскладываются, а ленты подписчиков дополняются
+            followers = list(pulling.values_list('user_id', flat=True))
+            pulling.update(pull=False)
+            backfill(followers, author.pk)
+    bump_feed_versions([(FEED_AUTHOR, author.username)])
+    return True
+
+
+def rebuild_timelines():
+    """Дополняет ленты подписок постами, созданными в обход
+    Post.save() (bulk_create)."""
+    follows = Follow.objects.filter(pull=False).order_by('author_id')
+    author_id, user_ids = None, []
+    for user_id, follow_author_id in follows.values_list(
+            'user_id', 'author_id').iterator():
+        if follow_author_id != author_id and user_ids:
+            backfill(user_ids, author_id)
+            user_ids = []
+        author_id = follow_author_id
+        user_ids.append(user_id)
+    if user_ids:
+        backfill(user_ids, author_id)
+
+
+class TimelinePaginator(CursorPaginator):
+    """Keyset-пажинатор ленты подписок пользователя user."""
+    def __init__(self, user, per_page, **kwargs):
+        super().__init__(
+            TimelineEntry.objects.filter(user=user)
+            .order_by('-pub_date', '-post'),
+            per_page, **kwargs
+        )
+        self.user = user
+
+    def fetch_rows(self, direction, pub_date, pk):
+        limit = self.per_page + 1
+        entries = keyset_queryset(
+            self.object_list, direction, pub_date, pk, key_field='post_id'
+        ).select_related('post__author', 'post__group')[:limit]
+        rows = [entry.post for entry in entries]
+        pull_authors = list(
+            Follow.objects.filter(user=self.user, pull=True)
+            .values_list('author_id', flat=True)
+        )
+        if pull_authors:
+            rows += keyset_queryset(
+                Post.objects.filter(author_id__in=pull_authors)
+                .select_related('author', 'group'),
+                direction, pub_date, pk
+            )[:limit]
+        # Пост популярного автора мог попасть в ленту до того,
+        # как автор стал популярным
+        unique = {post.pk: post for post in rows}.values()
+        return sorted(
+            unique, key=row_key, reverse=direction == CURSOR_FORWARD
+        )[:limit]
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from posts import views
+from posts import api, views
 
 app_name = 'posts'
 
@@ -17,11 +17,40 @@ urlpatterns = [path('',
                     views.profile,
                     name='profile'
                     ),
+               # Лента подписок
+               path('follow/',
+                    views.follow_index,
+                    name='follow_index'
+                    ),
+               # Подписка на автора и отписка от него
+               path('profile/<str:username>/follow/',
+                    views.profile_follow,
+                    name='profile_follow'
+                    ),
+               path('profile/<str:username>/unfollow/',
+                    views.profile_unfollow,
+                    name='profile_unfollow'
+                    ),
+               # Выгрузка всех постов пользователя
+               path('profile/<str:username>/export/',
+                    views.profile_export,
+                    name='profile_export'
+                    ),
+               # Выгрузка всех постов группы
+               path('group/<slug:slug>/export/',
+                    views.group_export,
+                    name='group_export'
+                    ),
                # Просмотр записи
                path('posts/<int:post_id>/',
                     views.post_detail,
                     name='post_detail'
                     ),
+               # Поиск по тексту постов
+               path('search/',
+                    views.search,
+                    name='search'
+                    ),
                # Создание записи
                path('create/',
                     views.post_create,
@@ -32,4 +61,21 @@ urlpatterns = [path('',
                     views.post_edit,
                     name='post_edit'
                     ),
+               # JSON API лент и постов
+               path('api/v1/posts/',
+                    api.index,
+                    name='api_index'
+                    ),
+               path('api/v1/posts/<int:post_id>/',
+                    api.post_detail,
+                    name='api_post_detail'
+                    ),
+               path('api/v1/groups/<slug:slug>/posts/',
+                    api.group_posts,
+                    name='api_group_list'
+                    ),
+               path('api/v1/profiles/<str:username>/posts/',
+                    api.profile,
+                    name='api_profile'
+                    ),
                ]
@@ -1,42 +1,79 @@
-from django.shortcuts import render, get_object_or_404
-from posts.models import Post, Group
-from django.contrib.auth.models import User
-from django.core.paginator import Paginator
+from functools import partial
+
+from django.shortcuts import get_object_or_404
+from posts.models import Follow, Post
 from django.shortcuts import redirect
+from django.http import Http404, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
 from django.contrib.auth.decorators import login_required
 # Импортируем глобальные настройки
 from django.conf import settings
 # Импортируем класс формы, чтобы сослаться на неё во view-классе
 from posts.forms import PostForm
+from posts.search import search_posts
+from posts.export import CONTENT_TYPES, accepts_gzip, export_posts
+from posts.lookups import get_author_or_404, get_group_or_404
+from posts.cache import (
+    cache_feed_page, conditional_feed, conditional_page, post_etag
+)
+from posts.counts import (
+    FEED_AUTHOR, FEED_GROUP, FEED_INDEX, author_posts_count,
+    group_posts_count, index_posts_count
+)
+from posts.rows import feed_rows
+from posts.timeline import TimelinePaginator, follow, unfollow
+from core.paginator import CountedPaginator, CursorPaginator
+from core.routers import read_replica
+from core.shortcuts import render
 
 
-def paginate_page(request, posts):
+def paginate_page(request, posts, count=None):
     # Получаем набор из OBJECTS_ON_THE_PAGE записей
-    # для страницы page из request
+    # для страницы page из request.
+    # count - количество постов ленты или функция, возвращающая его;
+    # без него количество считается запросом COUNT
+    if settings.PAGINATION_MODE == 'cursor':
+        # Keyset-пажинация: страница задаётся токеном cursor,
+        # а не номером, глубина листания не влияет на запрос
+        paginator = CursorPaginator(posts, settings.OBJECTS_ON_THE_PAGE)
+        return paginator.get_page(request.GET.get('cursor'))
     page_number = request.GET.get('page')
-    paginator = Paginator(posts, settings.OBJECTS_ON_THE_PAGE)
+    paginator = CountedPaginator(
+        posts,
+        settings.OBJECTS_ON_THE_PAGE,
+        count=count
+    )
     return paginator.get_page(page_number)
 
 
+@read_replica
+@conditional_feed(FEED_INDEX)
+@cache_feed_page(FEED_INDEX)
 def index(request):
     # Получаем выборку из всех объектов модели Post,
     # подразумевается, что сортировка по полю pub_date
     # по убыванию прописана в классе Meta модели.
-    # Сразу запрашиваем связанные объекты group и author
-    posts = Post.objects.select_related('group', 'author')
+    # Выбираем только поля, которые показывает шаблон поста,
+    # вместе с именем автора и группой
+    posts = feed_rows(Post.objects.all())
     # Получаем набор записей для страницы с запрошенным номером
-    page_obj = paginate_page(request, posts)
+    page_obj = paginate_page(request, posts, index_posts_count)
     return render(request, 'posts/index.html', {'page_obj': page_obj})
 
 
+@read_replica
+@conditional_feed(FEED_GROUP, 'slug')
+@cache_feed_page(FEED_GROUP, 'slug')
 def group_posts(request, slug):
-    # Функция get_object_or_404 получает по заданным критериям объект
-    # из базы данных или возвращает сообщение об ошибке, если объект не найден.
-    group = get_object_or_404(Group, slug=slug)
+    # Функция get_group_or_404 получает группу из кэша в памяти процесса
+    # или возвращает сообщение об ошибке, если группа не найдена.
+    group = get_group_or_404(slug)
     # .posts - related_name поля group класса Post
-    posts = group.posts.select_related('author')
+    posts = feed_rows(group.posts.all())
     # Получаем набор записей для страницы с запрошенным номером
-    page_obj = paginate_page(request, posts)
+    page_obj = paginate_page(
+        request, posts, partial(group_posts_count, group)
+    )
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -44,23 +81,119 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@read_replica
+@conditional_feed(FEED_AUTHOR, 'username')
+@cache_feed_page(FEED_AUTHOR, 'username')
 def profile(request, username):
     # Здесь код запроса к модели и создание словаря контекста
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.select_related('group')
+    author = get_author_or_404(username)
+    posts = feed_rows(author.posts.all())
+    # Количество постов берём из счётчика, а не COUNT по таблице постов
+    posts_count = author_posts_count(author)
     # Получаем набор записей для страницы с запрошенным номером
-    page_obj = paginate_page(request, posts)
+    page_obj = paginate_page(request, posts, posts_count)
+    following = (
+        request.user.is_authenticated
+        and Follow.objects.filter(user=request.user, author=author).exists()
+    )
     context = {
         'page_obj': page_obj,
         'author': author,
+        'posts_count': posts_count,
+        'following': following,
     }
     return render(request, 'posts/profile.html', context)
 
 
+@read_replica
+@conditional_page(post_etag)
 def post_detail(request, post_id):
     # Здесь код запроса к модели и создание словаря контекста
-    post = get_object_or_404(Post, pk=post_id)
-    return render(request, 'posts/post_detail.html', {'post': post})
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'),
+        pk=post_id
+    )
+    context = {
+        'post': post,
+        'posts_count': author_posts_count(post.author),
+    }
+    return render(request, 'posts/post_detail.html', context)
+
+
+@read_replica
+def search(request):
+    # Посты упорядочены по релевантности, а не по дате,
+    # поэтому результаты поиска всегда разбиты на страницы по номеру
+    query = request.GET.get('q', '').strip()
+    results = search_posts(query)
+    paginator = CountedPaginator(results, settings.OBJECTS_ON_THE_PAGE)
+    context = {
+        'query': query,
+        'results': results,
+        'page_obj': paginator.get_page(request.GET.get('page')),
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@read_replica
+@login_required
+def follow_index(request):
+    # Лента подписок всегда листается курсором: страница собирается
+    # из таблицы ленты и лент популярных авторов
+    paginator = TimelinePaginator(
+        request.user, settings.OBJECTS_ON_THE_PAGE
+    )
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    return render(request, 'posts/follow.html', {'page_obj': page_obj})
+
+
+@login_required
+def profile_follow(request, username):
+    author = get_author_or_404(username)
+    follow(request.user, author)
+    return redirect('posts:profile', username)
+
+
+@login_required
+def profile_unfollow(request, username):
+    author = get_author_or_404(username)
+    unfollow(request.user, author)
+    return redirect('posts:profile', username)
+
+
+def export_response(request, posts, name):
+    # Выгрузка отдаётся по частям по мере чтения постов из базы
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in CONTENT_TYPES:
+        raise Http404('Неизвестный формат выгрузки')
+    compress = bool(
+        accepts_gzip(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    )
+    response = StreamingHttpResponse(
+        export_posts(posts, export_format, compress),
+        content_type=CONTENT_TYPES[export_format]
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{name}-posts.{export_format}"'
+    )
+    if compress:
+        response['Content-Encoding'] = 'gzip'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+@login_required
+def profile_export(request, username):
+    author = get_author_or_404(username)
+    return export_response(
+        request, author.posts.all(), f'user-{author.pk}'
+    )
+
+
+@login_required
+def group_export(request, slug):
+    group = get_group_or_404(slug)
+    return export_response(request, group.posts.all(), group.slug)
 
 
 @login_required
@@ -81,8 +214,10 @@ def post_create(request):
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
-    if not post.author == request.user:
+    if post.author_id != request.user.pk:
         return redirect('posts:post_detail', post_id)
+    # Автор — текущий пользователь: не читаем его из базы ещё раз
+    post.author = request.user
     form = PostForm(request.POST or None, instance=post)
     if request.method == 'POST' and form.is_valid():
         form.save()
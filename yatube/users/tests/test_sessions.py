@@ -0,0 +1,159 @@
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY, get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.auth import user_cache_key, user_version_key
+from core.caches import bump_version
+from core.testing import other_process
+from core.sessions import SessionStore
+
+User = get_user_model()
+
+
+class SessionStoreTests(TestCase):
+    """Тест сессий в кэше с отложенной записью в базу"""
+    def setUp(self):
+        cache.clear()
+
+    def db_data(self, session):
+        return Session.objects.get(
+            session_key=session.session_key
+        ).get_decoded()
+
+    def test_changes_written_behind(self):
+        session = SessionStore()
+        session['theme'] = 'light'
+        session.create()
+        session.save()
+        session['theme'] = 'dark'
+        session.save()
+        self.assertEqual(self.db_data(session), {'theme': 'light'})
+        self.assertEqual(
+            SessionStore(session.session_key)['theme'], 'dark'
+        )
+        with override_settings(SESSION_WRITE_BEHIND_SECONDS=0):
+            session.save()
+        self.assertEqual(self.db_data(session), {'theme': 'dark'})
+
+    def test_login_written_through(self):
+        session = SessionStore()
+        session['theme'] = 'light'
+        session.create()
+        session.save()
+        session[SESSION_KEY] = '1'
+        session.save()
+        self.assertEqual(self.db_data(session)[SESSION_KEY], '1')
+
+    @override_settings(SESSION_CLEANUP_PROBABILITY=1)
+    def test_expired_sessions_cleared(self):
+        expired = SessionStore()
+        expired.set_expiry(-24 * 60 * 60)
+        expired.create()
+        SessionStore().create()
+        self.assertFalse(
+            Session.objects.filter(session_key=expired.session_key).exists()
+        )
+
+
+@override_settings(FEED_PAGE_CACHE_TIMEOUT=60)
+class CachedUserTests(TestCase):
+    """Тест пользователя запроса из кэша"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='JuniorTester', password='old-Pa55word'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.login(
+            username='JuniorTester', password='old-Pa55word'
+        )
+
+    def test_cached_feed_hit_needs_no_queries(self):
+        self.authorized_client.get(reverse('posts:index'))
+        with CaptureQueriesContext(connection) as context:
+            response = self.authorized_client.get(reverse('posts:index'))
+        self.assertTrue(response.context is None
+                        or response.context['user'].is_authenticated)
+        self.assertEqual(len(context.captured_queries), 0)
+
+    def test_session_survives_cache_loss(self):
+        cache.clear()
+        response = self.authorized_client.get(
+            reverse('users:password_change')
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_password_change_logs_out_other_sessions(self):
+        other_client = Client()
+        other_client.login(username='JuniorTester', password='old-Pa55word')
+        url = reverse('users:password_change')
+        self.assertEqual(other_client.get(url).status_code, 200)
+        self.authorized_client.post(url, {
+            'old_password': 'old-Pa55word',
+            'new_password1': 'new-Pa55word',
+            'new_password2': 'new-Pa55word',
+        })
+        self.assertEqual(self.authorized_client.get(url).status_code, 200)
+        self.assertEqual(other_client.get(url).status_code, 302)
+
+    def test_logout_drops_cached_user(self):
+        self.authorized_client.get(reverse('users:password_change'))
+        key = user_cache_key(CachedUserTests.user.pk)
+        self.assertIsNotNone(cache.get(key))
+        self.authorized_client.get(reverse('users:logout'))
+        self.assertIsNone(cache.get(key))
+
+    def test_change_in_other_process_logs_out(self):
+        """Пользователь, изменённый в другом процессе, читается заново
+        по версии в общем кэше, а не из кэша этого процесса."""
+        url = reverse('users:password_change')
+        self.assertEqual(self.authorized_client.get(url).status_code, 200)
+        user_id = CachedUserTests.user.pk
+        changes = (
+            {'is_active': False},
+            {'password': make_password('other-Pa55word')},
+        )
+        for change in changes:
+            with self.subTest(change=list(change)):
+                self.setUp()
+                self.assertEqual(
+                    self.authorized_client.get(url).status_code, 200
+                )
+                # Изменение в обход сигналов этого процесса и сброс
+                # версии, как его делает обработчик в другом процессе
+                User.objects.filter(pk=user_id).update(**change)
+                self.assertEqual(
+                    self.authorized_client.get(url).status_code, 200
+                )
+                bump_version(user_version_key(user_id))
+                self.assertEqual(
+                    self.authorized_client.get(url).status_code, 302
+                )
+                User.objects.filter(pk=user_id).update(
+                    is_active=True,
+                    password=CachedUserTests.user.password
+                )
+
+    def test_logout_seen_by_other_process(self):
+        """Сессия, закрытая в одном процессе, недействительна
+        и в другом, где она уже была прочитана."""
+        url = reverse('posts:follow_index')
+        with other_process():
+            self.assertEqual(self.authorized_client.get(url).status_code, 200)
+        session_key = self.authorized_client.session.session_key
+        self.authorized_client.get(reverse('users:logout'))
+        # Прежняя cookie сессии, например, скопированная до выхода
+        stale_client = Client()
+        stale_client.cookies[settings.SESSION_COOKIE_NAME] = session_key
+        with other_process():
+            self.assertEqual(stale_client.get(url).status_code, 302)
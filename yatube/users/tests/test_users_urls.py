@@ -1,10 +1,12 @@
 from django.test import TestCase, Client
 from django.contrib.auth import get_user_model
 
+from core.testing import QueryBudgetTestMixin
+
 User = get_user_model()
 
 
-class UsersURLTests(TestCase):
+class UsersURLTests(QueryBudgetTestMixin, TestCase):
     """Тест адресов и шаблонов страниц приложения Users"""
     @classmethod
     def setUp(self):
@@ -76,3 +78,22 @@ class UsersURLTests(TestCase):
         self.assertRedirects(
             response, f'/auth/login/?next={self.password_change_done_url}'
         )
+
+    def test_pages_within_query_budget(self):
+        """Тест бюджетов SQL-запросов страниц"""
+        urls = (
+            self.signup_url,
+            self.login_url,
+            self.password_reset_url,
+            self.password_reset_done_url,
+            self.password_change_url,
+            self.password_change_done_url,
+            self.password_reset_confirm_url,
+            self.password_reset_complete_url,
+            # Выход последним: он завершает сессию клиента
+            self.logging_out_url,
+        )
+        for client in (self.guest_client, self.authorized_client):
+            for url in urls:
+                with self.subTest(url=url):
+                    self.assertWithinQueryBudget(client, url)
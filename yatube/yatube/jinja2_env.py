@@ -0,0 +1,35 @@
+"""Окружение Jinja2 для шаблонов из каталога jinja2/.
+
+Повторяет то, что шаблоны Django получают из библиотек тегов:
+static, url, фильтры date, truncatechars, addclass и highlight.
+Пользователь, текущий год и сообщения приходят из тех же
+контекст-процессоров, что и в шаблонах Django
+(OPTIONS['context_processors'] бэкенда в настройках).
+"""
+from django.template.defaultfilters import date, truncatechars
+from django.templatetags.static import static
+from django.urls import reverse
+from jinja2 import Environment
+
+from core.templatetags.user_filters import addclass, replace_query
+from posts.templatetags.post_search import highlight
+
+
+def url(viewname, *args):
+    return reverse(viewname, args=args)
+
+
+def environment(**options):
+    env = Environment(**options)
+    env.globals.update({
+        'static': static,
+        'url': url,
+        'query_with': replace_query,
+    })
+    env.filters.update({
+        'date': date,
+        'truncatechars': truncatechars,
+        'addclass': addclass,
+        'highlight': highlight,
+    })
+    return env
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -34,6 +35,11 @@ ALLOWED_HOSTS = [
     'testserver',
 ]
 
+INTERNAL_IPS = [
+    '127.0.0.1',
+    '::1',
+]
+
 
 # Application definition
 
@@ -51,47 +57,111 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.ProfilerMiddleware',
+    'core.middleware.SlowQueryMiddleware',
+    'core.middleware.QueryBudgetMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
 
+CONTEXT_PROCESSORS = [
+    'django.template.context_processors.debug',
+    'django.template.context_processors.request',
+    'django.contrib.auth.context_processors.auth',
+    'django.contrib.messages.context_processors.messages',
+    # Добавлен контекст-процессор, возвращающий текущий год
+    'core.context_processors.year.year',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
-            'context_processors': [
-                'django.template.context_processors.debug',
-                'django.template.context_processors.request',
-                'django.contrib.auth.context_processors.auth',
-                'django.contrib.messages.context_processors.messages',
-                # Добавлен контекст-процессор, возвращающий текущий год
-                'core.context_processors.year.year',
-            ],
+            'context_processors': CONTEXT_PROCESSORS,
         },
     },
 ]
 
+# Jinja2 необязателен: без него все шаблоны отрисовывает Django
+try:
+    import jinja2  # noqa: F401
+except ImportError:
+    pass
+else:
+    TEMPLATES.append({
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [os.path.join(BASE_DIR, 'jinja2')],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            'environment': 'yatube.jinja2_env.environment',
+            # Тот же контекст, что и у шаблонов Django
+            'context_processors': CONTEXT_PROCESSORS,
+        },
+    })
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# Тесты пишут файлы кэша, метрик и журналов во временный каталог
+TEST_RUNNER = 'core.testing.TestRunner'
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Соединение с PRAGMA из OPTIONS (см. core.backends.sqlite3):
+# WAL позволяет читать во время записи, busy_timeout — ждать
+# блокировку, а не сразу получать "database is locked"
+SQLITE_PRAGMAS = {
+    'busy_timeout': 5000,
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -20000,
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Соединение переиспользуется запросами в течение 60 секунд
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            'pragmas': SQLITE_PRAGMAS,
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# Реплика только для чтения: копия основной базы, снятая командой
+# snapshot_database; путь к файлу копии берётся из YATUBE_REPLICA_DB
+if os.environ.get('YATUBE_REPLICA_DB'):
+    DATABASES['replica'] = {
+        'ENGINE': 'core.backends.sqlite3',
+        'NAME': f"file:{os.environ['YATUBE_REPLICA_DB']}?mode=ro",
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            # Журнал копии не меняется: она открыта только для чтения
+            'pragmas': {
+                key: value for key, value in SQLITE_PRAGMAS.items()
+                if key not in ('journal_mode', 'synchronous')
+            },
+        },
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -126,10 +196,48 @@ USE_L10N = True
 USE_TZ = True
 
 
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+
+# Сессии в кэше с отложенной записью в базу (см. core.sessions)
+SESSION_ENGINE = 'core.sessions'
+
+# default — кэш в памяти процесса. shared — кэш, общий для всех
+# процессов сервера: в нём лежат версии, по которым процессы узнают
+# об изменениях пользователей, групп и авторов (см. core.caches).
+# По умолчанию shared хранится в файлах на диске сервера; если
+# серверов несколько, укажите адрес memcached в YATUBE_MEMCACHED
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'YATUBE_SHARED_CACHE_DIR',
+            os.path.join(tempfile.gettempdir(), 'yatube-shared-cache')
+        ),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+if os.environ.get('YATUBE_MEMCACHED'):
+    CACHES['shared'] = {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': os.environ['YATUBE_MEMCACHED'].split(','),
+    }
+# Сессии — в общем кэше: выход и вход в одном процессе сразу видны
+# остальным, а не через время жизни сессии в их памяти
+SESSION_CACHE_ALIAS = 'shared'
+
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
+# Сюда collectstatic собирает статику с хэшами в именах и сжатыми
+# копиями; отдаёт её core.middleware.StaticFilesMiddleware
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStaticFilesStorage'
 
 # Authentication pages definition
 LOGIN_URL = 'users:login'
@@ -144,3 +252,127 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 # Глобальные константы
 # Количество выводимых на страницу объектов
 OBJECTS_ON_THE_PAGE = 10
+# Шаблоны, которые отрисовываются Jinja2 (версии из каталога jinja2/),
+# если он установлен; остальные отрисовывает Django
+JINJA2_TEMPLATES = ()
+# Наибольшее количество постов на странице JSON API (?limit=)
+API_PAGE_SIZE_LIMIT = 100
+# Режим пажинации лент: 'page' — по номеру страницы (LIMIT/OFFSET),
+# 'cursor' — keyset-пажинация по (pub_date, pk) с токенами ?cursor=
+PAGINATION_MODE = 'page'
+# Время хранения в кэше количества постов ленты, в секундах
+FEED_COUNT_CACHE_TIMEOUT = 60 * 60
+# До этого количества посты ленты считаются точно,
+# для больших лент используется оценка
+FEED_COUNT_EXACT_LIMIT = 10000
+# Время хранения в кэше страниц лент для анонимных посетителей,
+# в секундах; 0 отключает кэш страниц
+FEED_PAGE_CACHE_TIMEOUT = 60
+# Посты автора, у которого подписчиков больше этого числа, не
+# раскладываются по лентам подписок, а читаются из его ленты при показе
+FOLLOW_FANOUT_LIMIT = 1000
+# Сколько последних постов автора добавляется в ленту при подписке
+TIMELINE_BACKFILL = 50
+# Изменения сессии, кроме входа и смены пароля, пишутся в базу
+# не чаще одного раза за столько секунд
+SESSION_WRITE_BEHIND_SECONDS = 300
+# Вероятность очистки просроченных сессий при создании новой
+SESSION_CLEANUP_PROBABILITY = 0.01
+# Сколько секунд пользователь запроса хранится в кэше процесса
+USER_CACHE_TIMEOUT = 60
+# Сколько секунд браузер хранит статику с хэшем в имени
+STATIC_CACHE_MAX_AGE = 365 * 24 * 60 * 60
+# Файлы статики меньше этого размера в байтах не сжимаются
+STATIC_COMPRESS_MIN_SIZE = 256
+# Каталог отчётов профилировщика запросов (см. core.profiler)
+PROFILER_ROOT = os.path.join(BASE_DIR, 'profiles')
+# Параметр запроса с токеном включения профилирования
+PROFILER_PARAM = '_profile'
+# Сколько секунд действует токен профилирования
+PROFILER_TOKEN_MAX_AGE = 24 * 60 * 60
+# Сколько последних отчётов профилировщика хранится
+PROFILER_REPORTS_LIMIT = 50
+# Сколько строк cProfile выводится в отчёте
+PROFILER_STATS_LIMIT = 40
+# Каталог файлов метрик процессов сервера (см. core.metrics);
+# файлы завершившихся процессов удаляются при запуске сервера
+METRICS_DIR = os.environ.get(
+    'YATUBE_METRICS_DIR',
+    os.path.join(tempfile.gettempdir(), 'yatube-metrics')
+)
+# Токен страницы метрик: Prometheus передаёт его в заголовке
+# «Authorization: Bearer <токен>». Без токена страница доступна только
+# напрямую, без прокси, с адресов INTERNAL_IPS
+METRICS_TOKEN = os.environ.get('YATUBE_METRICS_TOKEN', '')
+# Сколько результатов поиска можно пролистать; больше не считается
+# и не показывается
+SEARCH_RESULTS_LIMIT = 500
+# Запросы SQL дольше этого числа миллисекунд пишутся в журнал
+# медленных запросов (см. core.slowlog)
+SLOW_QUERY_THRESHOLD_MS = 500
+# Файл журнала медленных запросов, строки JSON; каталог logs
+# не хранится в git
+SLOW_QUERY_LOG = os.environ.get(
+    'YATUBE_SLOW_QUERY_LOG',
+    os.path.join(BASE_DIR, 'logs', 'slow_queries.ndjson')
+)
+# Писать ли в журнал параметры запросов: в них бывают личные данные
+SLOW_QUERY_LOG_PARAMS = False
+# Таблицы, параметры запросов к которым в журнале всегда скрыты
+SLOW_QUERY_SENSITIVE_TABLES = ('auth_user', 'django_session')
+# Запрос одной формы пишется в журнал не чаще раза за столько секунд
+SLOW_QUERY_SHAPE_INTERVAL = 60
+# Сколько записей в минуту процесс может сделать в журнал
+SLOW_QUERY_LOG_RATE = 30
+# Сколько групп и авторов на модель хранит кэш поиска по slug
+# и имени в памяти процесса
+LOOKUP_CACHE_SIZE = 1000
+# Время жизни записей кэша поиска и фильтра Блума существующих slug
+# и имён, в секундах; 0 отключает кэш
+LOOKUP_CACHE_TIMEOUT = 60
+# Доля ложных срабатываний фильтра Блума: столько запросов
+# к несуществующим группам и авторам всё же доходит до базы
+LOOKUP_BLOOM_ERROR_RATE = 0.01
+# Базы, на которые уходит чтение лент (см. core.routers)
+DATABASE_REPLICAS = tuple(alias for alias in DATABASES if alias != 'default')
+# Сколько секунд после своей записи пользователь читает основную базу
+REPLICA_PIN_SECONDS = 15
+# Cookie, закрепляющая пользователя за основной базой
+REPLICA_PIN_COOKIE = 'replica_pin'
+# Сколько постов за раз читается из базы при выгрузке
+EXPORT_CHUNK_SIZE = 2000
+# Бюджеты SQL-запросов на один запрос к сайту по имени URL,
+# проверяются core.middleware.QueryBudgetMiddleware и тестами
+# (в тестах — строго). Бюджеты записи постов — по худшему случаю:
+# сессии и пользователя нет в кэше, у автора и группы ещё нет счётчиков
+QUERY_BUDGETS = {
+    'posts:index': 4,
+    'posts:group_list': 6,
+    'posts:profile': 7,
+    'posts:post_detail': 6,
+    'posts:post_create': 10,
+    'posts:post_edit': 11,
+    'posts:search': 4,
+    'posts:follow_index': 5,
+    'posts:profile_follow': 12,
+    'posts:profile_unfollow': 12,
+    'posts:profile_export': 3,
+    'posts:group_export': 3,
+    'posts:api_index': 3,
+    'posts:api_post_detail': 3,
+    'posts:api_group_list': 4,
+    'posts:api_profile': 4,
+    'users:signup': 5,
+    'users:login': 5,
+    'users:logout': 4,
+    'users:password_change': 7,
+    'users:password_change_done': 2,
+    'users:password_reset': 4,
+    'users:password_reset_done': 2,
+    'users:password_reset_confirm': 5,
+    'users:password_reset_complete': 2,
+}
+# Запрос одной формы, выполненный больше этого числа раз, считается N+1
+QUERY_REPEAT_LIMIT = 2
+# True - нарушение бюджета вызывает ошибку, False - пишется в лог
+QUERY_BUDGET_STRICT = False
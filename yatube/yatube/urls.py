@@ -9,6 +9,8 @@ urlpatterns = [
     # Стандартные шаблоны авторизации
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
+    # Отчёты профилировщика запросов для сотрудников
+    path('debug/', include('core.urls', namespace='core')),
     # импорт правил из приложения posts
     path('', include('posts.urls', namespace='posts')),
 ]
@@ -11,6 +11,12 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from core.metrics import prepare_metrics_dir
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Метрики прошлого запуска сервера удаляются, завершившихся
+# обработчиков этого запуска — переносятся в архив (см. core.metrics)
+prepare_metrics_dir()